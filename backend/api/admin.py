@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Specialization, Doctor, Slot, Appointment, UserProfile, ChatMessage, OTP, MedicalRecord
+from .models import (
+    Specialization, Doctor, Slot, Appointment, UserProfile, ChatMessage, OTP, MedicalRecord, Job, AuditLog, ArchivedAppointment, AppointmentTransition,
+    DoctorDailyStats, DoctorPatient, AppointmentRollup, RollupWatermark, SlotHold, WaitlistEntry, Payment, ChangeLogEntry
+)
 
 admin.site.register(Specialization)
 admin.site.register(Doctor)
@@ -9,3 +12,14 @@ admin.site.register(UserProfile)
 admin.site.register(ChatMessage)
 admin.site.register(OTP)
 admin.site.register(MedicalRecord)
+admin.site.register(Job)
+admin.site.register(AuditLog)
+admin.site.register(ArchivedAppointment)
+admin.site.register(AppointmentTransition)
+admin.site.register(DoctorDailyStats)
+admin.site.register(AppointmentRollup)
+admin.site.register(RollupWatermark)
+admin.site.register(SlotHold)
+admin.site.register(WaitlistEntry)
+admin.site.register(Payment)
+admin.site.register(ChangeLogEntry)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Register job handlers with the queue, signal receivers and system checks
+        from . import catalog, changes, checks, db_session, events, slot_finder, stats, tasks, waitlist  # noqa: F401
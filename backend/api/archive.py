@@ -0,0 +1,55 @@
+"""Move old terminal appointments into ``ArchivedAppointment`` in small batches.
+
+Every batch copies and deletes its rows in one transaction, so a run can be
+interrupted at any point and simply started again; already archived rows are
+gone from ``Appointment`` and are never copied twice. The deletions reach the
+sync change feed as ``archived``, not ``deleted``.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import changes
+from .models import Appointment, ArchivedAppointment, TERMINAL_STATUSES
+
+COPIED_FIELDS = [
+    'user_id', 'doctor_id', 'slot_id', 'appointment_date', 'patient_name',
+    'patient_age', 'patient_gender', 'problem', 'status', 'created_at',
+]
+
+
+def archivable(older_than_days):
+    cutoff = timezone.localdate() - timedelta(days=older_than_days)
+    return Appointment.objects.filter(status__in=TERMINAL_STATUSES, appointment_date__lt=cutoff)
+
+
+def archive_batch(older_than_days, batch_size):
+    """Archive up to ``batch_size`` of the oldest eligible rows. Returns how many moved."""
+    with transaction.atomic():
+        batch = list(
+            archivable(older_than_days).select_related('slot').order_by('id')[:batch_size]
+        )
+        if not batch:
+            return 0
+        ArchivedAppointment.objects.bulk_create([
+            ArchivedAppointment(
+                id=appt.id,
+                slot_time=appt.slot.time if appt.slot else '',
+                **{field: getattr(appt, field) for field in COPIED_FIELDS}
+            ) for appt in batch
+        ], ignore_conflicts=True)
+        with changes.archiving():
+            Appointment.objects.filter(id__in=[appt.id for appt in batch]).delete()
+    return len(batch)
+
+
+def archive_appointments(older_than_days, batch_size=500, max_batches=None):
+    """Archive in batches until nothing is left (or ``max_batches`` ran). Yields batch sizes."""
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(older_than_days, batch_size)
+        if not moved:
+            return
+        batches += 1
+        yield moved
@@ -0,0 +1,151 @@
+"""Async (ASGI) versions of the read-heavy endpoints.
+
+These run natively on the event loop when the project is served through
+``core.asgi`` (uvicorn workers), so a slow database round trip no longer pins
+a whole worker thread. They return the same payloads as their DRF
+counterparts in ``views.py`` (chat history pages by id instead of DRF cursors).
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from . import events
+from .models import Doctor, ChatMessage, UserProfile
+from .pagination import ChatHistoryPagination
+from .serializers import DoctorSerializer, ChatMessageSerializer
+from .availability import abooked_slot_ids, mark_availability
+from .holds import aheld_slot_ids
+from .views import profile_payload
+
+_jwt = JWTAuthentication()
+
+
+async def aauthenticate(request):
+    """Resolve the JWT bearer token on a plain Django request without blocking the loop."""
+    header = _jwt.get_header(request)
+    if header is None:
+        return None
+    raw_token = _jwt.get_raw_token(header)
+    if raw_token is None:
+        return None
+    try:
+        token = _jwt.get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return None
+    try:
+        return await User.objects.aget(pk=token[api_settings.USER_ID_CLAIM], is_active=True)
+    except User.DoesNotExist:
+        return None
+
+
+def _unauthorized():
+    return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+
+def _doctor_queryset():
+    return Doctor.objects.select_related('specialization').prefetch_related('slots')
+
+
+@require_GET
+async def doctor_list(request):
+    doctors = [doctor async for doctor in _doctor_queryset()]
+    return JsonResponse(DoctorSerializer(doctors, many=True).data, safe=False)
+
+
+@require_GET
+async def doctor_detail(request, pk):
+    try:
+        doctor = await _doctor_queryset().aget(pk=pk)
+    except Doctor.DoesNotExist:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+
+    data = DoctorSerializer(doctor).data
+    date_str = request.GET.get('date')
+    if date_str:
+        user = await aauthenticate(request)
+        held = await aheld_slot_ids(doctor.id, date_str, [slot['id'] for slot in data['slots']], user.pk if user else None)
+        mark_availability(data, await abooked_slot_ids(doctor.id, date_str), held)
+    return JsonResponse(data)
+
+
+@require_GET
+async def profile(request):
+    user = await aauthenticate(request)
+    if user is None:
+        return _unauthorized()
+    user_profile, _ = await UserProfile.objects.aget_or_create(user=user)
+    return JsonResponse(profile_payload(user, user_profile))
+
+
+@require_GET
+async def chat_history(request):
+    """Newest-first chat history in keyset pages (``?before=<id>&page_size=<n>``)."""
+    user = await aauthenticate(request)
+    if user is None:
+        return _unauthorized()
+    page_size = request.GET.get('page_size') or str(ChatHistoryPagination.page_size)
+    before = request.GET.get('before', '')
+    if not page_size.isdigit() or (before and not before.isdigit()):
+        return JsonResponse({'error': 'page_size and before must be positive integers.'}, status=400)
+    page_size = min(max(int(page_size), 1), ChatHistoryPagination.max_page_size)
+    chats = ChatMessage.objects.filter(user=user).order_by('-id')
+    if before:
+        chats = chats.filter(id__lt=int(before))
+    page = [chat async for chat in chats[:page_size + 1]]
+    next_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_url = request.build_absolute_uri(f"{request.path}?before={page[-1].id}&page_size={page_size}")
+    return JsonResponse({
+        'next': next_url,
+        'results': ChatMessageSerializer(page, many=True).data,
+    })
+
+
+@require_GET
+async def event_stream(request):
+    """Server-Sent Events with the caller's appointment changes.
+
+    Patients get ``appointment.*`` events for their own bookings, doctors also
+    for their appointments. Streams end after ``EVENTS_MAX_STREAM_SECONDS``
+    (or when the client falls too far behind) and the client reconnects.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'The event stream is only served through core.asgi.'}, status=501)
+    user = await aauthenticate(request)
+    if user is None:
+        return _unauthorized()
+    topics = [events.user_topic(user.pk)]
+    user_profile = await UserProfile.objects.filter(user=user).afirst()
+    if user_profile and user_profile.is_doctor and user_profile.doctor_id:
+        topics.append(events.doctor_topic(user_profile.doctor_id))
+
+    async def stream():
+        broker = events.get_broker()
+        subscription = broker.subscribe(topics)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.EVENTS_MAX_STREAM_SECONDS
+        try:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n"
+            while not subscription.overflowed and loop.time() < deadline:
+                message = await subscription.get(min(settings.EVENTS_HEARTBEAT_SECONDS, deadline - loop.time()))
+                if message is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {message['event']}\ndata: {json.dumps(message['data'], cls=DjangoJSONEncoder)}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Tell nginx not to buffer the stream
+    return response
@@ -0,0 +1,73 @@
+"""Per-doctor, per-date slot availability with a short-lived cache in front.
+
+The cache is only used when ``AVAILABILITY_CACHE_TTL`` is set, which by default
+is only the case with a shared (Redis) cache: with per-process caches another
+worker's booking could not invalidate this worker's copy.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import ACTIVE_STATUSES, Appointment, Slot
+
+
+def cache_key(doctor_id, date):
+    return f"availability:{doctor_id}:{date}"
+
+
+def booked_slots_query(doctor_id, date):
+    """Slot ids held by an active appointment for the doctor on the given date."""
+    return Appointment.objects.filter(
+        doctor_id=doctor_id,
+        appointment_date=date,
+        status__in=ACTIVE_STATUSES
+    ).values_list('slot_id', flat=True)
+
+
+def mark_availability(data, booked_slot_ids, held_slot_ids=()):
+    # Update the slots in the serialized data to reflect actual availability for THIS date
+    for slot in data.get('slots', []):
+        slot['is_held'] = slot['id'] in held_slot_ids
+        slot['is_booked'] = slot['id'] in booked_slot_ids or slot['is_held']
+    return data
+
+
+def booked_slot_ids(doctor_id, date):
+    if not settings.AVAILABILITY_CACHE_TTL:
+        return set(booked_slots_query(doctor_id, date))
+    key = cache_key(doctor_id, date)
+    booked = cache.get(key)
+    if booked is None:
+        booked = set(booked_slots_query(doctor_id, date))
+        cache.set(key, booked, settings.AVAILABILITY_CACHE_TTL)
+    return booked
+
+
+async def abooked_slot_ids(doctor_id, date):
+    if not settings.AVAILABILITY_CACHE_TTL:
+        return {slot_id async for slot_id in booked_slots_query(doctor_id, date)}
+    key = cache_key(doctor_id, date)
+    booked = await cache.aget(key)
+    if booked is None:
+        booked = {slot_id async for slot_id in booked_slots_query(doctor_id, date)}
+        await cache.aset(key, booked, settings.AVAILABILITY_CACHE_TTL)
+    return booked
+
+
+def invalidate(doctor_id, *dates):
+    if not settings.AVAILABILITY_CACHE_TTL:
+        return
+    cache.delete_many([cache_key(doctor_id, date) for date in dates])
+
+
+def doctors_with_free_slots(doctor_ids, date):
+    """Ids among ``doctor_ids`` with at least one slot not taken by an active appointment on ``date``."""
+    slots = dict(
+        Slot.objects.filter(doctor_id__in=doctor_ids).values('doctor_id')
+        .annotate(count=Count('id')).values_list('doctor_id', 'count')
+    )
+    booked = dict(
+        Appointment.objects.filter(doctor_id__in=doctor_ids, appointment_date=date, status__in=ACTIVE_STATUSES)
+        .values('doctor_id').annotate(count=Count('id')).values_list('doctor_id', 'count')
+    )
+    return {doctor_id for doctor_id, count in slots.items() if count > booked.get(doctor_id, 0)}
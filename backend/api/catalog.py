@@ -0,0 +1,100 @@
+"""In-process cache of the specialization and doctor-card catalogue.
+
+Specializations and the doctor summary fields shown next to every
+appointment change rarely, so each worker keeps them in plain dicts. The
+single ``CatalogVersion`` row is bumped in the same transaction whenever a
+``Specialization`` or ``Doctor`` is saved or deleted; workers compare it with
+the version of their snapshot at most every ``CATALOG_VERSION_CHECK_SECONDS``
+and reload when it moved, so a change reaches every worker within that delay.
+The stamp lives in the database rather than the cache so this holds with
+per-process caches too. Both the stamp and the catalogue are read from the
+primary, so a lagging replica can never pin an old catalogue to a new stamp.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import CatalogVersion, Doctor, Specialization
+
+VERSION_ID = 1
+
+_lock = threading.Lock()
+_snapshot = {'version': None, 'checked_at': 0.0, 'specializations': {}, 'doctors': {}}
+
+
+def current_version():
+    version = (
+        CatalogVersion.objects.using(DEFAULT_DB_ALIAS).filter(pk=VERSION_ID).values_list('version', flat=True).first()
+    )
+    # The row is created by its migration; 0 until the first bump if it went missing
+    return version or 0
+
+
+def bump_version():
+    """Move the stamp; call inside the transaction that changed the catalogue."""
+    if not CatalogVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1):
+        CatalogVersion.objects.get_or_create(pk=VERSION_ID, defaults={'version': 1})
+    # Reload here as soon as the change is visible
+    transaction.on_commit(_expire)
+
+
+def _expire():
+    _snapshot['checked_at'] = 0.0
+
+
+def _load(version):
+    specializations = dict(Specialization.objects.using(DEFAULT_DB_ALIAS).values_list('id', 'name'))
+    doctors = {
+        doctor['id']: dict(doctor, specialization_name=specializations.get(doctor['specialization_id']))
+        for doctor in Doctor.objects.using(DEFAULT_DB_ALIAS).values('id', 'name', 'specialization_id', 'image_url', 'location')
+    }
+    return {
+        'version': version, 'checked_at': time.monotonic(),
+        'specializations': specializations, 'doctors': doctors,
+    }
+
+
+def snapshot():
+    global _snapshot
+    current = _snapshot
+    if time.monotonic() - current['checked_at'] < settings.CATALOG_VERSION_CHECK_SECONDS:
+        return current
+    with _lock:
+        current = _snapshot
+        version = current_version()
+        if version == current['version']:
+            current['checked_at'] = time.monotonic()
+        else:
+            current = _snapshot = _load(version)
+    return current
+
+
+def specializations():
+    """All specializations as ``{'id', 'name'}`` dicts ordered by id."""
+    return [{'id': pk, 'name': name} for pk, name in sorted(snapshot()['specializations'].items())]
+
+
+def specialization_name(specialization_id):
+    return snapshot()['specializations'].get(specialization_id)
+
+
+def doctor_card(doctor_id):
+    """``id``, ``name``, ``specialization_id``, ``specialization_name``, ``image_url`` and ``location`` of a doctor.
+
+    ``None`` for a doctor created elsewhere within the last check interval;
+    callers fall back to the database then.
+    """
+    return snapshot()['doctors'].get(doctor_id)
+
+
+@receiver(post_save, sender=Specialization)
+@receiver(post_delete, sender=Specialization)
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def on_catalog_changed(sender, **kwargs):
+    bump_version()
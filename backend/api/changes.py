@@ -0,0 +1,154 @@
+"""Change feed behind ``/api/sync/``.
+
+Every write to an appointment, medical record or slot appends a
+``ChangeLogEntry`` in the same transaction, tagged with the patient and the
+doctor whose lists it affects. A client keeps the token from its last sync
+and asks for the entries after it, getting back only the rows created,
+updated or deleted since instead of whole collections. Appointments moved to
+``ArchivedAppointment`` by ``archive_appointments`` are reported as
+``archived`` rather than ``deleted``: they still exist, in the history.
+
+The token is the last entry id the client has seen plus the time it was
+issued. Ids are handed out before commit, so a slow transaction can commit
+an id lower than one already returned; the token therefore only advances
+past entries older than ``SYNC_LAG_SECONDS`` and anything newer is sent
+again next time (applying a change twice is harmless). Entries are pruned
+after ``SYNC_RETENTION_DAYS`` (``prune_changes``); a token older than that
+gets a full reset instead.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Appointment, ChangeLogEntry, MedicalRecord, Slot
+from .signals import appointment_rescheduled, appointment_transitioned
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+_archiving = ContextVar('archiving', default=False)
+
+
+@contextmanager
+def archiving():
+    """Record appointment deletions inside the block as ``archived``."""
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def record(model, object_id, action, user_id=None, doctor_id=None):
+    ChangeLogEntry.objects.create(model=model, object_id=object_id, action=action, user_id=user_id, doctor_id=doctor_id)
+
+
+def record_appointment(appointment, action='updated'):
+    record('appointment', appointment.pk, action, appointment.user_id, appointment.doctor_id)
+
+
+@receiver(post_save, sender=Appointment)
+def on_appointment_saved(sender, instance, created, **kwargs):
+    record_appointment(instance, 'created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Appointment)
+def on_appointment_deleted(sender, instance, **kwargs):
+    record_appointment(instance, 'archived' if _archiving.get() else 'deleted')
+
+
+# Status changes and reschedules are queryset updates, which skip post_save
+@receiver(appointment_transitioned)
+@receiver(appointment_rescheduled)
+def on_appointment_changed(sender, appointment, **kwargs):
+    record_appointment(appointment)
+
+
+@receiver(post_save, sender=MedicalRecord)
+@receiver(post_delete, sender=MedicalRecord)
+def on_record_changed(sender, instance, created=False, **kwargs):
+    action = 'deleted' if kwargs['signal'] is post_delete else 'created' if created else 'updated'
+    record('medical_record', instance.pk, action, instance.patient_id, instance.doctor_id)
+
+
+@receiver(post_save, sender=Slot)
+@receiver(post_delete, sender=Slot)
+def on_slot_changed(sender, instance, created=False, **kwargs):
+    action = 'deleted' if kwargs['signal'] is post_delete else 'created' if created else 'updated'
+    record('slot', instance.pk, action, doctor_id=instance.doctor_id)
+
+
+def make_token(last_id):
+    return f"{last_id}.{int(time.time())}"
+
+
+def parse_token(token):
+    """``last_id`` of a token, or ``None`` when it predates the retention window and needs a reset."""
+    try:
+        last_id, issued_at = (int(part) for part in token.split('.'))
+    except ValueError:
+        raise InvalidToken(token)
+    if issued_at < time.time() - (settings.SYNC_RETENTION_DAYS - 1) * 86400:
+        return None
+    return last_id
+
+
+def _cutoff():
+    return timezone.now() - timedelta(seconds=settings.SYNC_LAG_SECONDS)
+
+
+def latest_settled_id():
+    """Id the token can safely move to when the client takes a full snapshot now."""
+    return ChangeLogEntry.objects.filter(created_at__lte=_cutoff()).aggregate(last=Max('id'))['last'] or 0
+
+
+def scope(user, doctor_id):
+    feed = Q(user_id=user.pk)
+    if doctor_id:
+        feed |= Q(doctor_id=doctor_id)
+    return feed
+
+
+def changes_since(user, doctor_id, last_id, limit):
+    """Net changes after ``last_id`` as ``({model: {action: [ids]}}, next_last_id, has_more)``."""
+    entries = list(
+        ChangeLogEntry.objects.filter(scope(user, doctor_id), id__gt=last_id)
+        .order_by('id').values_list('id', 'model', 'object_id', 'action', 'created_at')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    cutoff = _cutoff()
+    next_last_id = last_id
+    for entry_id, _, _, _, created_at in entries:
+        if created_at > cutoff:
+            break
+        next_last_id = entry_id
+
+    # Net effect per object: deleted (or archived) wins, then created (it is new to the client), else updated
+    net = {}
+    for _, model, object_id, action, _ in entries:
+        previous = net.get((model, object_id))
+        if action in ('deleted', 'archived') or previous is None:
+            net[model, object_id] = action
+        elif previous in ('deleted', 'archived'):
+            net[model, object_id] = 'created'  # Same id again (e.g. restored from admin)
+    changes = {}
+    for (model, object_id), action in net.items():
+        changes.setdefault(model, {}).setdefault(action, []).append(object_id)
+    return changes, next_last_id, has_more and next_last_id > last_id
+
+
+def prune(days=None):
+    cutoff = timezone.now() - timedelta(days=days if days is not None else settings.SYNC_RETENTION_DAYS)
+    deleted, _ = ChangeLogEntry.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,21 @@
+"""System checks for settings that only matter once several workers run."""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn on ``check --deploy`` when the default cache is private to each process."""
+    if settings.CACHES['default']['BACKEND'] not in PER_PROCESS_CACHES:
+        return []
+    return [Warning(
+        'The default cache is per process.',
+        hint=('Replica pins, slot holds, idempotency keys and cached availability must be shared '
+              'between workers. Set REDIS_URL in production.'),
+        id='api.W001',
+    )]
@@ -0,0 +1,21 @@
+"""Session settings applied to every new database connection.
+
+The MySQL statement timeout differs between servers: MySQL has
+``max_execution_time`` (milliseconds, SELECTs only) and MariaDB rejects it in
+favour of ``max_statement_time`` (seconds). Both speak the same Django
+backend, so the server is checked per connection rather than in settings.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def set_statement_timeout(sender, connection, **kwargs):
+    if connection.vendor != 'mysql' or not settings.DB_STATEMENT_TIMEOUT_MS:
+        return
+    with connection.cursor() as cursor:
+        if connection.mysql_is_mariadb:
+            cursor.execute('SET SESSION max_statement_time = %s', [settings.DB_STATEMENT_TIMEOUT_MS / 1000])
+        else:
+            cursor.execute('SET SESSION max_execution_time = %s', [settings.DB_STATEMENT_TIMEOUT_MS])
@@ -0,0 +1,199 @@
+"""Push appointment changes to connected clients.
+
+Appointment signals publish a small delta after commit to the ``user:<id>``
+topic of the patient and the ``doctor:<id>`` topic of the doctor. The
+Server-Sent Events stream in ``async_views.event_stream`` subscribes to the
+caller's topics, so dashboards update in place instead of re-fetching lists.
+
+``LocalBroker`` fans messages out inside the process, which only reaches
+clients connected to the same worker. Any deployment with more than one
+process needs ``RedisBroker`` (the default once ``EVENTS_REDIS_URL`` or
+``REDIS_URL`` is set): messages then go through Redis pub/sub and every
+worker relays them to its own subscribers. That includes changes made by
+``run_jobs`` (waitlist promotions), which serves no clients itself.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .signals import appointment_created, appointment_rescheduled, appointment_transitioned
+
+try:
+    import redis
+    import redis.asyncio
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Messages for a set of topics, consumed by one coroutine on ``loop``."""
+
+    def __init__(self, topics, loop):
+        self.topics = tuple(topics)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, message):
+        # Called from any thread; the queue is only touched on its own loop
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind resyncs on reconnect instead
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """The next message, or ``None`` if nothing arrives within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalBroker:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+
+    def publish(self, topic, message):
+        self.fan_out(topic, message)
+
+    def fan_out(self, topic, message):
+        with self.lock:
+            subscriptions = list(self.subscribers.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def subscribe(self, topics):
+        """Subscribe from a coroutine; pair with ``unsubscribe`` when the stream ends."""
+        subscription = Subscription(topics, asyncio.get_running_loop())
+        with self.lock:
+            for topic in subscription.topics:
+                self.subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for topic in subscription.topics:
+                subscribers = self.subscribers.get(topic)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.subscribers[topic]
+
+
+class RedisBroker(LocalBroker):
+    """Relay messages between workers over Redis pub/sub (``EVENTS_REDIS_URL``, default ``REDIS_URL``)."""
+
+    channel_prefix = 'events:'
+
+    def __init__(self):
+        if not HAS_REDIS:
+            raise ImportError("RedisBroker needs the redis package")
+        super().__init__()
+        self.url = settings.EVENTS_REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.listeners = {}
+
+    def publish(self, topic, message):
+        self.client.publish(self.channel_prefix + topic, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def subscribe(self, topics):
+        subscription = super().subscribe(topics)
+        # One Redis listener per event loop feeds every local subscriber on it
+        listener = self.listeners.get(subscription.loop)
+        if listener is None or listener.done():
+            self.listeners[subscription.loop] = subscription.loop.create_task(self.listen())
+        return subscription
+
+    async def listen(self):
+        while True:
+            try:
+                client = redis.asyncio.Redis.from_url(self.url)
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(self.channel_prefix + '*')
+                    async for message in pubsub.listen():
+                        if message['type'] == 'pmessage':
+                            topic = message['channel'].decode()[len(self.channel_prefix):]
+                            self.fan_out(topic, json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Event relay lost its Redis connection, reconnecting", exc_info=True)
+                await asyncio.sleep(1)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENT_BROKER)()
+    return _broker
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+def doctor_topic(doctor_id):
+    return f"doctor:{doctor_id}"
+
+
+def publish(topics, event, data):
+    message = {'event': event, 'data': data}
+    for topic in topics:
+        try:
+            get_broker().publish(topic, message)
+        except Exception:
+            # Clients catch up on their next full load; never fail the write for this
+            logger.warning("Could not publish %s to %s", event, topic, exc_info=True)
+
+
+def delta(appointment, **extra):
+    return dict({
+        'id': appointment.pk,
+        'doctor': appointment.doctor_id,
+        'status': appointment.status,
+        'appointment_date': str(appointment.appointment_date),
+        'slot': appointment.slot_id,
+        'patient_name': appointment.patient_name,
+    }, **extra)
+
+
+def publish_on_commit(appointment, event, **extra):
+    topics = [user_topic(appointment.user_id), doctor_topic(appointment.doctor_id)]
+    data = delta(appointment, **extra)
+    transaction.on_commit(lambda: publish(topics, event, data))
+
+
+@receiver(appointment_created)
+def on_created(sender, appointment, **kwargs):
+    publish_on_commit(appointment, 'appointment.created')
+
+
+@receiver(appointment_transitioned)
+def on_transitioned(sender, appointment, from_status, to_status, **kwargs):
+    publish_on_commit(appointment, 'appointment.status', status=to_status, from_status=from_status)
+
+
+@receiver(appointment_rescheduled)
+def on_rescheduled(sender, appointment, old_date, old_slot_id, **kwargs):
+    publish_on_commit(appointment, 'appointment.rescheduled', old_date=str(old_date), old_slot=old_slot_id)
@@ -0,0 +1,81 @@
+"""Helpers for streaming large exports without materializing them in memory."""
+import csv
+import itertools
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Appointment, ArchivedAppointment, MedicalRecord
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = ['csv', 'ndjson']
+
+APPOINTMENT_EXPORT_COLUMNS = [
+    'id', 'appointment_date', 'slot_time', 'status', 'patient_name', 'patient_age',
+    'patient_gender', 'problem', 'patient_username', 'created_at', 'archived',
+]
+# File contents are never exported, only metadata
+RECORD_EXPORT_COLUMNS = ['id', 'uploaded_at', 'file_name', 'file_type', 'file_size', 'patient_username', 'doctor']
+
+
+class Echo:
+    """File-like object whose ``write`` hands the row straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+def csv_rows(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_rows(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def json_array_rows(header, rows):
+    """A JSON array of objects, one row at a time, encoded like DRF's ``JSONRenderer`` output."""
+    yield '['
+    for i, row in enumerate(rows):
+        yield (',' if i else '') + json.dumps(dict(zip(header, row)), cls=JSONEncoder, separators=(',', ':'))
+    yield ']'
+
+
+def streaming_export(header, rows, fmt, filename):
+    """Stream ``rows`` (an iterator of tuples) as CSV or NDJSON."""
+    if fmt == 'ndjson':
+        response = StreamingHttpResponse(ndjson_rows(header, rows), content_type='application/x-ndjson')
+        filename = f'{filename}.ndjson'
+    else:
+        response = StreamingHttpResponse(csv_rows(header, rows), content_type='text/csv')
+        filename = f'{filename}.csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def appointment_export_rows(doctor, include_history=False):
+    """All appointments of ``doctor`` as tuples, optionally followed by the archived ones."""
+    live = Appointment.objects.filter(doctor=doctor).order_by('-appointment_date', '-id').values_list(
+        'id', 'appointment_date', 'slot__time', 'status', 'patient_name', 'patient_age',
+        'patient_gender', 'problem', 'user__username', 'created_at'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    rows = (row + (False,) for row in live)
+    if include_history:
+        archived = ArchivedAppointment.objects.filter(doctor=doctor).order_by('-appointment_date', '-id').values_list(
+            'id', 'appointment_date', 'slot_time', 'status', 'patient_name', 'patient_age',
+            'patient_gender', 'problem', 'user__username', 'created_at'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        rows = itertools.chain(rows, (row + (True,) for row in archived))
+    return rows
+
+
+def record_export_rows(records):
+    return records.values_list(
+        'id', 'uploaded_at', 'file_name', 'file_type', 'file_size', 'patient__username', 'doctor__name'
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
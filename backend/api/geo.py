@@ -0,0 +1,160 @@
+"""Coordinates, geohashes and radius search for doctors.
+
+``Doctor.location`` is free text, so coordinates come from an offline table
+of the cities doctors are seeded in (``geocode``) unless they are set
+explicitly. Each doctor also stores the geohash of its coordinates: nearby
+points share a prefix, so a radius search becomes a handful of indexed range
+scans over ``Doctor.geohash`` (the cell around the centre and its eight
+neighbours, at a precision where a cell is at least as large as the radius),
+followed by an exact great-circle distance check on the few rows returned.
+"""
+import math
+
+from django.db.models import Q
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # ~5 m cells
+EARTH_RADIUS_KM = 6371.0088
+
+# Lower-case city name -> (latitude, longitude)
+CITIES = {
+    'mumbai': (19.0760, 72.8777),
+    'navi mumbai': (19.0330, 73.0297),
+    'thane': (19.2183, 72.9781),
+    'pune': (18.5204, 73.8567),
+    'nagpur': (21.1458, 79.0882),
+    'nashik': (19.9975, 73.7898),
+    'new delhi': (28.6139, 77.2090),
+    'delhi': (28.7041, 77.1025),
+    'noida': (28.5355, 77.3910),
+    'gurugram': (28.4595, 77.0266),
+    'gurgaon': (28.4595, 77.0266),
+    'bengaluru': (12.9716, 77.5946),
+    'bangalore': (12.9716, 77.5946),
+    'chennai': (13.0827, 80.2707),
+    'hyderabad': (17.3850, 78.4867),
+    'kolkata': (22.5726, 88.3639),
+    'ahmedabad': (23.0225, 72.5714),
+    'surat': (21.1702, 72.8311),
+    'jaipur': (26.9124, 75.7873),
+    'lucknow': (26.8467, 80.9462),
+    'kanpur': (26.4499, 80.3319),
+    'indore': (22.7196, 75.8577),
+    'bhopal': (23.2599, 77.4126),
+    'patna': (25.5941, 85.1376),
+    'chandigarh': (30.7333, 76.7794),
+    'kochi': (9.9312, 76.2673),
+    'thiruvananthapuram': (8.5241, 76.9366),
+    'coimbatore': (11.0168, 76.9558),
+    'visakhapatnam': (17.6868, 83.2185),
+    'goa': (15.2993, 74.1240),
+    'guwahati': (26.1445, 91.7362),
+    'bhubaneswar': (20.2961, 85.8245),
+}
+
+
+def geocode(location):
+    """``(latitude, longitude)`` of the first known city named in ``location``, or ``None``."""
+    for part in (location or '').split(','):
+        point = CITIES.get(part.strip().lower())
+        if point:
+            return point
+    return None
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """``(height, width)`` in degrees of a geohash cell of ``precision`` characters."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def precision_for(radius_km, latitude):
+    """Longest precision whose cells are at least ``radius_km`` on each side at ``latitude``."""
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        if min(height * km_per_degree, width * km_per_degree * math.cos(math.radians(latitude))) >= radius_km:
+            return precision
+    return 1
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """Geohash prefixes whose cells together cover the circle of ``radius_km`` around the point."""
+    precision = precision_for(radius_km, latitude)
+    height, width = cell_size(precision)
+    prefixes = set()
+    for dlat in (-height, 0, height):
+        for dlon in (-width, 0, width):
+            lat = max(-90.0, min(90.0, latitude + dlat))
+            lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            prefixes.add(encode(lat, lon, precision))
+    return prefixes
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """``(min_lat, max_lat, min_lon, max_lon)`` around the circle; longitudes are ``None`` near the poles or the antimeridian."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(latitude))
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)) if cos_lat > 1e-6 else 360.0
+    min_lon, max_lon = longitude - dlon, longitude + dlon
+    if min_lon < -180.0 or max_lon > 180.0:
+        min_lon = max_lon = None
+    return latitude - dlat, latitude + dlat, min_lon, max_lon
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _prefix_end(prefix):
+    """Smallest geohash sorting after every hash starting with ``prefix`` (``None`` if there is none)."""
+    prefix = prefix.rstrip(BASE32[-1])
+    if not prefix:
+        return None
+    return prefix[:-1] + BASE32[BASE32.index(prefix[-1]) + 1]
+
+
+def nearby(queryset, latitude, longitude, radius_km):
+    """``(distance_km, id)`` of the rows in ``queryset`` within ``radius_km`` of the point, nearest first."""
+    cells = Q()
+    for prefix in covering_prefixes(latitude, longitude, radius_km):
+        # Plain range comparisons so any B-tree index on the column serves them
+        end = _prefix_end(prefix)
+        cells |= Q(geohash__gte=prefix, geohash__lt=end) if end else Q(geohash__gte=prefix)
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_km)
+    queryset = queryset.filter(cells, latitude__range=(min_lat, max_lat))
+    if min_lon is not None:
+        queryset = queryset.filter(longitude__range=(min_lon, max_lon))
+
+    found = []
+    for pk, lat, lon in queryset.values_list('id', 'latitude', 'longitude'):
+        distance = distance_km(latitude, longitude, lat, lon)
+        if distance <= radius_km:
+            found.append((distance, pk))
+    found.sort()
+    return found
@@ -0,0 +1,161 @@
+"""Short-lived slot holds taken while a patient fills in the booking form.
+
+A hold reserves ``(doctor, slot, date)`` for one user for
+``SLOT_HOLD_SECONDS``. Availability shows held slots as taken to everyone
+else. Booking takes the hold for the booker, which fails while someone else
+holds it and keeps others out until the booking commits and releases it.
+Holds expire on their own: cache entries by timeout, database rows by being
+ignored once past ``expires_at`` and overwritten by the next hold, so nothing
+ever has to sweep them. Double bookings are prevented by the
+``unique_active_booking`` constraint, not by holds.
+
+``CacheHoldStore`` (the default) keeps holds in the Django cache and falls
+back to ``DatabaseHoldStore`` when the cache is unreachable.
+"""
+import logging
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import SlotHold
+
+logger = logging.getLogger(__name__)
+
+
+def hold_key(doctor_id, slot_id, date):
+    return f"slot-hold:{doctor_id}:{slot_id}:{date}"
+
+
+class DatabaseHoldStore:
+    def place(self, doctor_id, slot_id, date, user_id):
+        """Hold the slot for ``user_id``. Returns the expiry, or ``None`` if someone else holds it."""
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=settings.SLOT_HOLD_SECONDS)
+        with transaction.atomic():
+            SlotHold.objects.filter(
+                doctor_id=doctor_id, slot_id=slot_id, appointment_date=date, expires_at__lte=now
+            ).delete()
+            hold, created = SlotHold.objects.select_for_update().get_or_create(
+                doctor_id=doctor_id, slot_id=slot_id, appointment_date=date,
+                defaults={'user_id': user_id, 'expires_at': expires_at},
+            )
+            if hold.user_id != user_id:
+                return None
+            if not created:
+                hold.expires_at = expires_at
+                hold.save(update_fields=['expires_at'])
+        return expires_at
+
+    def holder(self, doctor_id, slot_id, date):
+        return SlotHold.objects.filter(
+            doctor_id=doctor_id, slot_id=slot_id, appointment_date=date, expires_at__gt=timezone.now()
+        ).values_list('user_id', flat=True).first()
+
+    def held_slot_ids(self, doctor_id, date, slot_ids, exclude_user_id=None):
+        holds = SlotHold.objects.filter(
+            doctor_id=doctor_id, appointment_date=date, slot_id__in=slot_ids, expires_at__gt=timezone.now()
+        )
+        if exclude_user_id is not None:
+            holds = holds.exclude(user_id=exclude_user_id)
+        return set(holds.values_list('slot_id', flat=True))
+
+    def release(self, doctor_id, slot_id, date, user_id):
+        SlotHold.objects.filter(doctor_id=doctor_id, slot_id=slot_id, appointment_date=date, user_id=user_id).delete()
+
+
+class CacheHoldStore:
+    """Holds as cache entries expiring by timeout; ``cache.add`` makes taking one atomic."""
+
+    def __init__(self):
+        self.fallback = DatabaseHoldStore()
+
+    def place(self, doctor_id, slot_id, date, user_id):
+        key = hold_key(doctor_id, slot_id, date)
+        expires_at = timezone.now() + timedelta(seconds=settings.SLOT_HOLD_SECONDS)
+        try:
+            if cache.add(key, user_id, settings.SLOT_HOLD_SECONDS):
+                return expires_at
+            if cache.get(key) != user_id:
+                return None
+            cache.touch(key, settings.SLOT_HOLD_SECONDS)
+            return expires_at
+        except Exception:
+            logger.warning("Hold cache unavailable, using the database", exc_info=True)
+            return self.fallback.place(doctor_id, slot_id, date, user_id)
+
+    def holder(self, doctor_id, slot_id, date):
+        try:
+            return cache.get(hold_key(doctor_id, slot_id, date))
+        except Exception:
+            return self.fallback.holder(doctor_id, slot_id, date)
+
+    def held_slot_ids(self, doctor_id, date, slot_ids, exclude_user_id=None):
+        try:
+            holders = cache.get_many([hold_key(doctor_id, slot_id, date) for slot_id in slot_ids])
+        except Exception:
+            return self.fallback.held_slot_ids(doctor_id, date, slot_ids, exclude_user_id)
+        return {
+            slot_id for slot_id in slot_ids
+            if holders.get(hold_key(doctor_id, slot_id, date)) not in (None, exclude_user_id)
+        }
+
+    def release(self, doctor_id, slot_id, date, user_id):
+        # Not a compare-and-delete: a hold expiring and being retaken between the
+        # get and the delete is lost early, which only reopens it to everyone
+        try:
+            key = hold_key(doctor_id, slot_id, date)
+            if cache.get(key) == user_id:
+                cache.delete(key)
+        except Exception:
+            self.fallback.release(doctor_id, slot_id, date, user_id)
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = import_string(settings.SLOT_HOLD_STORE)()
+    return _store
+
+
+def place(doctor_id, slot_id, date, user_id):
+    return get_store().place(doctor_id, slot_id, date, user_id)
+
+
+def held_slot_ids(doctor_id, date, slot_ids, exclude_user_id=None):
+    """Slot ids among ``slot_ids`` held on ``date`` by anyone except ``exclude_user_id``."""
+    return get_store().held_slot_ids(doctor_id, date, slot_ids, exclude_user_id)
+
+
+aheld_slot_ids = sync_to_async(held_slot_ids)
+
+
+def held_targets(targets, exclude_user_id=None):
+    """The ``(doctor_id, date, slot_id)`` triples among ``targets`` held by anyone except ``exclude_user_id``."""
+    by_day = {}
+    for doctor_id, date, slot_id in targets:
+        by_day.setdefault((doctor_id, date), []).append(slot_id)
+    return {
+        (doctor_id, date, slot_id)
+        for (doctor_id, date), slot_ids in by_day.items()
+        for slot_id in held_slot_ids(doctor_id, date, slot_ids, exclude_user_id)
+    }
+
+
+def release(doctor_id, slot_id, date, user_id):
+    get_store().release(doctor_id, slot_id, date, user_id)
+
+
+def consume_on_commit(appointment):
+    """Release the booker's hold once their appointment is committed."""
+    doctor_id, slot_id, date, user_id = (
+        appointment.doctor_id, appointment.slot_id, appointment.appointment_date, appointment.user_id
+    )
+    transaction.on_commit(lambda: release(doctor_id, slot_id, date, user_id))
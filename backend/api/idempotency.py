@@ -0,0 +1,86 @@
+"""``Idempotency-Key`` support for unsafe endpoints.
+
+A client sends the same ``Idempotency-Key`` header when it retries a POST
+(the frontend's token-refresh interceptor replays the original request).
+The first request claims the key in the cache with ``cache.add``, runs the
+handler and stores the status and body, zlib-compressed, for
+``IDEMPOTENCY_TTL`` seconds. Replays get the stored response back without
+running the handler again; a replay arriving while the first request is
+still running gets 409. Keys are scoped to the user and the URL, and reusing
+a key with a different body is rejected with 422. Server errors are not
+stored, so those can be retried.
+"""
+import functools
+import hashlib
+import json
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+IN_PROGRESS = 'in-progress'
+
+
+def cache_key(request, key):
+    return f"idempotency:{request.user.pk}:{request.method}:{request.path}:{key}"
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()[:32]
+
+
+def pack(response, digest):
+    body = zlib.compress(json.dumps(response.data, cls=DjangoJSONEncoder).encode())
+    return (digest, response.status_code, body)
+
+
+def replay(stored):
+    _, status_code, body = stored
+    response = Response(json.loads(zlib.decompress(body)), status=status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """Make a DRF view method safe to retry with an ``Idempotency-Key`` header."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({'error': 'Idempotency-Key is too long.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        store_key = cache_key(request, key)
+        digest = fingerprint(request)
+        if not cache.add(store_key, (digest, IN_PROGRESS, None), settings.IDEMPOTENCY_LOCK_SECONDS):
+            stored = cache.get(store_key)
+            if stored is None:
+                # Expired between add and get; treat like a fresh request
+                return wrapper(self, request, *args, **kwargs)
+            if stored[0] != digest:
+                return Response({'error': 'Idempotency-Key was already used with a different request.'},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            if stored[1] == IN_PROGRESS:
+                return Response({'error': 'A request with this Idempotency-Key is still being processed.'},
+                                status=status.HTTP_409_CONFLICT)
+            return replay(stored)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            cache.delete(store_key)
+            raise
+        if response.status_code >= 500:
+            cache.delete(store_key)
+        else:
+            cache.set(store_key, pack(response, digest), settings.IDEMPOTENCY_TTL)
+        return response
+
+    return wrapper
@@ -0,0 +1,159 @@
+"""Keyword intent engine for the chat assistant.
+
+A symptom lexicon is compiled once at import into an Aho-Corasick automaton,
+so matching a message costs a single pass over its characters no matter how
+many phrases the lexicon holds. Matches map to specializations, which are then
+turned into concrete doctor recommendations with open slots.
+"""
+from collections import Counter, deque
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import ACTIVE_STATUSES, Appointment, Doctor
+
+# Specialization name -> symptom phrases (lowercase).
+SYMPTOM_LEXICON = {
+    'General Physician': [
+        'fever', 'cold', 'cough', 'flu', 'sore throat', 'fatigue', 'tired', 'body ache',
+        'vomiting', 'nausea', 'diarrhea', 'stomach ache', 'infection', 'headache',
+    ],
+    'Cardiologist': [
+        'chest pain', 'heart', 'palpitation', 'palpitations', 'blood pressure', 'hypertension',
+        'shortness of breath', 'breathless', 'irregular heartbeat', 'cholesterol',
+    ],
+    'Neurologist': [
+        'migraine', 'headache', 'dizziness', 'dizzy', 'seizure', 'numbness', 'tingling',
+        'memory loss', 'tremor', 'fainting', 'vertigo',
+    ],
+    'Psychologist': [
+        'anxiety', 'anxious', 'depression', 'depressed', 'stress', 'panic', 'insomnia',
+        "can't sleep", 'mood swings', 'lonely', 'burnout',
+    ],
+    'Dermatologist': [
+        'rash', 'acne', 'itching', 'itchy', 'eczema', 'skin', 'hair loss', 'pimples',
+        'psoriasis', 'allergy', 'dandruff',
+    ],
+}
+
+DEFAULT_RESPONSE = (
+    "I understand you're asking about '{message}'. As a virtual assistant, I recommend booking "
+    "an appointment with one of our specialists for a detailed diagnosis."
+)
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: every pattern is found in one left-to-right scan."""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern, value):
+        state = 0
+        for char in pattern:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = nxt
+        self.output[state].append((len(pattern), value))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(char, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def search(self, text):
+        """Yield ``(start, end, value)`` for each whole-word pattern occurrence."""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, value in self.output[state]:
+                start = index - length + 1
+                end = index + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    yield start, end, value
+
+
+_MATCHER = AhoCorasick(
+    (phrase, specialization)
+    for specialization, phrases in SYMPTOM_LEXICON.items()
+    for phrase in phrases
+)
+
+
+def detect_specializations(message):
+    """Specializations suggested by the message, strongest match first."""
+    hits = Counter(value for _, _, value in _MATCHER.search(message.lower()))
+    return [name for name, _ in hits.most_common()]
+
+
+def recommend_doctors(specializations, on_date=None, limit=3):
+    """Available doctors in the given specializations that still have open slots on ``on_date``."""
+    if not specializations:
+        return []
+    on_date = on_date or timezone.localdate()
+    booked = Appointment.objects.filter(
+        appointment_date=on_date, status__in=ACTIVE_STATUSES
+    ).values('slot_id')
+    doctors = (
+        Doctor.objects.filter(specialization__name__in=specializations, is_available=True)
+        .select_related('specialization')
+        .annotate(open_slots=Count('slots', filter=~Q(slots__id__in=booked)))
+        .filter(open_slots__gt=0)
+        .order_by('-rating', '-reviews_count')[:limit]
+    )
+    return [{
+        'id': d.id,
+        'name': d.name,
+        'specialization': d.specialization.name,
+        'rating': d.rating,
+        'open_slots': d.open_slots,
+    } for d in doctors]
+
+
+def compose_response_parts(message, specializations, doctors):
+    """The response text in the pieces it is built from, for streaming them as they are ready."""
+    if not specializations:
+        yield DEFAULT_RESPONSE.format(message=message)
+        return
+    yield f"Based on what you describe, a {' or '.join(specializations[:2])} would be the right specialist."
+    if not doctors:
+        yield " No matching doctor has open slots today, please check other dates."
+        return
+    for i, d in enumerate(doctors):
+        lead = " You can book with " if i == 0 else ", "
+        yield f"{lead}{d['name']} ({d['specialization']}, {d['open_slots']} open slots today)"
+    yield "."
+
+
+def compose_response(message, specializations, doctors):
+    return ''.join(compose_response_parts(message, specializations, doctors))
+
+
+def reply(message):
+    """Answer a chat message with a response text and doctor recommendations."""
+    specializations = detect_specializations(message)
+    doctors = recommend_doctors(specializations)
+    return {
+        'response': compose_response(message, specializations, doctors),
+        'specializations': specializations,
+        'doctors': doctors,
+    }
@@ -0,0 +1,137 @@
+"""Database-backed job queue.
+
+Jobs are inserted in the same transaction as the write that caused them, so
+a rolled-back booking never sends a notification, and are executed by the
+``run_jobs`` management command. Claiming is a conditional UPDATE on the row
+status, which keeps several workers from running the same job without
+relying on database-specific locking.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def register(name, pass_job_id=False):
+    """Register the decorated function as the handler for jobs called ``name``.
+
+    With ``pass_job_id`` the handler also gets ``job_id``, so it can make its
+    effect idempotent when a run succeeds but marking the job done is lost.
+    """
+    def decorator(func):
+        func.pass_job_id = pass_job_id
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, key=None, delay=0, max_attempts=None):
+    """Queue ``name`` with ``payload``. A repeated ``key`` returns the existing job instead."""
+    fields = {
+        'name': name,
+        'payload': payload or {},
+        'run_at': timezone.now() + timedelta(seconds=delay),
+        'max_attempts': max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    }
+    if key:
+        try:
+            with transaction.atomic():
+                job = Job.objects.create(idempotency_key=key, **fields)
+        except IntegrityError:
+            return Job.objects.get(idempotency_key=key)
+    else:
+        job = Job.objects.create(**fields)
+
+    if settings.JOBS_EAGER and not delay:
+        # Delayed jobs still wait for run_jobs
+        transaction.on_commit(lambda: run_job_id(job.id))
+    return job
+
+
+def backoff(attempts):
+    """Seconds to wait before retry number ``attempts``: exponential with jitter, capped."""
+    delay = min(settings.JOBS_BACKOFF_BASE * (2 ** (attempts - 1)), settings.JOBS_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim(batch_size=10):
+    """Atomically mark up to ``batch_size`` due jobs as Running and return them."""
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(status='Pending', run_at__lte=now)
+        .order_by('run_at')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    claimed = [
+        job_id for job_id in candidates
+        if Job.objects.filter(id=job_id, status='Pending').update(
+            status='Running', locked_at=now, attempts=F('attempts') + 1
+        )
+    ]
+    return list(Job.objects.filter(id__in=claimed).order_by('run_at'))
+
+
+def requeue_stale(timeout=None):
+    """Put back jobs whose worker died while running them."""
+    cutoff = timezone.now() - timedelta(seconds=timeout or settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(status='Running', locked_at__lt=cutoff).update(status='Pending', locked_at=None)
+
+
+def prune(days=None):
+    """Delete finished (done or failed) jobs older than ``JOBS_RETENTION_DAYS``."""
+    cutoff = timezone.now() - timedelta(days=days if days is not None else settings.JOBS_RETENTION_DAYS)
+    deleted, _ = Job.objects.filter(status__in=('Done', 'Failed'), run_at__lt=cutoff).delete()
+    return deleted
+
+
+def run_job(job):
+    handler = _registry.get(job.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{job.name}'")
+        if handler.pass_job_id:
+            handler(job_id=job.id, **job.payload)
+        else:
+            handler(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s (%s) failed on attempt %s", job.id, job.name, job.attempts)
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(id=job.id).update(status='Failed', last_error=error, locked_at=None)
+        else:
+            Job.objects.filter(id=job.id).update(
+                status='Pending',
+                last_error=error,
+                locked_at=None,
+                run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            )
+        return False
+    Job.objects.filter(id=job.id).update(status='Done', last_error='', locked_at=None)
+    return True
+
+
+def run_job_id(job_id):
+    """Claim and run a single job right away (used in eager mode)."""
+    if Job.objects.filter(id=job_id, status='Pending').update(
+        status='Running', locked_at=timezone.now(), attempts=F('attempts') + 1
+    ):
+        run_job(Job.objects.get(id=job_id))
+
+
+def run_pending(batch_size=10):
+    """Run one batch of due jobs. Returns the number of jobs processed."""
+    jobs = claim(batch_size)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.archive import archive_appointments, archivable
+
+
+class Command(BaseCommand):
+    help = "Move completed, canceled and rejected appointments older than the horizon into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.APPOINTMENT_ARCHIVE_AFTER_DAYS,
+                            help='Archive terminal appointments dated more than this many days ago')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count eligible appointments')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable(options['days']).count()
+            self.stdout.write(f"{count} appointments eligible for archiving")
+            return
+
+        total = 0
+        for moved in archive_appointments(options['days'], options['batch_size'], options['max_batches']):
+            total += moved
+            self.stdout.write(f"Archived {moved} appointments ({total} so far)")
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} appointments archived."))
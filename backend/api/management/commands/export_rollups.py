@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from api import analytics
+
+
+class Command(BaseCommand):
+    help = "Export appointment rollups to a Parquet (requires pyarrow) or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the file to write')
+        parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+        parser.add_argument('--granularity', choices=['hour', 'day'], default='day')
+        parser.add_argument('--since', help='Only buckets at or after this ISO datetime')
+        parser.add_argument('--until', help='Only buckets before this ISO datetime')
+
+    def handle(self, *args, **options):
+        if options['format'] == 'parquet' and not analytics.HAS_PYARROW:
+            raise CommandError("Parquet export needs pyarrow; install it or use --format csv.")
+
+        rows = analytics.rollup_rows(
+            options['granularity'],
+            parse_datetime(options['since']) if options['since'] else None,
+            parse_datetime(options['until']) if options['until'] else None,
+        )
+        if options['format'] == 'parquet':
+            analytics.write_parquet(rows, options['output'])
+        else:
+            analytics.write_csv(rows, options['output'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
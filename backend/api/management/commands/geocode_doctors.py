@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api import geo
+from api.models import Doctor
+
+
+class Command(BaseCommand):
+    help = "Fill doctor coordinates from their location's city and recompute geohashes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-geocode every doctor, not only those missing coordinates')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        doctors = Doctor.objects.only('id', 'location', 'latitude', 'longitude', 'geohash')
+        if not options['all']:
+            doctors = doctors.filter(Q(latitude__isnull=True) | Q(longitude__isnull=True) | Q(geohash=''))
+
+        changed, unknown = [], 0
+        for doctor in doctors.iterator(chunk_size=options['batch_size']):
+            if options['all'] or doctor.latitude is None or doctor.longitude is None:
+                point = geo.geocode(doctor.location)
+                if point is None:
+                    unknown += 1
+                    continue
+                doctor.latitude, doctor.longitude = point
+            doctor.geohash = geo.encode(doctor.latitude, doctor.longitude)
+            changed.append(doctor)
+        Doctor.objects.bulk_update(changed, ['latitude', 'longitude', 'geohash'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Geocoded {len(changed)} doctors; {unknown} have a location outside the city table."
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import changes
+
+
+class Command(BaseCommand):
+    help = "Delete sync change log entries older than SYNC_RETENTION_DAYS (clients holding older tokens resync fully)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Override SYNC_RETENTION_DAYS')
+
+    def handle(self, *args, **options):
+        deleted = changes.prune(options['days'])
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} change log entries."))
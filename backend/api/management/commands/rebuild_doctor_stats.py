@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the doctor dashboard counters from appointments (fixes any drift)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctor', type=int, action='append', help='Only rebuild this doctor (repeatable)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            rows = stats.rebuild(options['doctor'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} doctor/day counter rows."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import analytics
+
+
+class Command(BaseCommand):
+    help = "Fold new bookings and status changes into the hourly and daily appointment rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        processed = analytics.refresh(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Done. {processed} source rows rolled up."))
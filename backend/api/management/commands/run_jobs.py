@@ -0,0 +1,44 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import jobs
+
+logger = logging.getLogger(__name__)
+
+PRUNE_INTERVAL = 3600  # seconds between deletions of old finished jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (notifications, OTP delivery, audit writes, cache invalidation)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain due jobs once and exit')
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--sleep', type=float, default=1.0, help='Idle poll interval in seconds')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Job worker started")
+        pruned_at = 0.0
+        while True:
+            try:
+                close_old_connections()
+                jobs.requeue_stale()
+                if time.monotonic() - pruned_at >= PRUNE_INTERVAL:
+                    jobs.prune()
+                    pruned_at = time.monotonic()
+                processed = jobs.run_pending(options['batch_size'])
+            except Exception:
+                # A lost database connection or similar must not kill the worker
+                logger.exception("Job worker loop failed; retrying")
+                if options['once']:
+                    raise
+                close_old_connections()
+                time.sleep(options['sleep'])
+                continue
+            if options['once'] and not processed:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
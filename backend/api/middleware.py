@@ -0,0 +1,141 @@
+"""Project middleware; each runs natively under both WSGI and ASGI."""
+import gzip
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+from rest_framework.permissions import SAFE_METHODS
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+from .db_router import pin_to_primary
+
+
+class PrimaryPinMiddleware(MiddlewareMixin):
+    """After a successful write, keep the user's reads on the primary (read-after-write)."""
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            # DRF copies the authenticated (JWT) user back onto the Django request
+            pin_to_primary(getattr(request, 'user', None))
+        return response
+
+
+class LoadShedMiddleware:
+    """Reject requests with 503 once this process has too many in flight.
+
+    Above ``LOAD_SHED_MAX_IN_FLIGHT`` concurrent requests only the paths in
+    ``LOAD_SHED_PRIORITY_PATHS`` (booking, login) are still admitted, up to an
+    extra ``LOAD_SHED_PRIORITY_HEADROOM``; everything else is shed with a
+    ``Retry-After`` header so clients back off instead of queueing. A budget
+    of 0 disables shedding.
+
+    The count is per process, so shedding only ever triggers with workers
+    that run requests concurrently (gthread threads, or ASGI).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def budget(self, request):
+        budget = settings.LOAD_SHED_MAX_IN_FLIGHT
+        if request.path.startswith(tuple(settings.LOAD_SHED_PRIORITY_PATHS)):
+            budget += settings.LOAD_SHED_PRIORITY_HEADROOM
+        return budget
+
+    def admit(self, request):
+        with self.lock:
+            admitted = self.in_flight < self.budget(request)
+            if admitted:
+                self.in_flight += 1
+        return admitted
+
+    def done(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def shed(self):
+        response = JsonResponse({'error': 'Server is busy, please retry shortly.'}, status=503)
+        response['Retry-After'] = str(settings.LOAD_SHED_RETRY_AFTER)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.LOAD_SHED_MAX_IN_FLIGHT:
+            return self.get_response(request)
+        if not self.admit(request):
+            return self.shed()
+        try:
+            return self.get_response(request)
+        finally:
+            self.done()
+
+    async def __acall__(self, request):
+        if not settings.LOAD_SHED_MAX_IN_FLIGHT:
+            return await self.get_response(request)
+        if not self.admit(request):
+            return self.shed()
+        try:
+            return await self.get_response(request)
+        finally:
+            self.done()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress responses with brotli or gzip, whichever the client accepts (brotli first).
+
+    Bodies under ``COMPRESSION_MIN_SIZE`` bytes are left alone, as are
+    streaming responses (exports, server-sent events) so they keep flushing
+    row by row, and anything that is already encoded.
+    """
+    accepts_br = _lazy_re_compile(r'\bbr\b')
+    accepts_gzip = _lazy_re_compile(r'\bgzip\b')
+
+    def encoding_for(self, request):
+        accept = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if HAS_BROTLI and self.accepts_br.search(accept):
+            return 'br'
+        if self.accepts_gzip.search(accept):
+            return 'gzip'
+        return None
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        encoding = self.encoding_for(request)
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        elif encoding == 'gzip':
+            compressed = gzip.compress(response.content, compresslevel=settings.GZIP_LEVEL, mtime=0)
+        else:
+            return response
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Same convention as GZipMiddleware: the compressed body is a different representation
+            response.headers['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_auditlog_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('slot_time', models.CharField(blank=True, max_length=20)),
+                ('appointment_date', models.DateField()),
+                ('patient_name', models.CharField(max_length=100)),
+                ('patient_age', models.IntegerField()),
+                ('patient_gender', models.CharField(max_length=10)),
+                ('problem', models.TextField()),
+                ('status', models.CharField(choices=[('Upcoming', 'Upcoming'), ('Accepted', 'Accepted'), ('Booked', 'Booked'), ('Completed', 'Completed'), ('Canceled', 'Canceled'), ('Rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='api.doctor')),
+                ('slot', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.slot')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'appointment_date'], name='api_archive_user_id_1a03e3_idx'), models.Index(fields=['doctor', 'appointment_date'], name='api_archive_doctor__e767e9_idx')],
+            },
+        ),
+    ]
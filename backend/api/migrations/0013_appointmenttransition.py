@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_archivedappointment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('Upcoming', 'Upcoming'), ('Accepted', 'Accepted'), ('Booked', 'Booked'), ('Completed', 'Completed'), ('Canceled', 'Canceled'), ('Rejected', 'Rejected')], max_length=20)),
+                ('to_status', models.CharField(choices=[('Upcoming', 'Upcoming'), ('Accepted', 'Accepted'), ('Booked', 'Booked'), ('Completed', 'Completed'), ('Canceled', 'Canceled'), ('Rejected', 'Rejected')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('appointment', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='transitions', to='api.appointment')),
+            ],
+        ),
+    ]
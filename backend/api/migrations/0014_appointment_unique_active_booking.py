@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:09
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+ACTIVE_STATUSES = ['Upcoming', 'Accepted', 'Booked']
+
+
+def cancel_double_bookings(apps, schema_editor):
+    """Keep the earliest active booking of each (doctor, slot, date) and cancel the rest.
+
+    The constraint cannot be added while duplicates exist. Run
+    ``rebuild_doctor_stats`` afterwards if any were canceled.
+    """
+    Appointment = apps.get_model('api', 'Appointment')
+    AppointmentTransition = apps.get_model('api', 'AppointmentTransition')
+    duplicates = (
+        Appointment.objects.filter(status__in=ACTIVE_STATUSES)
+        .values('doctor_id', 'slot_id', 'appointment_date')
+        .annotate(count=Count('id'), keep=Min('id'))
+        .filter(count__gt=1)
+    )
+    for group in duplicates:
+        extra = list(
+            Appointment.objects.filter(
+                doctor_id=group['doctor_id'], slot_id=group['slot_id'],
+                appointment_date=group['appointment_date'], status__in=ACTIVE_STATUSES,
+            ).exclude(pk=group['keep']).values_list('id', 'status')
+        )
+        AppointmentTransition.objects.bulk_create([
+            AppointmentTransition(appointment_id=appointment_id, from_status=from_status, to_status='Canceled')
+            for appointment_id, from_status in extra
+        ])
+        Appointment.objects.filter(pk__in=[appointment_id for appointment_id, _ in extra]).update(status='Canceled')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_appointmenttransition'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_double_bookings, migrations.RunPython.noop),
+        # Ignored by MySQL, which has no partial indexes; api.scheduling.ensure_free covers it there
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['Upcoming', 'Accepted', 'Booked'])), fields=('doctor', 'slot', 'appointment_date'), name='unique_active_booking'),
+        ),
+    ]
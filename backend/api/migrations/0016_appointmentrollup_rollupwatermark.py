@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_doctordailystats_doctorpatient'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AppointmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=5)),
+                ('bucket', models.DateTimeField()),
+                ('status', models.CharField(choices=[('Upcoming', 'Upcoming'), ('Accepted', 'Accepted'), ('Booked', 'Booked'), ('Completed', 'Completed'), ('Canceled', 'Canceled'), ('Rejected', 'Rejected')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='api.doctor')),
+                ('specialization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='api.specialization')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'bucket'], name='api_appoint_granula_073003_idx')],
+                'constraints': [models.UniqueConstraint(fields=('granularity', 'bucket', 'doctor', 'status'), name='unique_appointment_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:15
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_appointmentrollup_rollupwatermark'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='doctor',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='doctor_name_lower_idx'),
+        ),
+    ]
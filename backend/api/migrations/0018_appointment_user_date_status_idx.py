@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_doctor_name_lower_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['user', 'appointment_date', 'status'], name='api_appoint_user_id_322965_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_doctor_ids(apps, schema_editor):
+    """Fill ``doctor`` on existing transitions from their live or archived appointment."""
+    AppointmentTransition = apps.get_model('api', 'AppointmentTransition')
+    for model_name in ('Appointment', 'ArchivedAppointment'):
+        source = apps.get_model('api', model_name).objects.filter(pk=OuterRef('appointment_id'))
+        AppointmentTransition.objects.filter(doctor__isnull=True).update(
+            doctor_id=Subquery(source.values('doctor_id')[:1])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0024_changelogentry_archived'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointmenttransition',
+            name='doctor',
+            field=models.ForeignKey(db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.doctor'),
+        ),
+        migrations.RunPython(copy_doctor_ids, migrations.RunPython.noop),
+    ]
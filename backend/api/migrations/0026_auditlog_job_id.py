@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_appointmenttransition_doctor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='job_id',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+    ]
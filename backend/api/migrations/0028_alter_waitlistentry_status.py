@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='status',
+            field=models.CharField(choices=[('Waiting', 'Waiting'), ('Promoted', 'Promoted'), ('Skipped', 'Skipped'), ('Canceled', 'Canceled'), ('Expired', 'Expired')], default='Waiting', max_length=20),
+        ),
+    ]
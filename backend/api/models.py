@@ -1,5 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import geo
 
 class Specialization(models.Model):
     name = models.CharField(max_length=100)
@@ -17,11 +21,32 @@ class Doctor(models.Model):
     image_url = models.URLField(max_length=500, blank=True) # Using URL for demo ease
     availability_time = models.CharField(max_length=100, default="10 AM - 5 PM")
     location = models.CharField(max_length=200, default="Mumbai, India")
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
     is_available = models.BooleanField(default=True)
 
+    class Meta:
+        indexes = [
+            # Case-insensitive name prefix search (signup typeahead)
+            models.Index(Lower('name'), name='doctor_name_lower_idx'),
+            # Radius search scans geohash prefix ranges
+            models.Index(fields=['geohash'], name='doctor_geohash_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Coordinates default to the city in ``location``; the geohash always follows them
+        if self.latitude is None or self.longitude is None:
+            self.latitude, self.longitude = geo.geocode(self.location) or (None, None)
+        self.geohash = geo.encode(self.latitude, self.longitude) if self.latitude is not None else ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'location', 'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'latitude', 'longitude', 'geohash'}
+        super().save(*args, **kwargs)
+
 class Slot(models.Model):
     SHIFT_CHOICES = [
         ('Morning', 'Morning'),
@@ -36,6 +61,11 @@ class Slot(models.Model):
     def __str__(self):
         return f"{self.doctor.name} - {self.time}"
 
+# Statuses that keep a slot occupied for its date
+ACTIVE_STATUSES = ['Upcoming', 'Accepted', 'Booked']
+# Statuses an appointment never leaves; old ones are moved to ArchivedAppointment
+TERMINAL_STATUSES = ['Completed', 'Canceled', 'Rejected']
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('Upcoming', 'Upcoming'),
@@ -56,9 +86,209 @@ class Appointment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Upcoming')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Availability index: a slot holds at most one active booking per date
+            models.UniqueConstraint(
+                fields=['doctor', 'slot', 'appointment_date'],
+                condition=models.Q(status__in=ACTIVE_STATUSES),
+                name='unique_active_booking',
+            ),
+        ]
+        indexes = [
+            # Patient booking history: filter by user, order/filter by date and status
+            models.Index(fields=['user', 'appointment_date', 'status']),
+        ]
+
     def __str__(self):
         return f"{self.patient_name} - {self.doctor.name}"
 
+class AppointmentTransition(models.Model):
+    """Audit trail of status changes, written in the same transaction as the change."""
+    # No FK constraint so the log outlives rows moved to ArchivedAppointment (same ids)
+    appointment = models.ForeignKey(Appointment, on_delete=models.DO_NOTHING, db_constraint=False, related_name='transitions')
+    # Copied from the appointment so rollups still see it once the appointment is archived
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, related_name='+'
+    )
+    from_status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"#{self.appointment_id}: {self.from_status} -> {self.to_status}"
+
+class DoctorDailyStats(models.Model):
+    """Per-doctor, per-appointment-date counters kept current by ``api.stats``."""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    total = models.IntegerField(default=0)
+    upcoming = models.IntegerField(default=0)
+    accepted = models.IntegerField(default=0)
+    booked = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    canceled = models.IntegerField(default=0)
+    rejected = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['doctor', 'date'], name='unique_doctor_daily_stats')]
+
+    def __str__(self):
+        return f"{self.doctor.name} - {self.date}"
+
+class DoctorPatient(models.Model):
+    """One row per distinct patient a doctor has seen, for the dashboard patient count."""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='patient_links')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='doctor_links')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['doctor', 'user'], name='unique_doctor_patient')]
+
+class AppointmentRollup(models.Model):
+    """Pre-aggregated booking volume for analytics exports.
+
+    ``status`` 'Upcoming' counts new bookings; every other status counts
+    transitions into it during the bucket.
+    """
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='rollups')
+    specialization = models.ForeignKey(Specialization, on_delete=models.CASCADE, related_name='rollups')
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'bucket', 'doctor', 'status'], name='unique_appointment_rollup'),
+        ]
+        indexes = [models.Index(fields=['granularity', 'bucket'])]
+
+class RollupWatermark(models.Model):
+    """Highest source row id already folded into the rollups, per source table."""
+    name = models.CharField(max_length=50, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+class CatalogVersion(models.Model):
+    """Single row whose ``version`` moves with every specialization or doctor change (``api/catalog.py``)."""
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"catalog @ {self.version}"
+
+class Payment(models.Model):
+    """Ledger entry for a consultation fee, written in the same transaction as the move to ``Booked``."""
+    STATUS_CHOICES = [
+        ('Succeeded', 'Succeeded'),
+        ('Refunded', 'Refunded'),
+    ]
+    # Like transitions, payments outlive the appointment when it is archived
+    appointment = models.ForeignKey(
+        Appointment, on_delete=models.DO_NOTHING, db_constraint=False, related_name='payments'
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default='INR')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Succeeded')
+    idempotency_key = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['appointment'], condition=models.Q(status='Succeeded'), name='unique_successful_payment',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} {self.currency} for #{self.appointment_id} ({self.status})"
+
+class SlotHold(models.Model):
+    """Database copy of a checkout hold, used when the cache is unavailable (see ``api/holds.py``)."""
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='+')
+    slot = models.ForeignKey(Slot, on_delete=models.CASCADE, related_name='+')
+    appointment_date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='slot_holds')
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'slot', 'appointment_date'], name='unique_slot_hold'),
+        ]
+
+    def __str__(self):
+        return f"Slot {self.slot_id} on {self.appointment_date} held by {self.user_id}"
+
+class WaitlistEntry(models.Model):
+    """A patient queued for a doctor's day, booked automatically when a slot frees up (``api/waitlist.py``)."""
+    STATUS_CHOICES = [
+        ('Waiting', 'Waiting'),
+        ('Promoted', 'Promoted'),
+        ('Skipped', 'Skipped'),
+        ('Canceled', 'Canceled'),
+        ('Expired', 'Expired'),
+    ]
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='waitlist')
+    appointment_date = models.DateField()
+    slot = models.ForeignKey(Slot, on_delete=models.CASCADE, null=True, blank=True, related_name='+')  # None = any slot
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries')
+    patient_name = models.CharField(max_length=100)
+    patient_age = models.IntegerField()
+    patient_gender = models.CharField(max_length=10)
+    problem = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Waiting')
+    appointment = models.ForeignKey(Appointment, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['doctor', 'appointment_date', 'user'],
+                condition=models.Q(status='Waiting'),
+                name='unique_waiting_entry',
+            ),
+        ]
+        indexes = [
+            # Queue order: the head of a doctor's day is one index seek
+            models.Index(fields=['doctor', 'appointment_date', 'status', 'created_at', 'id'], name='waitlist_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.patient_name} waiting for {self.doctor_id} on {self.appointment_date}"
+
+class ArchivedAppointment(models.Model):
+    """Terminal appointments moved out of the hot table by ``archive_appointments``."""
+    id = models.BigIntegerField(primary_key=True)  # Original Appointment id
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_appointments')
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='archived_appointments')
+    slot = models.ForeignKey(Slot, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    slot_time = models.CharField(max_length=20, blank=True)
+    appointment_date = models.DateField()
+    patient_name = models.CharField(max_length=100)
+    patient_age = models.IntegerField()
+    patient_gender = models.CharField(max_length=10)
+    problem = models.TextField()
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'appointment_date']),
+            models.Index(fields=['doctor', 'appointment_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.patient_name} - {self.appointment_date} (archived)"
+
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     mobile = models.CharField(max_length=15, blank=True)
@@ -96,3 +326,74 @@ class MedicalRecord(models.Model):
 
     def __str__(self):
         return f"{self.file_name} for {self.patient.username}"
+
+class Job(models.Model):
+    """A unit of deferred work picked up by the ``run_jobs`` worker."""
+    STATUS_CHOICES = [
+        ('Pending', 'Pending'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+class AuditLog(models.Model):
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs')
+    action = models.CharField(max_length=100)
+    object_type = models.CharField(max_length=50, blank=True)
+    object_id = models.CharField(max_length=50, blank=True)
+    data = models.JSONField(default=dict, blank=True)
+    job_id = models.BigIntegerField(null=True, blank=True, unique=True)  # the write_audit job; outlives pruning
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.action} {self.object_type}#{self.object_id}"
+
+class ChangeLogEntry(models.Model):
+    """One write to a synced model; the id sequence backs the ``/api/sync/`` change tokens (see ``api/changes.py``)."""
+    MODEL_CHOICES = [
+        ('appointment', 'Appointment'),
+        ('medical_record', 'Medical record'),
+        ('slot', 'Slot'),
+    ]
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+        ('archived', 'Archived'),  # Moved to ArchivedAppointment
+    ]
+    model = models.CharField(max_length=30, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Whose feeds the change shows up in; entries outlive the rows they describe
+    user = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, related_name='+'
+    )
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, null=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id'], name='change_user_seq_idx'),
+            models.Index(fields=['doctor', 'id'], name='change_doctor_seq_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.model} {self.object_id} {self.action}"
@@ -0,0 +1,34 @@
+"""Pluggable delivery backends for SMS/notifications.
+
+``NOTIFICATION_BACKEND`` selects the class; the console backend is the local
+default and the locmem backend keeps messages in ``outbox`` for inspection.
+"""
+import logging
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class ConsoleBackend:
+    def send(self, to, message):
+        print(f"[notify] {to}: {message}")
+
+
+class LocmemBackend:
+    outbox = []
+
+    def send(self, to, message):
+        self.outbox.append({'to': to, 'message': message})
+
+
+def get_backend():
+    return import_string(settings.NOTIFICATION_BACKEND)()
+
+
+def send(to, message):
+    if not to:
+        logger.info("Dropping notification without recipient: %s", message)
+        return
+    get_backend().send(to, message)
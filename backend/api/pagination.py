@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ChatHistoryPagination(CursorPagination):
+    """Newest-first cursor pages, stable while new messages keep arriving."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+class BookingHistoryPagination(PageNumberPagination):
+    """Page-numbered booking history; only applied when the client asks for ``?page=``."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
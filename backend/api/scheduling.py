@@ -0,0 +1,207 @@
+"""Doctor-side scheduling operations on many appointments at once.
+
+Each operation loads the doctor's appointments in one query (which also
+checks ownership), validates every item, then applies all valid changes with
+``bulk_update`` in a single transaction. Results are reported per item so the
+dashboard can show exactly which ones failed and why.
+
+Every path that puts an appointment on a ``(doctor, slot, date)`` relies on
+the ``unique_active_booking`` constraint to reject a concurrent booking of
+the same slot. MySQL ignores conditional unique constraints, so on backends
+without partial indexes ``ensure_free`` does the same check under a lock on
+the doctor row.
+"""
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import tasks
+from .models import ACTIVE_STATUSES, Appointment, AppointmentTransition, Doctor, Slot
+from .signals import appointment_rescheduled, appointment_transitioned
+from .transitions import can_transition
+
+
+def ensure_free(doctor_id, targets, exclude_ids=()):
+    """Raise ``IntegrityError`` if any ``(date, slot_id)`` in ``targets`` is actively booked.
+
+    A no-op where the database enforces ``unique_active_booking`` itself. Call
+    inside the transaction that writes the booking.
+    """
+    if connection.features.supports_partial_indexes or not targets:
+        return
+    # Serializes every booking of this doctor until the transaction ends
+    list(Doctor.objects.select_for_update().filter(pk=doctor_id).values_list('pk'))
+    taken = Appointment.objects.filter(
+        doctor_id=doctor_id, status__in=ACTIVE_STATUSES,
+        appointment_date__in={date for date, _ in targets}, slot_id__in={slot_id for _, slot_id in targets},
+    ).exclude(pk__in=exclude_ids).values_list('appointment_date', 'slot_id')
+    if set(taken) & set(targets):
+        raise IntegrityError('unique_active_booking')
+
+
+def _locked_appointments(doctor, ids):
+    return {
+        appt.id: appt
+        for appt in Appointment.objects.select_for_update().filter(pk__in=ids, doctor=doctor)
+    }
+
+
+def _failure(appointment_id, error, code='invalid'):
+    # code is one of 'not_found', 'invalid' or 'conflict'
+    return {'id': appointment_id, 'ok': False, 'error': error, 'code': code}
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_date(value):
+    try:
+        return parse_date(str(value))
+    except ValueError:
+        return None  # Well formed but not a real date, e.g. 2026-02-30
+
+
+def bulk_transition(doctor, ids, target, actor):
+    """Move every listed appointment of ``doctor`` to ``target`` where the state machine allows it."""
+    results = []
+    with transaction.atomic():
+        appointments = _locked_appointments(doctor, ids)
+        changed, logs = [], []
+        for appointment_id in ids:
+            appointment = appointments.get(appointment_id)
+            if appointment is None:
+                results.append(_failure(appointment_id, 'Appointment not found.', 'not_found'))
+                continue
+            if not can_transition(appointment.status, target):
+                results.append(_failure(appointment_id, f"Cannot change an appointment from {appointment.status} to {target}.", 'conflict'))
+                continue
+            logs.append(AppointmentTransition(
+                appointment_id=appointment.id, doctor_id=appointment.doctor_id,
+                from_status=appointment.status, to_status=target, actor=actor,
+            ))
+            appointment.status = target
+            changed.append(appointment)
+            results.append({'id': appointment_id, 'ok': True, 'status': target})
+
+        Appointment.objects.bulk_update(changed, ['status'])
+        AppointmentTransition.objects.bulk_create(logs)
+        for appointment, log in zip(changed, logs):
+            appointment_transitioned.send(
+                sender=Appointment, appointment=appointment,
+                from_status=log.from_status, to_status=target, actor=actor
+            )
+            tasks.appointment_changed(
+                appointment, 'status_changed', actor, notify='patient',
+                message=f"Your appointment with {doctor.name} on {appointment.appointment_date} is now {target}."
+            )
+    return results
+
+
+def bulk_reschedule(doctor, items, actor, notify='patient'):
+    """Move appointments to new ``appointment_date``/``slot`` pairs that are free.
+
+    ``items`` is a list of ``{'id', 'appointment_date', 'slot'}`` dicts; a missing
+    date or slot keeps the current one; past dates are refused. ``notify`` is who gets told: the patient
+    when the doctor moves it, the doctor when the patient does. Targets are checked against active
+    bookings up front, and the ``unique_active_booking`` constraint rejects any
+    booking that raced in before commit, so a slot can never end up double
+    booked. The old slot is freed simply by the appointment moving away.
+    """
+    ids = [_as_int(item.get('id')) for item in items]
+    today = timezone.localdate()
+    results = []
+    with transaction.atomic():
+        appointments = _locked_appointments(doctor, [i for i in ids if i is not None])
+        slot_ids = {_as_int(item['slot']) for item in items if item.get('slot')}
+        slots = {slot.id: slot for slot in Slot.objects.filter(doctor=doctor, id__in=slot_ids - {None})}
+
+        planned = {}
+        for appointment_id, item in zip(ids, items):
+            appointment = appointments.get(appointment_id)
+            if appointment is None:
+                results.append(_failure(item.get('id'), 'Appointment not found.', 'not_found'))
+                continue
+            if appointment.status not in ACTIVE_STATUSES:
+                results.append(_failure(appointment.id, f"{appointment.status} appointments cannot be rescheduled.", 'conflict'))
+                continue
+            new_date = _as_date(item['appointment_date']) if item.get('appointment_date') else appointment.appointment_date
+            if new_date is None:
+                results.append(_failure(appointment.id, 'Invalid date.'))
+                continue
+            if new_date < today:
+                results.append(_failure(appointment.id, 'Cannot move an appointment to a past date.'))
+                continue
+            new_slot_id = _as_int(item.get('slot')) or appointment.slot_id
+            if item.get('slot') and new_slot_id not in slots:
+                results.append(_failure(appointment.id, 'Invalid slot.'))
+                continue
+            planned[appointment.id] = (new_date, new_slot_id)
+
+        # One query for everything already holding the requested slots
+        moving = set(planned)
+        taken = set(
+            Appointment.objects.filter(
+                doctor=doctor,
+                status__in=ACTIVE_STATUSES,
+                appointment_date__in={date for date, _ in planned.values()},
+                slot_id__in={slot_id for _, slot_id in planned.values()},
+            ).exclude(pk__in=moving).values_list('appointment_date', 'slot_id')
+        )
+
+        changed, previous = [], {}
+        for appointment_id, (new_date, new_slot_id) in planned.items():
+            if (new_date, new_slot_id) in taken:
+                results.append(_failure(appointment_id, 'The requested slot is already booked for this date.', 'conflict'))
+                continue
+            taken.add((new_date, new_slot_id))
+            appointment = appointments[appointment_id]
+            previous[appointment_id] = (appointment.appointment_date, appointment.slot_id)
+            appointment.appointment_date = new_date
+            appointment.slot_id = new_slot_id
+            changed.append(appointment)
+            results.append({'id': appointment_id, 'ok': True, 'appointment_date': str(new_date), 'slot': new_slot_id})
+
+        try:
+            with transaction.atomic():
+                ensure_free(
+                    doctor.id, [(a.appointment_date, a.slot_id) for a in changed], [a.id for a in changed]
+                )
+                Appointment.objects.bulk_update(changed, ['appointment_date', 'slot'])
+        except IntegrityError:
+            # Someone booked one of the targets concurrently; apply nothing
+            failed = {appointment.id for appointment in changed}
+            results = [r for r in results if r['id'] not in failed] + [
+                _failure(appointment_id, 'The requested slot was just booked by someone else.', 'conflict')
+                for appointment_id in failed
+            ]
+            changed = []
+        for appointment in changed:
+            old_date, old_slot_id = previous[appointment.id]
+            appointment_rescheduled.send(
+                sender=Appointment, appointment=appointment,
+                old_date=old_date, old_slot_id=old_slot_id, actor=actor
+            )
+            if notify == 'patient':
+                message = f"Your appointment with {doctor.name} was moved to {appointment.appointment_date}."
+            else:
+                message = f"{appointment.patient_name} moved their appointment to {appointment.appointment_date}."
+            tasks.appointment_changed(
+                appointment, 'appointment_rescheduled', actor, notify=notify, message=message,
+                extra_dates=[old_date],
+            )
+    return results
+
+
+def reschedule_day(doctor, from_date, to_date, actor):
+    """Move every active appointment of ``doctor`` on ``from_date`` to the same slot on ``to_date``."""
+    items = [
+        {'id': appointment_id, 'appointment_date': str(to_date)}
+        for appointment_id in Appointment.objects.filter(
+            doctor=doctor, appointment_date=from_date, status__in=ACTIVE_STATUSES
+        ).order_by('id').values_list('id', flat=True)
+    ]
+    return bulk_reschedule(doctor, items, actor) if items else []
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Specialization, Doctor, Slot, Appointment, ChatMessage, MedicalRecord
+from .models import Specialization, Doctor, Slot, Appointment, ArchivedAppointment, ChatMessage, MedicalRecord, WaitlistEntry
+from . import catalog, waitlist
 
 class MedicalRecordSerializer(serializers.ModelSerializer):
     doctor_name = serializers.ReadOnlyField(source='doctor.name')
@@ -12,6 +13,14 @@ class MedicalRecordSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['doctor']
 
+class MedicalRecordSyncSerializer(MedicalRecordSerializer):
+    """Record metadata for ``/sync/``; the file itself is fetched from ``file_url`` when needed."""
+    file_url = serializers.HyperlinkedIdentityField(view_name='medical-records-detail')
+
+    class Meta(MedicalRecordSerializer.Meta):
+        fields = None
+        exclude = ['file_data']
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -28,25 +37,96 @@ class SlotSerializer(serializers.ModelSerializer):
         fields = ['id', 'time', 'is_booked', 'shift']
 
 class DoctorSerializer(serializers.ModelSerializer):
-    specialization_name = serializers.ReadOnlyField(source='specialization.name')
+    specialization_name = serializers.SerializerMethodField()
     slots = SlotSerializer(many=True, read_only=True)
     
     class Meta:
         model = Doctor
         fields = '__all__'
 
-class AppointmentSerializer(serializers.ModelSerializer):
-    doctor_name = serializers.ReadOnlyField(source='doctor.name')
-    specialization_name = serializers.ReadOnlyField(source='doctor.specialization.name')
-    doctor_image_url = serializers.ReadOnlyField(source='doctor.image_url')
+    def get_specialization_name(self, obj):
+        # An already joined specialization needs no lookup and keeps async views off the sync ORM
+        if Doctor.specialization.is_cached(obj):
+            return obj.specialization.name
+        return catalog.specialization_name(obj.specialization_id) or obj.specialization.name
+
+class DoctorCardMixin(serializers.Serializer):
+    """Doctor name, specialization and photo read from the in-process catalogue."""
+    doctor_name = serializers.SerializerMethodField()
+    specialization_name = serializers.SerializerMethodField()
+    doctor_image_url = serializers.SerializerMethodField()
+
+    def _card(self, obj):
+        card = catalog.doctor_card(obj.doctor_id)
+        if card is None:
+            doctor = obj.doctor
+            card = {'name': doctor.name, 'specialization_name': doctor.specialization.name, 'image_url': doctor.image_url}
+        return card
+
+    def get_doctor_name(self, obj):
+        return self._card(obj)['name']
+
+    def get_specialization_name(self, obj):
+        return self._card(obj)['specialization_name']
+
+    def get_doctor_image_url(self, obj):
+        return self._card(obj)['image_url']
+
+class AppointmentSerializer(DoctorCardMixin, serializers.ModelSerializer):
     slot_time = serializers.ReadOnlyField(source='slot.time')
     
     class Meta:
         model = Appointment
         fields = '__all__'
-        read_only_fields = ['user']
+        # Status only changes through the state machine in transitions.py
+        read_only_fields = ['user', 'status']
+        # Slot conflicts are reported by AppointmentViewSet.create (and unique_active_booking)
+        validators = []
+
+class ArchivedAppointmentSerializer(DoctorCardMixin, serializers.ModelSerializer):
+    archived = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedAppointment
+        fields = '__all__'
+
+    def get_archived(self, obj):
+        return True
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    doctor_name = serializers.SerializerMethodField()
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WaitlistEntry
+        fields = '__all__'
+        read_only_fields = ['user', 'status', 'appointment']
+
+    def get_doctor_name(self, obj):
+        card = catalog.doctor_card(obj.doctor_id)
+        return card['name'] if card else obj.doctor.name
+
+    def get_position(self, obj):
+        return waitlist.position(obj) if obj.status == 'Waiting' else None
+
+    def validate(self, attrs):
+        slot = attrs.get('slot')
+        if slot is not None and slot.doctor_id != attrs['doctor'].id:
+            raise serializers.ValidationError({'slot': 'Slot does not belong to this doctor.'})
+        return attrs
 
 class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatMessage
         fields = '__all__'
+
+class BulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+class RescheduleItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    appointment_date = serializers.DateField(required=False, allow_null=True)
+    slot = serializers.IntegerField(required=False, allow_null=True)
+
+class BulkRescheduleSerializer(serializers.Serializer):
+    items = RescheduleItemSerializer(many=True, allow_empty=False)
@@ -0,0 +1,15 @@
+"""Appointment domain events.
+
+Sent inside the transaction that made the change, so receivers that write to
+the database commit or roll back together with it. Status changes and
+reschedules use queryset updates, which do not fire ``post_save``, hence
+these dedicated signals.
+"""
+from django.dispatch import Signal
+
+# appointment
+appointment_created = Signal()
+# appointment, from_status, to_status, actor
+appointment_transitioned = Signal()
+# appointment, old_date, old_slot_id, actor
+appointment_rescheduled = Signal()
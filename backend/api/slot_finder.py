@@ -0,0 +1,257 @@
+"""Earliest free slots across all doctors of a specialization.
+
+Each worker keeps, per doctor, the slot layout (slot ids ordered by time of
+day, one bit each) and, per doctor and date, an occupancy bitmask of the
+slots held by active appointments. Free slots for a day are then
+``layout_mask & ~occupied``, so scanning thousands of doctors is one integer
+operation each; Python ints serve as arbitrary-width bitsets.
+
+Occupancy for a date range is loaded for a whole specialization in one query
+and patched after commit by the appointment signals, so this worker's own
+bookings show up immediately. The doctor list, slot layouts and occupancy
+are reloaded once older than ``SLOT_FINDER_TTL`` to pick up changes made in
+other workers; a slot that was taken in the meantime is still refused by
+``unique_active_booking`` at booking time. Slots someone is holding at
+checkout (``api.holds``) are left out of the results as well.
+"""
+import heapq
+import itertools
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import holds
+from .models import ACTIVE_STATUSES, Appointment, Doctor, Slot
+from .signals import appointment_created, appointment_rescheduled, appointment_transitioned
+
+_lock = threading.Lock()
+# specialization id -> (loaded_at, [doctor ids])
+_doctors = {}
+# doctor id -> {'slot_ids': [...], 'times': [...], 'minutes': [...], 'position': {slot id: bit}}
+_layouts = {}
+# (specialization id, date) -> loaded_at of that day's occupancy
+_loaded = {}
+# (doctor id, date) -> (layout the bits refer to, occupied bitmask)
+_occupancy = {}
+
+
+def slot_minutes(value):
+    """Minutes after midnight of a slot time such as ``'09:30 AM'``."""
+    try:
+        parsed = datetime.strptime(value.strip(), '%I:%M %p')
+    except ValueError:
+        return 24 * 60
+    return parsed.hour * 60 + parsed.minute
+
+
+def _fresh(loaded_at):
+    return loaded_at is not None and time.monotonic() - loaded_at < settings.SLOT_FINDER_TTL
+
+
+def _load_doctors(specialization_id):
+    """Available doctors of the specialization and their slot layouts, read from the database."""
+    doctor_ids = list(Doctor.objects.filter(
+        specialization_id=specialization_id, is_available=True
+    ).values_list('id', flat=True))
+    slots = {doctor_id: [] for doctor_id in doctor_ids}
+    rows = Slot.objects.filter(
+        doctor__specialization_id=specialization_id, doctor__is_available=True
+    ).values_list('id', 'doctor_id', 'time')
+    for slot_id, doctor_id, slot_time in rows:
+        if doctor_id in slots:
+            slots[doctor_id].append((slot_minutes(slot_time), slot_time, slot_id))
+    layouts = {}
+    for doctor_id, doctor_slots in slots.items():
+        ordered = sorted(doctor_slots)
+        layouts[doctor_id] = {
+            'slot_ids': [slot_id for _, _, slot_id in ordered],
+            'times': [slot_time for _, slot_time, _ in ordered],
+            'minutes': [minutes for minutes, _, _ in ordered],
+            'position': {slot_id: bit for bit, (_, _, slot_id) in enumerate(ordered)},
+        }
+    return doctor_ids, layouts
+
+
+def _load_occupancy(specialization_id, layouts, dates):
+    occupied = {(doctor_id, date): 0 for doctor_id in layouts for date in dates}
+    rows = Appointment.objects.filter(
+        doctor__specialization_id=specialization_id, appointment_date__in=dates, status__in=ACTIVE_STATUSES
+    ).values_list('doctor_id', 'appointment_date', 'slot_id')
+    for doctor_id, date, slot_id in rows:
+        layout = layouts.get(doctor_id)
+        bit = layout and layout['position'].get(slot_id)
+        if bit is not None:
+            occupied[doctor_id, date] |= 1 << bit
+    return {key: (layouts[key[0]], mask) for key, mask in occupied.items()}
+
+
+def _state(specialization_id, dates):
+    """``{doctor id: layout}`` and occupancy for the dates, refreshing what is stale.
+
+    Database reads happen outside ``_lock``; only the cache updates hold it.
+    """
+    with _lock:
+        entry = _doctors.get(specialization_id)
+        doctors_fresh = entry is not None and _fresh(entry[0])
+    if not doctors_fresh:
+        # Doctor set and slot layouts are refreshed together, which invalidates the
+        # specialization's occupancy because bit positions may have moved
+        doctor_ids, layouts = _load_doctors(specialization_id)
+        with _lock:
+            _layouts.update(layouts)
+            _doctors[specialization_id] = (time.monotonic(), doctor_ids)
+            for key in [key for key in _loaded if key[0] == specialization_id]:
+                del _loaded[key]
+
+    with _lock:
+        doctor_ids = _doctors[specialization_id][1]
+        layouts = {doctor_id: _layouts[doctor_id] for doctor_id in doctor_ids if doctor_id in _layouts}
+        stale = [date for date in dates if not _fresh(_loaded.get((specialization_id, date)))]
+    if len(layouts) < len(doctor_ids):
+        # A slot change dropped some layouts meanwhile; reload them all
+        with _lock:
+            _doctors.pop(specialization_id, None)
+        return _state(specialization_id, dates)
+    if stale:
+        occupied = _load_occupancy(specialization_id, layouts, stale)
+        with _lock:
+            _occupancy.update(occupied)
+            now = time.monotonic()
+            for date in stale:
+                _loaded[specialization_id, date] = now
+            _prune()
+    with _lock:
+        occupancy = {
+            key: _occupancy.get(key) for key in ((doctor_id, date) for doctor_id in layouts for date in dates)
+        }
+    return layouts, occupancy
+
+
+def _prune():
+    # Forget days that are over
+    today = timezone.localdate()
+    past = [key for key in _loaded if key[1] < today]
+    if past:
+        for key in past:
+            del _loaded[key]
+        for key in [key for key in _occupancy if key[1] < today]:
+            del _occupancy[key]
+
+
+def _free_in_order(layouts, occupancy, dates, now):
+    """Yield free ``(date, time, doctor id, slot id)`` earliest first."""
+    for date in dates:
+        # Heap of (minutes, doctor id, remaining free bits) merging every doctor's day in time order
+        heap = []
+        for doctor_id, layout in layouts.items():
+            entry = occupancy.get((doctor_id, date))
+            if entry is None or entry[0] is not layout:
+                continue  # Layout replaced by a concurrent refresh; picked up on the next call
+            free = ((1 << len(layout['slot_ids'])) - 1) & ~entry[1]
+            if date == now.date():
+                # Drop slots that already started today
+                free &= ~((1 << bisect_right(layout['minutes'], now.hour * 60 + now.minute)) - 1)
+            if free:
+                bit = (free & -free).bit_length() - 1
+                heap.append((layout['minutes'][bit], doctor_id, free))
+        heapq.heapify(heap)
+        while heap:
+            _, doctor_id, free = heapq.heappop(heap)
+            layout = layouts[doctor_id]
+            bit = (free & -free).bit_length() - 1
+            yield date, layout['times'][bit], doctor_id, layout['slot_ids'][bit]
+            free &= free - 1
+            if free:
+                bit = (free & -free).bit_length() - 1
+                heapq.heappush(heap, (layout['minutes'][bit], doctor_id, free))
+
+
+def find_free_slots(specialization_id, start, end, limit=10, exclude_user_id=None):
+    """The ``limit`` earliest free ``(date, time, doctor id, slot id)`` between ``start`` and ``end`` inclusive.
+
+    Slots held by anyone but ``exclude_user_id`` do not count as free.
+    """
+    now = timezone.localtime()
+    dates = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    dates = [date for date in dates if date >= now.date()]
+    if not dates:
+        return []
+    layouts, occupancy = _state(specialization_id, dates)
+    candidates = _free_in_order(layouts, occupancy, dates, now)
+    results = []
+    # Holds are checked a page of candidates at a time, replacing held ones from further down
+    while len(results) < limit:
+        batch = list(itertools.islice(candidates, limit - len(results)))
+        if not batch:
+            break
+        held = holds.held_targets([(doctor_id, date, slot_id) for date, _, doctor_id, slot_id in batch], exclude_user_id)
+        results.extend(c for c in batch if (c[2], c[0], c[3]) not in held)
+    return results
+
+
+def _set_bit(doctor_id, date, slot_id, occupied):
+    with _lock:
+        entry = _occupancy.get((doctor_id, date))
+        if entry is None or slot_id not in entry[0]['position']:
+            return
+        layout, mask = entry
+        bit = 1 << layout['position'][slot_id]
+        _occupancy[doctor_id, date] = (layout, mask | bit if occupied else mask & ~bit)
+
+
+@receiver(appointment_created)
+def on_created(sender, appointment, **kwargs):
+    if appointment.status in ACTIVE_STATUSES:
+        doctor_id, date, slot_id = appointment.doctor_id, appointment.appointment_date, appointment.slot_id
+        transaction.on_commit(lambda: _set_bit(doctor_id, date, slot_id, True))
+
+
+@receiver(appointment_transitioned)
+def on_transitioned(sender, appointment, from_status, to_status, **kwargs):
+    was_active, is_active = from_status in ACTIVE_STATUSES, to_status in ACTIVE_STATUSES
+    if was_active != is_active:
+        doctor_id, date, slot_id = appointment.doctor_id, appointment.appointment_date, appointment.slot_id
+        transaction.on_commit(lambda: _set_bit(doctor_id, date, slot_id, is_active))
+
+
+@receiver(appointment_rescheduled)
+def on_rescheduled(sender, appointment, old_date, old_slot_id, **kwargs):
+    doctor_id, date, slot_id = appointment.doctor_id, appointment.appointment_date, appointment.slot_id
+
+    def apply():
+        _set_bit(doctor_id, old_date, old_slot_id, False)
+        _set_bit(doctor_id, date, slot_id, True)
+    transaction.on_commit(apply)
+
+
+@receiver(post_save, sender=Slot)
+@receiver(post_delete, sender=Slot)
+def on_slot_changed(sender, instance, **kwargs):
+    # Bit positions shift when a doctor's slots change; rebuild that doctor lazily
+    doctor_id = instance.doctor_id
+
+    def forget():
+        with _lock:
+            _layouts.pop(doctor_id, None)
+            for key in [key for key in _occupancy if key[0] == doctor_id]:
+                del _occupancy[key]
+            _doctors.clear()
+            _loaded.clear()
+    transaction.on_commit(forget)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def on_doctor_changed(sender, instance, **kwargs):
+    # Availability or specialization may have changed; reload the doctor lists lazily
+    def forget():
+        with _lock:
+            _doctors.clear()
+    transaction.on_commit(forget)
@@ -0,0 +1,103 @@
+"""Incrementally maintained dashboard counters.
+
+Every appointment create, status transition and reschedule adjusts the
+``DoctorDailyStats`` row of the affected doctor and date with an atomic
+``F()`` update, so the dashboard reads a handful of small rows instead of
+scanning appointments. ``rebuild_doctor_stats`` recomputes everything if the
+counters ever drift.
+"""
+from django.db.models import Count, F, Q, Sum
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Appointment, ArchivedAppointment, DoctorDailyStats, DoctorPatient
+from .signals import appointment_created, appointment_rescheduled, appointment_transitioned
+
+COUNTERS = ['upcoming', 'accepted', 'booked', 'completed', 'canceled', 'rejected']
+
+
+def counter_for(status):
+    return status.lower()
+
+
+def bump(doctor_id, date, **deltas):
+    DoctorDailyStats.objects.get_or_create(doctor_id=doctor_id, date=date)
+    DoctorDailyStats.objects.filter(doctor_id=doctor_id, date=date).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+@receiver(appointment_created)
+def on_created(sender, appointment, **kwargs):
+    bump(appointment.doctor_id, appointment.appointment_date, total=1, **{counter_for(appointment.status): 1})
+    DoctorPatient.objects.get_or_create(doctor_id=appointment.doctor_id, user_id=appointment.user_id)
+
+
+@receiver(appointment_transitioned)
+def on_transitioned(sender, appointment, from_status, to_status, **kwargs):
+    bump(appointment.doctor_id, appointment.appointment_date,
+         **{counter_for(from_status): -1, counter_for(to_status): 1})
+
+
+@receiver(appointment_rescheduled)
+def on_rescheduled(sender, appointment, old_date, **kwargs):
+    if old_date == appointment.appointment_date:
+        return
+    counter = counter_for(appointment.status)
+    bump(appointment.doctor_id, old_date, total=-1, **{counter: -1})
+    bump(appointment.doctor_id, appointment.appointment_date, total=1, **{counter: 1})
+
+
+def doctor_summary(doctor_id, today=None):
+    """Dashboard totals for one doctor in a single aggregate query."""
+    today = today or timezone.localdate()
+    # Aliases must not shadow the model fields being summed
+    aggregates = {f'sum_{field}': Sum(field) for field in ['total', *COUNTERS]}
+    aggregates['sum_today'] = Sum('total', filter=Q(date=today))
+    aggregates['sum_today_pending'] = Sum('upcoming', filter=Q(date=today))
+    summary = DoctorDailyStats.objects.filter(doctor_id=doctor_id).aggregate(**aggregates)
+    summary = {key.removeprefix('sum_'): value or 0 for key, value in summary.items()}
+    summary['patients'] = DoctorPatient.objects.filter(doctor_id=doctor_id).count()
+    summary['date'] = str(today)
+    return summary
+
+
+def rebuild(doctor_ids=None, apps=None):
+    """Recompute counters (and patient links) from live and archived appointments.
+
+    A migration passes its ``apps`` registry to run this on historical models.
+    """
+    if apps is None:
+        stats_model, patient_model, sources = DoctorDailyStats, DoctorPatient, [Appointment, ArchivedAppointment]
+    else:
+        stats_model, patient_model, *sources = [
+            apps.get_model('api', name)
+            for name in ('DoctorDailyStats', 'DoctorPatient', 'Appointment', 'ArchivedAppointment')
+        ]
+    stats_rows = stats_model.objects.all()
+    patient_rows = patient_model.objects.all()
+    sources = [model.objects.all() for model in sources]
+    if doctor_ids:
+        stats_rows = stats_rows.filter(doctor_id__in=doctor_ids)
+        patient_rows = patient_rows.filter(doctor_id__in=doctor_ids)
+        sources = [qs.filter(doctor_id__in=doctor_ids) for qs in sources]
+
+    counts = {}
+    patients = set()
+    for qs in sources:
+        for row in qs.values('doctor_id', 'appointment_date', 'status').annotate(n=Count('id')):
+            entry = counts.setdefault((row['doctor_id'], row['appointment_date']), dict.fromkeys(['total', *COUNTERS], 0))
+            entry['total'] += row['n']
+            entry[counter_for(row['status'])] += row['n']
+        patients.update(qs.values_list('doctor_id', 'user_id').distinct())
+
+    stats_rows.delete()
+    patient_rows.delete()
+    stats_model.objects.bulk_create([
+        stats_model(doctor_id=doctor_id, date=date, **values)
+        for (doctor_id, date), values in counts.items()
+    ], batch_size=1000)
+    patient_model.objects.bulk_create([
+        patient_model(doctor_id=doctor_id, user_id=user_id) for doctor_id, user_id in patients
+    ], batch_size=1000)
+    return len(counts)
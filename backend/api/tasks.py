@@ -0,0 +1,78 @@
+"""Job handlers for side effects kept off the request path."""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import availability, notifications
+from .jobs import enqueue, register
+from .models import AuditLog
+
+
+def _user_contact(user_id):
+    user = User.objects.select_related('profile').filter(id=user_id).first()
+    if user is None:
+        return None
+    profile = getattr(user, 'profile', None)
+    return (profile.mobile if profile else '') or user.email or user.username
+
+
+@register('send_otp')
+def send_otp(mobile, code):
+    notifications.send(mobile, f"Your verification code is {code}")
+
+
+@register('notify_user')
+def notify_user(user_id, message):
+    notifications.send(_user_contact(user_id), message)
+
+
+@register('notify_doctor')
+def notify_doctor(doctor_id, message):
+    user_id = User.objects.filter(profile__doctor_id=doctor_id).values_list('id', flat=True).first()
+    if user_id:
+        notify_user(user_id, message)
+
+
+@register('write_audit', pass_job_id=True)
+def write_audit(action, user_id=None, object_type='', object_id='', data=None, job_id=None):
+    fields = {
+        'user_id': user_id, 'action': action, 'object_type': object_type,
+        'object_id': str(object_id), 'data': data or {},
+    }
+    if job_id is None:
+        AuditLog.objects.create(**fields)
+    else:
+        # Keyed on the job, so a rerun after a lost Done update writes no second row
+        AuditLog.objects.get_or_create(job_id=job_id, defaults=fields)
+
+
+def event_key(appointment, action, at):
+    return f"{appointment.id}:{action}:{at.isoformat()}"
+
+
+def appointment_changed(appointment, action, actor, notify=None, message=None, extra_dates=(), at=None):
+    """Queue the audit entry and notification for an appointment write and drop cached availability.
+
+    ``notify`` is ``'patient'`` or ``'doctor'`` and selects who receives ``message``.
+    ``extra_dates`` are other dates whose availability changed (e.g. the date a
+    rescheduled appointment moved away from). The jobs are keyed on the
+    appointment, ``action`` and ``at`` (when the event happened, default now),
+    so re-sending an event with the same ``at`` queues nothing new while the
+    same state recurring later (A -> B -> A reschedules) still does.
+    """
+    key = event_key(appointment, action, at or timezone.now())
+    enqueue('write_audit', {
+        'action': action,
+        'user_id': actor.id,
+        'object_type': 'Appointment',
+        'object_id': appointment.id,
+        'data': {'status': appointment.status, 'appointment_date': str(appointment.appointment_date)},
+    }, key=f"audit:{key}")
+    # Invalidated by the process that made the change, as soon as it commits
+    doctor_id, dates = appointment.doctor_id, {appointment.appointment_date, *extra_dates}
+    transaction.on_commit(lambda: availability.invalidate(doctor_id, *dates))
+    if notify == 'patient':
+        enqueue('notify_user', {'user_id': appointment.user_id, 'message': message}, key=f"notify:{key}")
+    elif notify == 'doctor':
+        enqueue('notify_doctor', {'doctor_id': appointment.doctor_id, 'message': message}, key=f"notify:{key}")
+
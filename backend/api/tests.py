@@ -1,3 +1,933 @@
-from django.test import TestCase
+import asyncio
+import gzip
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import (
+    analytics, availability, catalog, changes, checks, db_router, db_session, events, holds, intent, jobs, scheduling,
+    slot_finder, tasks, throttling, waitlist,
+)
+from .archive import archive_batch
+from .exports import APPOINTMENT_EXPORT_COLUMNS, EXPORT_CHUNK_SIZE
+from .middleware import CompressionMiddleware, LoadShedMiddleware
+from .models import (
+    Appointment, AppointmentRollup, AuditLog, ChangeLogEntry, ChatMessage, Doctor, Job, MedicalRecord, Payment, Slot,
+    Specialization, UserProfile, WaitlistEntry,
+)
+from .renderers import ORJSONRenderer
+from .transitions import transition
+
+
+def bearer(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+@override_settings(NOTIFICATION_BACKEND='api.notifications.LocmemBackend')
+class ApiTestCase(TestCase):
+    """Seeds a specialization, a doctor with slots, a patient and a doctor account."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.specialization = Specialization.objects.create(name='Cardiologist')
+        cls.doctor = Doctor.objects.create(name='Dr. Test', specialization=cls.specialization)
+        cls.slots = [
+            Slot.objects.create(doctor=cls.doctor, time=slot_time)
+            for slot_time in ('09:30 AM', '10:30 AM', '11:30 AM')
+        ]
+        cls.patient = User.objects.create_user('patient', password='pass12345')
+        cls.doctor_user = User.objects.create_user('doctor', password='pass12345')
+        UserProfile.objects.create(user=cls.doctor_user, is_doctor=True, doctor=cls.doctor)
+
+    def setUp(self):
+        # Module-level caches outlive the rolled back test transactions
+        cache.clear()
+        catalog._snapshot = {'version': None, 'checked_at': 0.0, 'specializations': {}, 'doctors': {}}
+        for store in (slot_finder._layouts, slot_finder._doctors, slot_finder._loaded, slot_finder._occupancy):
+            store.clear()
+        throttling._store = None
+        self.client = APIClient()
+        self.client.credentials(**bearer(self.patient))
+        self.doctor_client = APIClient()
+        self.doctor_client.credentials(**bearer(self.doctor_user))
+        self.date = timezone.localdate() + timedelta(days=3)
+
+    def book(self, slot=None, date=None, client=None, headers=None, **extra):
+        data = {
+            'doctor': self.doctor.id, 'slot': (slot or self.slots[0]).id,
+            'appointment_date': str(date or self.date), 'patient_name': 'Pat', 'patient_age': 30,
+            'patient_gender': 'Male', 'problem': 'Checkup',
+        }
+        data.update(extra)
+        return (client or self.client).post('/api/appointments/', data, format='json', headers=headers)
+
+    def appointment(self, slot=None, date=None, status='Upcoming', user=None):
+        return Appointment.objects.create(
+            user=user or self.patient, doctor=self.doctor, slot=slot or self.slots[0],
+            appointment_date=date or self.date, patient_name='Pat', patient_age=30,
+            patient_gender='Male', problem='Checkup', status=status,
+        )
+
+
+class AsyncCatalogueViewTests(ApiTestCase):
+    async def test_async_doctor_list_serializes_on_the_event_loop(self):
+        response = await self.async_client.get('/api/async/doctors/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['specialization_name'], 'Cardiologist')
+
+    async def test_async_doctor_detail_marks_booked_slots(self):
+        await Appointment.objects.acreate(
+            user=self.patient, doctor=self.doctor, slot=self.slots[0], appointment_date=self.date,
+            patient_name='Pat', patient_age=30, patient_gender='Male', problem='Checkup',
+        )
+        response = await self.async_client.get(f'/api/async/doctors/{self.doctor.id}/', {'date': str(self.date)})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['specialization_name'], 'Cardiologist')
+        booked = {slot['id']: slot['is_booked'] for slot in data['slots']}
+        self.assertTrue(booked[self.slots[0].id])
+        self.assertFalse(booked[self.slots[1].id])
+
+    def test_catalogue_follows_specialization_rename(self):
+        self.assertEqual(catalog.specialization_name(self.specialization.id), 'Cardiologist')
+        self.specialization.name = 'Cardiology'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.specialization.save()
+        self.assertEqual(catalog.specialization_name(self.specialization.id), 'Cardiology')
+
+    @override_settings(CATALOG_VERSION_CHECK_SECONDS=0)
+    def test_change_in_another_worker_is_seen_without_a_shared_cache(self):
+        self.assertEqual(catalog.specialization_name(self.specialization.id), 'Cardiologist')
+        # Another worker renames it: its cache is not ours, only the database is shared
+        with mock.patch.object(catalog, '_expire'):
+            self.specialization.name = 'Cardiology'
+            self.specialization.save()
+        cache.clear()
+        self.assertEqual(catalog.specialization_name(self.specialization.id), 'Cardiology')
+
+
+class SlotFinderTests(ApiTestCase):
+    def age_doctor_lists(self):
+        # As if SLOT_FINDER_TTL passed for the doctor lists only; occupancy stays fresh
+        for specialization_id, (_, doctor_ids) in list(slot_finder._doctors.items()):
+            slot_finder._doctors[specialization_id] = (time.monotonic() - 3600, doctor_ids)
+
+    def test_earliest_free_slots_skip_booked_ones(self):
+        self.appointment(slot=self.slots[0])
+        found = slot_finder.find_free_slots(self.specialization.id, self.date, self.date, limit=2)
+        self.assertEqual([slot_id for _, _, _, slot_id in found], [self.slots[1].id, self.slots[2].id])
+
+    def test_booking_in_this_worker_updates_the_bitmap(self):
+        slot_finder.find_free_slots(self.specialization.id, self.date, self.date)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.book(slot=self.slots[0]).status_code, 201)
+        found = slot_finder.find_free_slots(self.specialization.id, self.date, self.date, limit=1)
+        self.assertEqual(found[0][3], self.slots[1].id)
+
+    def test_doctor_added_elsewhere_appears_after_the_ttl(self):
+        slot_finder.find_free_slots(self.specialization.id, self.date, self.date)
+        # Created without running on_commit hooks, like a write from another worker
+        other = Doctor.objects.create(name='Dr. Early', specialization=self.specialization)
+        early = Slot.objects.create(doctor=other, time='08:00 AM')
+        self.age_doctor_lists()
+        found = slot_finder.find_free_slots(self.specialization.id, self.date, self.date, limit=1)
+        self.assertEqual(found[0][2:], (other.id, early.id))
+
+    def test_slot_deleted_elsewhere_is_dropped_after_the_ttl(self):
+        slot_finder.find_free_slots(self.specialization.id, self.date, self.date)
+        Slot.objects.filter(pk=self.slots[0].pk).delete()
+        self.age_doctor_lists()
+        found = slot_finder.find_free_slots(self.specialization.id, self.date, self.date)
+        self.assertNotIn(self.slots[0].id, [slot_id for _, _, _, slot_id in found])
+
+    def test_next_available_endpoint(self):
+        response = self.client.get('/api/doctors/next_available/', {
+            'specialization': self.specialization.id, 'from': str(self.date), 'to': str(self.date), 'limit': 1,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['slot'], self.slots[0].id)
+        self.assertEqual(response.json()[0]['specialization_name'], 'Cardiologist')
+
+    def test_held_slots_are_not_offered_to_others(self):
+        holds.place(self.doctor.id, self.slots[0].id, self.date, self.doctor_user.id)
+        params = {'specialization': self.specialization.id, 'from': str(self.date), 'to': str(self.date), 'limit': 2}
+        response = self.client.get('/api/doctors/next_available/', params)
+        self.assertEqual([row['slot'] for row in response.json()], [self.slots[1].id, self.slots[2].id])
+        # The holder still sees it
+        response = self.doctor_client.get('/api/doctors/next_available/', params)
+        self.assertEqual(response.json()[0]['slot'], self.slots[0].id)
+
+
+class AvailabilityAndJobTests(ApiTestCase):
+    def test_other_workers_bookings_are_seen_without_a_shared_cache(self):
+        self.assertEqual(availability.booked_slot_ids(self.doctor.id, self.date), set())
+        # No on_commit hooks run, as for a booking made by another worker
+        self.appointment(slot=self.slots[0])
+        self.assertEqual(availability.booked_slot_ids(self.doctor.id, self.date), {self.slots[0].id})
+
+    @override_settings(AVAILABILITY_CACHE_TTL=60)
+    def test_cached_availability_is_invalidated_when_the_booking_commits(self):
+        self.assertEqual(availability.booked_slot_ids(self.doctor.id, self.date), set())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.book(slot=self.slots[0]).status_code, 201)
+        # Without running the job worker
+        self.assertEqual(availability.booked_slot_ids(self.doctor.id, self.date), {self.slots[0].id})
+
+    @override_settings(AVAILABILITY_CACHE_TTL=60)
+    def test_hold_is_refused_for_a_slot_booked_elsewhere(self):
+        availability.booked_slot_ids(self.doctor.id, self.date)  # cached as free
+        self.appointment(slot=self.slots[0], user=self.doctor_user)
+        response = self.client.post('/api/slot-holds/', {
+            'doctor': self.doctor.id, 'slot': self.slots[0].id, 'appointment_date': str(self.date),
+        }, format='json')
+        self.assertEqual(response.status_code, 409)
+
+    def test_repeated_events_in_the_same_state_are_all_queued(self):
+        appointment = self.appointment()
+        with transaction.atomic():
+            tasks.appointment_changed(appointment, 'appointment_rescheduled', self.patient, notify='doctor', message='Moved')
+            tasks.appointment_changed(appointment, 'appointment_rescheduled', self.patient, notify='doctor', message='Moved')
+        self.assertEqual(Job.objects.filter(name='write_audit').count(), 2)
+        self.assertEqual(Job.objects.filter(name='notify_doctor').count(), 2)
+
+    def test_resent_event_is_queued_once(self):
+        appointment = self.appointment()
+        at = timezone.now()
+        with transaction.atomic():
+            for _ in range(2):
+                tasks.appointment_changed(appointment, 'appointment_canceled', self.patient, notify='doctor', message='Canceled', at=at)
+        self.assertEqual(Job.objects.filter(name='write_audit').count(), 1)
+        self.assertEqual(Job.objects.filter(name='notify_doctor').count(), 1)
+
+    def test_audit_rerun_writes_one_row(self):
+        appointment = self.appointment()
+        tasks.appointment_changed(appointment, 'appointment_canceled', self.patient)
+        job = Job.objects.get(name='write_audit')
+        for _ in range(2):
+            # As if the worker died after the handler but before marking the job done
+            Job.objects.filter(pk=job.pk).update(status='Pending')
+            jobs.run_job_id(job.pk)
+        self.assertEqual(AuditLog.objects.get().job_id, job.pk)
+
+    def test_repeated_otp_requests_are_all_sent(self):
+        client = APIClient()
+        for _ in range(2):
+            self.assertEqual(client.post('/api/auth/send_otp/', {'mobile': '9999999999'}, format='json').status_code, 200)
+        self.assertEqual(Job.objects.filter(name='send_otp').count(), 2)
+
+    def test_prune_deletes_only_old_finished_jobs(self):
+        old = timezone.now() - timedelta(days=30)
+        Job.objects.create(name='write_audit', payload={}, status='Done', run_at=old)
+        Job.objects.create(name='write_audit', payload={}, status='Failed', run_at=old)
+        pending = Job.objects.create(name='write_audit', payload={}, status='Pending', run_at=old)
+        recent = Job.objects.create(name='write_audit', payload={}, status='Done')
+        self.assertEqual(jobs.prune(), 2)
+        self.assertEqual(set(Job.objects.values_list('id', flat=True)), {pending.id, recent.id})
+
+
+class SlotHoldTests(ApiTestCase):
+    def hold(self, client, slot=None):
+        return client.post('/api/slot-holds/', {
+            'doctor': self.doctor.id, 'slot': (slot or self.slots[0]).id, 'appointment_date': str(self.date),
+        }, format='json')
+
+    def test_booking_is_refused_while_someone_else_holds_the_slot(self):
+        self.assertEqual(self.hold(self.doctor_client).status_code, 201)
+        self.assertEqual(self.book().status_code, 409)
+
+    def test_booking_takes_the_hold_until_it_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.book().status_code, 201)
+            # Held for the booker from the check until the commit
+            self.assertEqual(self.hold(self.doctor_client).status_code, 409)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(holds.held_slot_ids(self.doctor.id, self.date, [self.slots[0].id]), set())
+
+    def test_holds_do_not_use_up_the_booking_budget(self):
+        booking_limit = throttling.parse_rate(api_settings.DEFAULT_THROTTLE_RATES['booking'])[0]
+        for slot in self.slots * (booking_limit // len(self.slots) + 1):
+            self.assertEqual(self.hold(self.client, slot).status_code, 201)
+        self.assertEqual(self.book().status_code, 201)
+
+
+class DoubleBookingMigrationTests(TransactionTestCase):
+    migrate_from = [('api', '0013_appointmenttransition')]
+    migrate_to = [('api', '0014_appointment_unique_active_booking')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_duplicate_active_bookings_are_canceled_before_the_constraint(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        Appointment = apps.get_model('api', 'Appointment')
+        specialization = apps.get_model('api', 'Specialization').objects.create(name='General')
+        doctor = apps.get_model('api', 'Doctor').objects.create(name='Dr. Old', specialization=specialization)
+        slot = apps.get_model('api', 'Slot').objects.create(doctor=doctor, time='09:30 AM')
+        user = apps.get_model('auth', 'User').objects.create(username='old-patient')
+        fields = dict(
+            user=user, doctor=doctor, slot=slot, appointment_date=timezone.localdate(),
+            patient_name='Pat', patient_age=30, patient_gender='Male', problem='Checkup',
+        )
+        first = Appointment.objects.create(status='Booked', **fields)
+        second = Appointment.objects.create(status='Upcoming', **fields)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        statuses = dict(Appointment.objects.values_list('id', 'status'))
+        self.assertEqual(statuses, {first.id: 'Booked', second.id: 'Canceled'})
+
+
+class PatientRescheduleTests(ApiTestCase):
+    def test_moving_onto_a_booked_slot_is_a_conflict(self):
+        appointment = self.appointment(slot=self.slots[0])
+        self.appointment(slot=self.slots[1], user=self.doctor_user)
+        response = self.client.patch(f'/api/appointments/{appointment.id}/', {'slot': self.slots[1].id}, format='json')
+        self.assertEqual(response.status_code, 409)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.slot_id, self.slots[0].id)
+
+    def test_moving_to_a_free_slot_notifies_the_doctor(self):
+        appointment = self.appointment(slot=self.slots[0])
+        response = self.client.patch(f'/api/appointments/{appointment.id}/', {
+            'slot': self.slots[2].id, 'problem': 'Follow-up',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['slot'], response.json()['problem']), (self.slots[2].id, 'Follow-up'))
+        self.assertEqual(Job.objects.filter(name='notify_doctor').count(), 1)
+
+    def test_doctor_cannot_be_changed(self):
+        other = Doctor.objects.create(name='Dr. Other', specialization=self.specialization)
+        appointment = self.appointment()
+        response = self.client.patch(f'/api/appointments/{appointment.id}/', {'doctor': other.id}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bookings_are_checked_where_partial_indexes_are_missing(self):
+        self.appointment(slot=self.slots[0])
+        with mock.patch.object(connection.features, 'supports_partial_indexes', False):
+            with self.assertRaises(IntegrityError):
+                scheduling.ensure_free(self.doctor.id, [(self.date, self.slots[0].id)])
+            scheduling.ensure_free(self.doctor.id, [(self.date, self.slots[1].id)])
+
+
+class AsyncMiddlewareTests(SimpleTestCase):
+    @override_settings(LOAD_SHED_MAX_IN_FLIGHT=1, LOAD_SHED_PRIORITY_PATHS=[])
+    async def test_load_shedding_counts_concurrent_async_requests(self):
+        release = asyncio.Event()
+
+        async def view(request):
+            await release.wait()
+            return HttpResponse('ok')
+
+        middleware = LoadShedMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        first = asyncio.ensure_future(middleware(RequestFactory().get('/api/doctors/')))
+        await asyncio.sleep(0)
+        shed = await middleware(RequestFactory().get('/api/doctors/'))
+        self.assertEqual(shed.status_code, 503)
+        release.set()
+        self.assertEqual((await first).status_code, 200)
+        self.assertEqual(middleware.in_flight, 0)
+
+    async def test_compression_runs_on_the_async_path(self):
+        async def view(request):
+            return HttpResponse('x' * 4096)
+
+        middleware = CompressionMiddleware(view)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'x' * 4096)
+
+
+class ChatStreamTests(ApiTestCase):
+    def parse(self, body):
+        return [
+            (block.split('\n')[0][len('event: '):], json.loads(block.split('\n')[1][len('data: '):]))
+            for block in body.strip().split('\n\n')
+        ]
+
+    def test_stream_negotiates_event_stream(self):
+        response = self.client.post('/api/chat/stream/', {'message': 'I have chest pain'}, format='json',
+                                    HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = self.parse(b''.join(response.streaming_content).decode())
+        self.assertEqual(events[0], ('specializations', ['Cardiologist']))
+        self.assertEqual(events[1][1][0]['name'], 'Dr. Test')
+        text = ''.join(data for name, data in events if name == 'token')
+        self.assertEqual(events[-1][0], 'done')
+        self.assertEqual(events[-1][1]['response'], text)
+        self.assertEqual(ChatMessage.objects.get(user=self.patient).response, text)
+
+    def test_errors_are_sent_as_an_error_event(self):
+        response = self.client.post('/api/chat/stream/', {}, format='json', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.parse(response.content.decode()), [('error', {'error': 'Message is required'})])
+
+    async def test_stream_runs_as_an_async_generator_under_asgi(self):
+        response = await self.async_client.post(
+            '/api/chat/stream/', {'message': 'I have chest pain'}, content_type='application/json',
+            headers={'Authorization': bearer(self.patient)['HTTP_AUTHORIZATION'], 'Accept': 'text/event-stream'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(self.parse(body)[-1][0], 'done')
+        self.assertTrue(await ChatMessage.objects.filter(user=self.patient).aexists())
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_recommendations_use_the_local_date(self):
+        # 20:00 UTC is already the next day in Kolkata
+        now = timezone.make_aware(datetime(2026, 10, 19, 20, 0), dt_timezone.utc)
+        for slot in self.slots:
+            self.appointment(slot=slot, date=date(2026, 10, 20))
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(intent.recommend_doctors(['Cardiologist']), [])
+
+
+class BookingHistoryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        self.archived = self.appointment(slot=self.slots[0], date=today - timedelta(days=10), status='Completed')
+        archive_batch(7, 100)
+        self.past = self.appointment(slot=self.slots[1], date=today - timedelta(days=5), status='Completed')
+        self.upcoming = self.appointment(slot=self.slots[2])
+
+    def test_history_is_one_sorted_list(self):
+        data = self.client.get('/api/appointments/', {'history': 'true'}).json()
+        self.assertEqual([row['id'] for row in data], [self.upcoming.id, self.past.id, self.archived.id])
+        self.assertTrue(data[2]['archived'])
+
+    def test_history_pages_include_archived_rows(self):
+        first = self.client.get('/api/appointments/', {'history': 'true', 'page': 1, 'page_size': 2}).json()
+        self.assertEqual(first['count'], 3)
+        self.assertEqual([row['id'] for row in first['results']], [self.upcoming.id, self.past.id])
+        second = self.client.get('/api/appointments/', {'history': 'true', 'page': 2, 'page_size': 2}).json()
+        self.assertEqual([row['id'] for row in second['results']], [self.archived.id])
+
+    def test_history_filters_apply_to_archived_rows(self):
+        data = self.client.get('/api/appointments/', {'history': 'true', 'status': 'Completed'}).json()
+        self.assertEqual([row['id'] for row in data], [self.past.id, self.archived.id])
+
+    def test_doctor_list_limit_covers_archived_rows(self):
+        data = self.doctor_client.get('/api/doctor-appointments/', {'history': 'true', 'limit': 3}).json()
+        self.assertEqual([row['id'] for row in data], [self.upcoming.id, self.past.id, self.archived.id])
+
+
+class SyncTests(ApiTestCase):
+    def token_now(self):
+        return changes.make_token(ChangeLogEntry.objects.order_by('-id').values_list('id', flat=True).first() or 0)
+
+    def test_archived_appointments_are_not_reported_as_deleted(self):
+        old = self.appointment(date=timezone.localdate() - timedelta(days=10), status='Completed')
+        token = self.token_now()
+        archive_batch(7, 100)
+        data = self.client.get('/api/sync/', {'since': token}).json()
+        self.assertEqual(data['appointments']['archived'], [old.id])
+        self.assertEqual(data['appointments']['deleted'], [])
+
+    def test_deleted_appointments_are_still_reported(self):
+        appointment = self.appointment()
+        appointment_id = appointment.id
+        token = self.token_now()
+        appointment.delete()
+        data = self.client.get('/api/sync/', {'since': token}).json()
+        self.assertEqual(data['appointments']['deleted'], [appointment_id])
+        self.assertEqual(data['appointments']['archived'], [])
+
+
+    @mock.patch('api.views.SYNC_PAGE_SIZE', 2)
+    def test_reset_is_paginated_with_a_fixed_token(self):
+        appointments = [self.appointment(slot=slot) for slot in self.slots]
+        record = MedicalRecord.objects.create(
+            patient=self.patient, doctor=self.doctor, file_name='scan.pdf', file_type='Imaging',
+            file_size='1 MB', file_data='QUJD' * 1000,
+        )
+        pages = [self.client.get('/api/sync/').json()]
+        while pages[-1]['has_more']:
+            pages.append(self.client.get('/api/sync/', {'cursor': pages[-1]['cursor']}).json())
+        self.assertEqual(len(pages), 2)
+        self.assertEqual({page['token'] for page in pages}, {pages[0]['token']})
+        self.assertEqual(
+            [row['id'] for page in pages for row in page['appointments']['created']], [a.id for a in appointments]
+        )
+        records = [row for page in pages for row in page['medical_records']['created']]
+        self.assertEqual([row['id'] for row in records], [record.id])
+        self.assertNotIn('file_data', records[0])
+        self.assertTrue(records[0]['file_url'].endswith(f'/api/medical-records/{record.id}/'))
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': 'nope'}).status_code, 400)
+
+
+class RollupTests(ApiTestCase):
+    @override_settings(ROLLUP_LAG_SECONDS=0)
+    def test_transitions_of_archived_appointments_are_rolled_up(self):
+        appointment = self.appointment(date=timezone.localdate() - timedelta(days=10), status='Booked')
+        transition(appointment, 'Completed', self.doctor_user)
+        archive_batch(7, 100)
+        analytics.refresh()
+        completed = AppointmentRollup.objects.get(granularity='day', status='Completed')
+        self.assertEqual((completed.doctor_id, completed.count), (self.doctor.id, 1))
+
+    @override_settings(ROLLUP_LAG_SECONDS=0)
+    def test_list_streams_a_json_array(self):
+        self.appointment()
+        analytics.refresh()
+        admin = User.objects.create_user('ops', password='pass12345', is_staff=True)
+        client = APIClient()
+        client.credentials(**bearer(admin))
+        response = client.get('/api/analytics/rollups/', {'granularity': 'day'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([(row['doctor'], row['status'], row['count']) for row in rows], [('Dr. Test', 'Upcoming', 1)])
+
+    @skipUnless(analytics.HAS_PYARROW, 'needs pyarrow')
+    def test_arrow_stream_spans_several_batches(self):
+        import pyarrow as pa
+
+        bucket = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+        total = EXPORT_CHUNK_SIZE * 2 + 1
+        rows = (('hour', bucket, 1, 'Dr. Test', 1, 'Cardiologist', 'Upcoming', n) for n in range(total))
+        chunks = list(analytics.arrow_stream(rows))
+        # Schema, one chunk per batch, end-of-stream marker
+        self.assertEqual(len(chunks), 4)
+        table = pa.ipc.open_stream(b''.join(chunks)).read_all()
+        self.assertEqual(table.num_rows, total)
+        self.assertEqual(table.column('count').to_pylist()[-1], total - 1)
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    def fake_connection(self, mariadb):
+        connection = mock.MagicMock(vendor='mysql', mysql_is_mariadb=mariadb)
+        return connection, connection.cursor.return_value.__enter__.return_value
+
+    @override_settings(DB_STATEMENT_TIMEOUT_MS=5000)
+    def test_mysql_gets_max_execution_time(self):
+        connection, cursor = self.fake_connection(mariadb=False)
+        db_session.set_statement_timeout(sender=None, connection=connection)
+        cursor.execute.assert_called_once_with('SET SESSION max_execution_time = %s', [5000])
+
+    @override_settings(DB_STATEMENT_TIMEOUT_MS=5000)
+    def test_mariadb_gets_max_statement_time(self):
+        connection, cursor = self.fake_connection(mariadb=True)
+        db_session.set_statement_timeout(sender=None, connection=connection)
+        cursor.execute.assert_called_once_with('SET SESSION max_statement_time = %s', [5.0])
+
+    def test_unknown_db_profile_is_rejected(self):
+        result = subprocess.run(
+            [sys.executable, '-c', 'import core.settings'], cwd=settings.BASE_DIR,
+            env={**os.environ, 'DB_PROFILE': 'fast'}, capture_output=True, text=True,
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+
+    def test_asgi_turns_persistent_connections_off(self):
+        script = 'import core.asgi; from django.conf import settings; print(settings.DATABASES["default"]["CONN_MAX_AGE"])'
+        env = {key: value for key, value in os.environ.items() if key != 'DJANGO_ASGI'}
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertEqual(result.stdout.strip(), '0', result.stderr)
+
+
+class RendererTests(SimpleTestCase):
+    def test_non_finite_floats_raise_like_drf(self):
+        for value in (float('nan'), float('inf')):
+            data = {'rows': [{'rating': value}]}
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render(data)
+
+    def test_output_matches_drf(self):
+        data = {'name': 'Dr. Test', 'rating': 4.5, 'missing': None, 'note': 'line\u2028break'}
+        self.assertEqual(json.loads(ORJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+        self.assertIn(b'\\u2028', ORJSONRenderer().render(data))
+
+
+class AsyncAccountViewTests(ApiTestCase):
+    async def test_profile_requires_a_token(self):
+        response = await self.async_client.get('/api/async/profile/')
+        self.assertEqual(response.status_code, 401)
+
+    async def test_profile_matches_the_sync_payload(self):
+        response = await self.async_client.get(
+            '/api/async/profile/', headers={'Authorization': bearer(self.doctor_user)['HTTP_AUTHORIZATION']}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['role'], 'doctor')
+        self.assertEqual(response.json()['doctor_id'], self.doctor.id)
+
+    async def test_chat_history_pages_by_id(self):
+        for i in range(3):
+            await ChatMessage.objects.acreate(user=self.patient, message=f'q{i}', response=f'a{i}')
+        headers = {'Authorization': bearer(self.patient)['HTTP_AUTHORIZATION']}
+        first = (await self.async_client.get('/api/async/chat/', {'page_size': 2}, headers=headers)).json()
+        self.assertEqual([chat['message'] for chat in first['results']], ['q2', 'q1'])
+        second = (await self.async_client.get(first['next'], headers=headers)).json()
+        self.assertEqual([chat['message'] for chat in second['results']], ['q0'])
+        self.assertIsNone(second['next'])
+
+    async def test_chat_history_rejects_bad_paging(self):
+        headers = {'Authorization': bearer(self.patient)['HTTP_AUTHORIZATION']}
+        for params in ({'page_size': 'ten'}, {'page_size': '-1'}, {'before': 'abc'}):
+            response = await self.async_client.get('/api/async/chat/', params, headers=headers)
+            self.assertEqual(response.status_code, 400, params)
+        await ChatMessage.objects.acreate(user=self.patient, message='q', response='a')
+        response = await self.async_client.get('/api/async/chat/', {'page_size': 0}, headers=headers)
+        self.assertEqual(len(response.json()['results']), 1)
+
+
+class ReplicaPinTests(ApiTestCase):
+    def test_writes_pin_the_user_to_the_primary(self):
+        self.client.get('/api/appointments/')
+        self.assertFalse(db_router.is_pinned(self.patient))
+        self.assertEqual(self.book().status_code, 201)
+        self.assertTrue(db_router.is_pinned(self.patient))
+        self.assertFalse(db_router.is_pinned(self.doctor_user))
+
+    def test_failed_writes_do_not_pin(self):
+        self.book(slot=Slot(id=0))
+        self.assertFalse(db_router.is_pinned(self.patient))
+
+
+class StatusTransitionTests(ApiTestCase):
+    def test_status_changes_follow_the_state_machine(self):
+        appointment = self.appointment()
+        url = f'/api/doctor-appointments/{appointment.id}/update_status/'
+        response = self.doctor_client.patch(url, {'status': 'Accepted'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(appointment.transitions.get().to_status, 'Accepted')
+        # Completing needs a payment first
+        response = self.doctor_client.patch(url, {'status': 'Completed'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'Accepted')
+
+
+class BulkActionTests(ApiTestCase):
+    def test_bulk_reports_each_appointment(self):
+        upcoming = self.appointment()
+        completed = self.appointment(slot=self.slots[1], status='Completed')
+        response = self.doctor_client.post('/api/doctor-appointments/bulk/', {
+            'action': 'accept', 'ids': [upcoming.id, completed.id, 0],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data['succeeded'], data['failed']), (1, 2))
+        self.assertEqual([r.get('code') for r in data['results']], [None, 'conflict', 'not_found'])
+        upcoming.refresh_from_db()
+        self.assertEqual(upcoming.status, 'Accepted')
+
+    def test_bulk_reschedule_refuses_booked_targets(self):
+        moving = self.appointment()
+        self.appointment(slot=self.slots[1], date=self.date + timedelta(days=1))
+        response = self.doctor_client.post('/api/doctor-appointments/bulk/', {
+            'action': 'reschedule', 'items': [
+                {'id': moving.id, 'appointment_date': str(self.date + timedelta(days=1)), 'slot': self.slots[1].id},
+            ],
+        }, format='json')
+        self.assertEqual(response.json()['results'][0]['code'], 'conflict')
+
+    def test_string_ids_are_accepted_and_junk_is_rejected(self):
+        appointment = self.appointment()
+        response = self.doctor_client.post('/api/doctor-appointments/bulk/', {
+            'action': 'accept', 'ids': [str(appointment.id)],
+        }, format='json')
+        self.assertEqual(response.json()['succeeded'], 1)
+        for payload in ({'action': 'accept', 'ids': ['abc']}, {'action': 'reschedule', 'items': ['abc']},
+                        {'action': 'reschedule', 'items': [{'id': appointment.id, 'appointment_date': '2026-02-30'}]}):
+            response = self.doctor_client.post('/api/doctor-appointments/bulk/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+
+    def test_past_dates_are_refused(self):
+        appointment = self.appointment()
+        yesterday = str(timezone.localdate() - timedelta(days=1))
+        response = self.doctor_client.post('/api/doctor-appointments/bulk/', {
+            'action': 'reschedule', 'items': [{'id': appointment.id, 'appointment_date': yesterday}],
+        }, format='json')
+        self.assertEqual(response.json()['results'][0]['code'], 'invalid')
+        response = self.client.patch(f'/api/appointments/{appointment.id}/', {'appointment_date': yesterday}, format='json')
+        self.assertEqual(response.status_code, 400)
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.appointment_date, self.date)
+
+
+class DoctorRescheduleTests(ApiTestCase):
+    def test_partial_update_onto_a_booked_slot_is_a_conflict(self):
+        moving = self.appointment()
+        self.appointment(slot=self.slots[1])
+        response = self.doctor_client.patch(f'/api/doctor-appointments/{moving.id}/', {'slot': self.slots[1].id}, format='json')
+        self.assertEqual(response.status_code, 409)
+        moving.refresh_from_db()
+        self.assertEqual(moving.slot_id, self.slots[0].id)
+
+
+class DoctorStatsTests(ApiTestCase):
+    def test_stats_follow_bookings_and_transitions(self):
+        self.assertEqual(self.book().status_code, 201)
+        appointment = Appointment.objects.get()
+        self.doctor_client.patch(f'/api/doctor-appointments/{appointment.id}/update_status/', {'status': 'Accepted'}, format='json')
+        response = self.doctor_client.get('/api/doctor-stats/')
+        self.assertEqual(response.status_code, 200)
+        summary = response.json()
+        self.assertEqual((summary['total'], summary['upcoming'], summary['accepted']), (1, 0, 1))
+        self.assertEqual(summary['patients'], 1)
+        self.assertEqual(self.client.get('/api/doctor-stats/').status_code, 403)
+
+
+class ExportTests(ApiTestCase):
+    def test_export_streams_csv_and_ndjson(self):
+        appointment = self.appointment()
+        response = self.doctor_client.get('/api/doctor-appointments/export/', {'output': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(','), APPOINTMENT_EXPORT_COLUMNS)
+        self.assertEqual(len(lines), 2)
+        response = self.doctor_client.get('/api/doctor-appointments/export/', {'output': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row['id'], row['slot_time']) for row in rows], [(appointment.id, '09:30 AM')])
+        self.assertEqual(self.doctor_client.get('/api/doctor-appointments/export/', {'output': 'xml'}).status_code, 400)
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_per_process_cache_is_flagged_for_deploy(self):
+        self.assertEqual([w.id for w in checks.check_shared_cache(None)], ['api.W001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379',
+    }})
+    def test_shared_cache_passes(self):
+        self.assertEqual(checks.check_shared_cache(None), [])
+
+
+class DoctorStatsMigrationTests(TransactionTestCase):
+    migrate_from = [('api', '0014_appointment_unique_active_booking')]
+    migrate_to = [('api', '0015_doctordailystats_doctorpatient')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_counters_are_backfilled_from_existing_appointments(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_from)
+        apps = executor.loader.project_state(self.migrate_from).apps
+        specialization = apps.get_model('api', 'Specialization').objects.create(name='General')
+        doctor = apps.get_model('api', 'Doctor').objects.create(name='Dr. Old', specialization=specialization)
+        slot = apps.get_model('api', 'Slot').objects.create(doctor=doctor, time='09:30 AM')
+        user = apps.get_model('auth', 'User').objects.create(username='old-patient')
+        day = timezone.localdate()
+        fields = dict(
+            user=user, doctor=doctor, appointment_date=day,
+            patient_name='Pat', patient_age=30, patient_gender='Male', problem='Checkup',
+        )
+        apps.get_model('api', 'Appointment').objects.create(slot=slot, status='Upcoming', **fields)
+        apps.get_model('api', 'ArchivedAppointment').objects.create(
+            id=1000, slot_time='09:30 AM', status='Completed', created_at=timezone.now(), **fields
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.migrate_to)
+        apps = executor.loader.project_state(self.migrate_to).apps
+        row = apps.get_model('api', 'DoctorDailyStats').objects.get(doctor_id=doctor.id, date=day)
+        self.assertEqual((row.total, row.upcoming, row.completed), (2, 1, 1))
+        self.assertEqual(apps.get_model('api', 'DoctorPatient').objects.filter(doctor_id=doctor.id).count(), 1)
+
+
+class UnlinkedDoctorsTests(ApiTestCase):
+    def test_prefix_search_skips_linked_doctors(self):
+        Doctor.objects.create(name='Dr. Tara', specialization=self.specialization)
+        Doctor.objects.create(name='Dr. Anil', specialization=self.specialization)
+        response = APIClient().get('/api/unlinked-doctors/', {'q': 'DR. T'})
+        # Dr. Test already has an account
+        self.assertEqual([d['name'] for d in response.json()], ['Dr. Tara'])
+        self.assertEqual(len(APIClient().get('/api/unlinked-doctors/', {'limit': 1}).json()), 1)
+
+
+class ThrottleTests(ApiTestCase):
+    def test_scoped_bucket_answers_429_with_retry_after(self):
+        with mock.patch.dict(api_settings.DEFAULT_THROTTLE_RATES, {'booking': '2/min'}):
+            # Refused bookings use up tokens too
+            for slot in self.slots[:2]:
+                self.assertNotEqual(self.book(slot=slot).status_code, 429)
+            response = self.book(slot=self.slots[2])
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Other routes only draw on the default bucket
+        self.assertEqual(self.client.get('/api/appointments/').status_code, 200)
+
+    def test_pruning_keeps_slow_buckets_that_are_not_full_yet(self):
+        store = throttling.LocalBucketStore()
+        store.max_keys = 1
+        # A 5/min bucket drained, then a burst on a fast 600/min scope triggers pruning
+        for _ in range(5):
+            store.consume('otp:user:1', 5, 5 / 60)
+        start = time.monotonic()
+        with mock.patch.object(throttling.time, 'monotonic', return_value=start + 1):
+            store.consume('default:user:1', 600, 10)
+        with mock.patch.object(throttling.time, 'monotonic', return_value=start + 2):
+            self.assertFalse(store.consume('otp:user:1', 5, 5 / 60)[0])
+        # Only the refilled fast bucket was dropped
+        self.assertEqual(set(store.buckets), {'otp:user:1'})
+
+
+@override_settings(JOBS_EAGER=True)
+class WaitlistTests(ApiTestCase):
+    def join(self, client, slot=None):
+        return client.post('/api/waitlist/', {
+            'doctor': self.doctor.id, 'appointment_date': str(self.date), 'slot': slot.id if slot else None,
+            'patient_name': 'Wait', 'patient_age': 40, 'patient_gender': 'Female', 'problem': 'Checkup',
+        }, format='json')
+
+    def test_canceling_books_the_head_of_the_queue(self):
+        booked = self.appointment()
+        waiter = User.objects.create_user('waiter', password='pass12345')
+        later = User.objects.create_user('later', password='pass12345')
+        for user in (waiter, later):
+            client = APIClient()
+            client.credentials(**bearer(user))
+            self.assertEqual(self.join(client, self.slots[0]).status_code, 201)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/appointments/{booked.id}/', {'status': 'Canceled'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        promoted = Appointment.objects.get(status='Upcoming')
+        self.assertEqual((promoted.user, promoted.slot_id), (waiter, self.slots[0].id))
+        self.assertEqual(WaitlistEntry.objects.get(user=waiter).status, 'Promoted')
+        self.assertEqual(WaitlistEntry.objects.get(user=later).status, 'Waiting')
+
+    def test_held_slot_is_left_to_the_holder(self):
+        waiter = User.objects.create_user('waiter', password='pass12345')
+        client = APIClient()
+        client.credentials(**bearer(waiter))
+        self.join(client, self.slots[0])
+        holds.place(self.doctor.id, self.slots[0].id, self.date, self.doctor_user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(waitlist.promote(self.doctor.id, str(self.date), self.slots[0].id))
+        self.assertFalse(Appointment.objects.exists())
+        self.assertEqual(WaitlistEntry.objects.get().status, 'Waiting')
+        retry = Job.objects.get(name='promote_waitlist', status='Pending')
+        self.assertGreater(retry.run_at, timezone.now())
+
+    def test_position_counts_only_waiters_for_the_same_slot(self):
+        other = User.objects.create_user('other', password='pass12345')
+        client = APIClient()
+        client.credentials(**bearer(other))
+        self.join(client, self.slots[1])
+        self.join(self.client, self.slots[0])
+        self.assertEqual(waitlist.position(WaitlistEntry.objects.get(user=self.patient)), 1)
+
+    def test_past_day_is_not_promoted(self):
+        self.join(self.client, self.slots[0])
+        past = timezone.localdate() - timedelta(days=1)
+        WaitlistEntry.objects.update(appointment_date=past)
+        self.assertIsNone(waitlist.promote(self.doctor.id, str(past), self.slots[0].id))
+        self.assertFalse(Appointment.objects.exists())
+        self.assertEqual(WaitlistEntry.objects.get().status, 'Expired')
+
+    def test_cannot_join_twice(self):
+        self.assertEqual(self.join(self.client).status_code, 201)
+        self.assertEqual(self.join(self.client).status_code, 400)
+
+
+class IdempotencyTests(ApiTestCase):
+    def test_retried_booking_is_replayed(self):
+        first = self.book(headers={'Idempotency-Key': 'abc'})
+        retry = self.book(headers={'Idempotency-Key': 'abc'})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(retry.json()['id'], first.json()['id'])
+        self.assertEqual(Appointment.objects.count(), 1)
+        # Same key, different request
+        self.assertEqual(self.book(slot=self.slots[1], headers={'Idempotency-Key': 'abc'}).status_code, 422)
+
+    def test_payment_is_charged_once(self):
+        appointment = self.appointment(status='Accepted')
+        url = f'/api/appointments/{appointment.id}/make_payment/'
+        first = self.client.post(url, headers={'Idempotency-Key': 'pay-1'})
+        retry = self.client.post(url, headers={'Idempotency-Key': 'pay-1'})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.status, 'Booked')
+        self.assertEqual(Payment.objects.get().idempotency_key, 'pay-1')
+        # Without the key the second attempt reaches the handler and is refused
+        self.assertEqual(self.client.post(url).status_code, 400)
+
+
+class NearbyDoctorTests(ApiTestCase):
+    def test_nearest_first_within_the_radius(self):
+        Doctor.objects.create(name='Dr. Thane', specialization=self.specialization, location='Thane, India')
+        response = self.client.get('/api/doctors/nearby/', {'lat': 19.07, 'lon': 72.88, 'radius': 30})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([d['name'] for d in data], ['Dr. Test', 'Dr. Thane'])
+        self.assertLess(data[0]['distance_km'], 1)
+        names = [d['name'] for d in self.client.get('/api/doctors/nearby/', {'lat': 19.07, 'lon': 72.88}).json()]
+        self.assertEqual(names, ['Dr. Test'])
+
+    def test_date_keeps_doctors_with_a_free_slot(self):
+        for slot in self.slots:
+            self.appointment(slot=slot)
+        params = {'lat': 19.07, 'lon': 72.88, 'date': str(self.date)}
+        self.assertEqual(self.client.get('/api/doctors/nearby/', params).json(), [])
+        params['date'] = str(self.date + timedelta(days=1))
+        self.assertEqual(len(self.client.get('/api/doctors/nearby/', params).json()), 1)
+
+    def test_invalid_coordinates(self):
+        self.assertEqual(self.client.get('/api/doctors/nearby/', {'lat': 91, 'lon': 0}).status_code, 400)
+        self.assertEqual(self.client.get('/api/doctors/nearby/', {'lat': 'x', 'lon': 0}).status_code, 400)
+
+
+@override_settings(EVENT_BROKER='api.events.LocalBroker')
+class EventTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        events._broker = None
+
+    def test_booking_publishes_after_commit(self):
+        with mock.patch.object(events, 'publish') as publish:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.assertEqual(self.book().status_code, 201)
+            publish.assert_not_called()
+            for callback in callbacks:
+                callback()
+        topics, event, data = publish.call_args.args
+        self.assertEqual(topics, [events.user_topic(self.patient.id), events.doctor_topic(self.doctor.id)])
+        self.assertEqual((event, data['slot']), ('appointment.created', self.slots[0].id))
+
+    async def test_local_broker_delivers_to_subscribers_of_the_topic(self):
+        broker = events.get_broker()
+        subscription = broker.subscribe([events.doctor_topic(self.doctor.id)])
+        try:
+            events.publish([events.user_topic(self.patient.id)], 'appointment.created', {'id': 1})
+            events.publish([events.doctor_topic(self.doctor.id)], 'appointment.status', {'id': 1})
+            self.assertEqual(await subscription.get(1), {'event': 'appointment.status', 'data': {'id': 1}})
+            self.assertIsNone(await subscription.get(0.01))
+        finally:
+            broker.unsubscribe(subscription)
+        self.assertEqual(broker.subscribers, {})
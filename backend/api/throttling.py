@@ -0,0 +1,133 @@
+"""Token-bucket request throttling.
+
+Every client (user id, or IP for anonymous requests) gets a bucket per scope
+holding up to ``num`` tokens of a ``'num/period'`` rate and refilling at
+``num / period`` tokens per second, so short bursts pass while the sustained
+rate is capped. ``IdentityThrottle`` applies the ``default`` scope to every
+request; ``ScopedThrottle`` adds a tighter bucket for views or actions that
+set ``throttle_scope`` (booking, slot holds, OTP, catalogue).
+
+Buckets live in the store named by ``THROTTLE_STORE``: ``LocalBucketStore``
+(per process, the default) or ``CacheBucketStore`` (Django cache, shared
+between workers when the cache is Redis).
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> ``(capacity, tokens per second)``."""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def refill(tokens, updated, capacity, per_second, now):
+    return min(capacity, tokens + (now - updated) * per_second)
+
+
+class LocalBucketStore:
+    """Buckets in a process-wide dict. Fast, but each worker counts separately."""
+    max_keys = 50000
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, per_second, cost=1):
+        """Take ``cost`` tokens. Returns ``(allowed, seconds until enough tokens)``."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated, _ = self.buckets.get(key, (capacity, now, now))
+            tokens = refill(tokens, updated, capacity, per_second, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            # Each bucket remembers when its own rate refills it, whatever its scope
+            self.buckets[key] = (tokens, now, now + (capacity - tokens) / per_second)
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, 0 if allowed else (cost - tokens) / per_second
+
+    def _prune(self, now):
+        # Buckets that are full again carry no information
+        self.buckets = {key: state for key, state in self.buckets.items() if now < state[2]}
+
+
+class CacheBucketStore:
+    """Buckets in the Django cache, shared by all workers.
+
+    The read-modify-write is not atomic, so concurrent requests from the same
+    client can overshoot a bucket slightly; that is acceptable for throttling.
+    """
+
+    def consume(self, key, capacity, per_second, cost=1):
+        now = time.time()
+        cache_key = f"throttle:{key}"
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = refill(tokens, updated, capacity, per_second, now)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        cache.set(cache_key, (tokens, now), int(capacity / per_second) + 1)
+        return allowed, 0 if allowed else (cost - tokens) / per_second
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.THROTTLE_STORE)()
+    return _store
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope) if scope else None
+        if not rate or not settings.THROTTLE_ENABLED:
+            return True
+        capacity, per_second = parse_rate(rate)
+        allowed, self.wait_seconds = get_store().consume(
+            f"{scope}:{self.get_ident_key(request)}", capacity, per_second
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """Overall budget per user/IP across the whole API."""
+    scope = 'default'
+
+
+class ScopedThrottle(TokenBucketThrottle):
+    """Extra per-route budget for views or actions that set ``throttle_scope``."""
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
@@ -0,0 +1,55 @@
+"""Appointment status state machine.
+
+Every transition is one conditional UPDATE that only matches while the row is
+still in the status the caller saw (``WHERE id = ? AND status = ?``, with that
+status checked against the allowed sources first). If another request changed
+the appointment in between, nothing is updated and ``TransitionConflict`` is
+raised instead of silently overwriting it. The transition log row is inserted
+in the same transaction.
+"""
+from django.db import transaction
+
+from .models import Appointment, AppointmentTransition
+from .signals import appointment_transitioned
+
+# Target status -> statuses it may be reached from
+TRANSITIONS = {
+    'Accepted': ['Upcoming'],
+    'Rejected': ['Upcoming', 'Accepted'],
+    'Booked': ['Accepted'],
+    'Completed': ['Booked'],
+    'Canceled': ['Upcoming', 'Accepted', 'Booked'],
+}
+
+
+class TransitionConflict(Exception):
+    def __init__(self, current, target):
+        self.current = current
+        self.target = target
+        super().__init__(f"Cannot change an appointment from {current} to {target}.")
+
+
+def can_transition(current, target):
+    return current in TRANSITIONS.get(target, ())
+
+
+def transition(appointment, target, actor=None):
+    """Move ``appointment`` to ``target`` or raise ``TransitionConflict``."""
+    current = appointment.status
+    if not can_transition(current, target):
+        raise TransitionConflict(current, target)
+
+    with transaction.atomic():
+        updated = Appointment.objects.filter(pk=appointment.pk, status=current).update(status=target)
+        if not updated:
+            latest = Appointment.objects.filter(pk=appointment.pk).values_list('status', flat=True).first()
+            raise TransitionConflict(latest or current, target)
+        AppointmentTransition.objects.create(
+            appointment_id=appointment.pk, doctor_id=appointment.doctor_id,
+            from_status=current, to_status=target, actor=actor,
+        )
+        appointment.status = target
+        appointment_transitioned.send(
+            sender=Appointment, appointment=appointment, from_status=current, to_status=target, actor=actor
+        )
+    return appointment
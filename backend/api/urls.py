@@ -3,11 +3,12 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     DoctorViewSet, AppointmentViewSet, ChatBotViewSet, RegisterView,
     OTPViewSet, UnifiedLoginView, ProfileView,
-    DoctorRegisterView, DoctorAppointmentView,
+    DoctorRegisterView, DoctorAppointmentView, DoctorStatsView,
     UnlinkedDoctorsView, DoctorProfileView, SpecializationViewSet, DoctorSlotViewSet,
-    MedicalRecordViewSet, PatientListView
+    MedicalRecordViewSet, PatientListView, AppointmentRollupView, SlotHoldView, WaitlistViewSet, SyncView
 )
 from rest_framework_simplejwt.views import TokenRefreshView
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'doctors', DoctorViewSet)
@@ -16,12 +17,17 @@ router.register(r'chat', ChatBotViewSet, basename='chat')
 router.register(r'auth', OTPViewSet, basename='auth')
 router.register(r'profile', ProfileView, basename='profile')
 router.register(r'doctor-appointments', DoctorAppointmentView, basename='doctor-appointment')
+router.register(r'doctor-stats', DoctorStatsView, basename='doctor-stats')
 router.register(r'specializations', SpecializationViewSet)
 router.register(r'unlinked-doctors', UnlinkedDoctorsView, basename='unlinked-doctors')
 router.register(r'doctor-profile', DoctorProfileView, basename='doctor-profile')
 router.register(r'doctor-slots', DoctorSlotViewSet, basename='doctor-slots')
 router.register(r'medical-records', MedicalRecordViewSet, basename='medical-records')
 router.register(r'doctor-patients', PatientListView, basename='doctor-patients')
+router.register(r'waitlist', WaitlistViewSet, basename='waitlist')
+router.register(r'slot-holds', SlotHoldView, basename='slot-holds')
+router.register(r'analytics/rollups', AppointmentRollupView, basename='analytics-rollups')
+router.register(r'sync', SyncView, basename='sync')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -29,4 +35,11 @@ urlpatterns = [
     path('doctor-register/', DoctorRegisterView.as_view({'post': 'create'}), name='doctor-register'),
     path('token/', UnifiedLoginView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Async read paths, served natively when running under ASGI (uvicorn workers)
+    path('async/doctors/', async_views.doctor_list, name='async-doctor-list'),
+    path('async/doctors/<int:pk>/', async_views.doctor_detail, name='async-doctor-detail'),
+    path('async/profile/', async_views.profile, name='async-profile'),
+    path('async/chat/', async_views.chat_history, name='async-chat-history'),
+    path('async/events/', async_views.event_stream, name='async-events'),
 ]
@@ -1,19 +1,142 @@
+import json
 import random
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.db.models import Q
+from django.db.models.functions import Lower
 from rest_framework import viewsets, status, permissions
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django.contrib.auth.models import User
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Specialization, Doctor, Slot, Appointment, ChatMessage, OTP, UserProfile, MedicalRecord
+from .models import (
+    Specialization, Doctor, Slot, Appointment, ArchivedAppointment, ChatMessage, OTP,
+    UserProfile, MedicalRecord, Payment, WaitlistEntry, ACTIVE_STATUSES
+)
 from .serializers import (
     UserSerializer, SpecializationSerializer, DoctorSerializer, 
-    SlotSerializer, AppointmentSerializer, ChatMessageSerializer, MedicalRecordSerializer
+    SlotSerializer, AppointmentSerializer, ArchivedAppointmentSerializer, ChatMessageSerializer, MedicalRecordSerializer, MedicalRecordSyncSerializer,
+    WaitlistEntrySerializer, BulkStatusSerializer, BulkRescheduleSerializer
 )
-
-class MedicalRecordViewSet(viewsets.ModelViewSet):
+from .pagination import BookingHistoryPagination, ChatHistoryPagination
+from .renderers import EventStreamRenderer, ORJSONRenderer
+from . import analytics, availability, catalog, changes, geo, holds, intent, scheduling, slot_finder, stats, tasks
+from .exports import (
+    APPOINTMENT_EXPORT_COLUMNS, EXPORT_FORMATS, RECORD_EXPORT_COLUMNS,
+    appointment_export_rows, json_array_rows, record_export_rows, streaming_export,
+)
+from .idempotency import idempotent
+from .jobs import enqueue
+from .db_router import ReplicaReadMixin
+from .transitions import TransitionConflict, transition
+from .signals import appointment_created
+
+BULK_STATUS_ACTIONS = {'accept': 'Accepted', 'reject': 'Rejected', 'complete': 'Completed'}
+BULK_LIMIT = 200
+
+UNLINKED_DOCTOR_LIMIT = 20
+UNLINKED_DOCTOR_MAX_LIMIT = 50
+NEXT_AVAILABLE_MAX_DAYS = 31
+NEXT_AVAILABLE_MAX_LIMIT = 50
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 100
+NEARBY_MAX_LIMIT = 50
+SYNC_PAGE_SIZE = 500
+
+RESCHEDULE_ERROR_STATUS = {
+    'not_found': status.HTTP_404_NOT_FOUND,
+    'invalid': status.HTTP_400_BAD_REQUEST,
+    'conflict': status.HTTP_409_CONFLICT,
+}
+
+
+def wants_history(request):
+    """Archived appointments are only read when the client asks for ``?history=true``."""
+    return request.query_params.get('history', '').lower() in ('1', 'true', 'yes')
+
+
+def merged_keys(live, archived, *fields):
+    """UNION of ``(id, archived, *fields)`` rows of live and archived appointment querysets, to order and slice as one."""
+    return live.annotate(archived=models.Value(False)).values_list('id', 'archived', *fields).union(
+        archived.annotate(archived=models.Value(True)).values_list('id', 'archived', *fields), all=True
+    )
+
+
+def serialize_merged(keys, context=None):
+    """Serialized appointments for ``merged_keys`` rows, in their order."""
+    live = list(Appointment.objects.filter(
+        pk__in=[key[0] for key in keys if not key[1]]
+    ).select_related('doctor__specialization', 'slot'))
+    archived = list(ArchivedAppointment.objects.filter(
+        pk__in=[key[0] for key in keys if key[1]]
+    ).select_related('doctor__specialization'))
+    rows = {(False, row.id): data for row, data in zip(live, AppointmentSerializer(live, many=True, context=context).data)}
+    rows.update({
+        (True, row.id): data
+        for row, data in zip(archived, ArchivedAppointmentSerializer(archived, many=True, context=context).data)
+    })
+    return [rows[bool(key[1]), key[0]] for key in keys]
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def chat_events(user, message):
+    """Server-sent events for a chat answer, each sent as soon as its step is done."""
+    # Specializations come straight from the precompiled matcher, so the
+    # first event goes out before any database work happens.
+    specializations = intent.detect_specializations(message)
+    yield sse_event('specializations', specializations)
+    doctors = intent.recommend_doctors(specializations)
+    yield sse_event('doctors', doctors)
+    parts = []
+    for part in intent.compose_response_parts(message, specializations, doctors):
+        parts.append(part)
+        yield sse_event('token', part)
+    chat = ChatMessage.objects.create(user=user, message=message, response=''.join(parts))
+    yield sse_event('done', ChatMessageSerializer(chat).data)
+
+
+async def achat_events(user, message):
+    """``chat_events`` for ASGI: the stream waits on the database without holding a thread."""
+    specializations = intent.detect_specializations(message)
+    yield sse_event('specializations', specializations)
+    doctors = await sync_to_async(intent.recommend_doctors)(specializations)
+    yield sse_event('doctors', doctors)
+    parts = []
+    for part in intent.compose_response_parts(message, specializations, doctors):
+        parts.append(part)
+        yield sse_event('token', part)
+    chat = await ChatMessage.objects.acreate(user=user, message=message, response=''.join(parts))
+    yield sse_event('done', ChatMessageSerializer(chat).data)
+
+
+def profile_payload(user, profile):
+    return {
+        'username': user.username,
+        'name': user.first_name or user.username,
+        'email': user.email or f"{user.username.lower()}@healthsync.io",
+        'mobile': profile.mobile or "Not Configured",
+        'location': profile.location or 'New Delhi, Sector 24, IN',
+        'age': profile.age,
+        'gender': profile.gender,
+        'profile_photo': profile.profile_photo if profile.profile_photo else f'https://ui-avatars.com/api/?name={user.first_name or user.username}&background=46C2DE&color=fff',
+        'role': 'doctor' if profile.is_doctor else 'patient',
+        'doctor_id': profile.doctor_id,
+    }
+
+
+class MedicalRecordViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = MedicalRecordSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -41,7 +164,15 @@ class MedicalRecordViewSet(viewsets.ModelViewSet):
         profile = self.request.user.profile
         serializer.save(doctor=profile.doctor)
 
-class PatientListView(viewsets.ViewSet):
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream record metadata (no file contents) as ``?output=csv`` or ``ndjson``."""
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'output must be csv or ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+        return streaming_export(RECORD_EXPORT_COLUMNS, record_export_rows(self.get_queryset()), output, 'medical-records')
+
+class PatientListView(ReplicaReadMixin, viewsets.ViewSet):
     """Returns a list of unique patients who have appointments with the logged-in doctor."""
     permission_classes = [permissions.IsAuthenticated]
 
@@ -63,15 +194,20 @@ class PatientListView(viewsets.ViewSet):
         
         return Response(list(patients.values()))
 
-class SpecializationViewSet(viewsets.ReadOnlyModelViewSet):
+class SpecializationViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Specialization.objects.all()
     serializer_class = SpecializationSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'catalog'
+
+    def list(self, request, *args, **kwargs):
+        return Response(catalog.specializations())
 
-class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
+class DoctorViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Doctor.objects.all()
     serializer_class = DoctorSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'catalog'
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -81,28 +217,160 @@ class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
         data = serializer.data
         
         if date_str:
-            # Get IDs of slots already booked for this doctor on this specific date
-            booked_slot_ids = Appointment.objects.filter(
-                doctor=instance,
-                appointment_date=date_str,
-                status__in=['Upcoming', 'Accepted', 'Booked']
-            ).values_list('slot_id', flat=True)
-            
-            # Update the slots in the serialized data to reflect actual availability for THIS date
-            for slot in data.get('slots', []):
-                if slot['id'] in booked_slot_ids:
-                    slot['is_booked'] = True
-                else:
-                    slot['is_booked'] = False
+            # Get IDs of slots already booked (or held by someone else) for this doctor on this specific date
+            user_id = request.user.pk if request.user.is_authenticated else None
+            held = holds.held_slot_ids(instance.id, date_str, [slot['id'] for slot in data['slots']], user_id)
+            availability.mark_availability(data, availability.booked_slot_ids(instance.id, date_str), held)
                     
         return Response(data)
 
+    @action(detail=False, methods=['get'])
+    def next_available(self, request):
+        """Earliest free slots for ``?specialization=`` between ``?from=`` and ``?to=`` (default: the coming week)."""
+        specialization_id = request.query_params.get('specialization', '')
+        if not specialization_id.isdigit():
+            return Response({'error': 'specialization is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        start = parse_date(request.query_params.get('from', '')) or timezone.localdate()
+        end = parse_date(request.query_params.get('to', '')) or start + timedelta(days=6)
+        if end < start or (end - start).days >= NEXT_AVAILABLE_MAX_DAYS:
+            return Response({'error': f'to must be within {NEXT_AVAILABLE_MAX_DAYS} days after from.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), NEXT_AVAILABLE_MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else 10
+
+        data = []
+        user_id = request.user.pk if request.user.is_authenticated else None
+        for date, slot_time, doctor_id, slot_id in slot_finder.find_free_slots(int(specialization_id), start, end, limit, user_id):
+            card = catalog.doctor_card(doctor_id) or {}
+            data.append({
+                'doctor': doctor_id,
+                'doctor_name': card.get('name'),
+                'specialization_name': card.get('specialization_name'),
+                'doctor_image_url': card.get('image_url'),
+                'appointment_date': str(date),
+                'slot': slot_id,
+                'slot_time': slot_time,
+            })
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Available doctors within ``?radius=`` km of ``?lat=``/``?lon=``, nearest first.
+
+        ``?specialization=`` narrows by specialization and ``?date=`` to doctors
+        with a free slot that day.
+        """
+        params = request.query_params
+        try:
+            latitude, longitude = float(params['lat']), float(params['lon'])
+            radius = float(params.get('radius', NEARBY_DEFAULT_RADIUS_KM))
+        except (KeyError, ValueError):
+            return Response({'error': 'lat and lon are required numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response({'error': 'lat or lon is out of range.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < radius <= NEARBY_MAX_RADIUS_KM:
+            return Response({'error': f'radius must be between 0 and {NEARBY_MAX_RADIUS_KM} km.'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = params.get('limit', '')
+        limit = min(int(limit), NEARBY_MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else 20
+        date = parse_date(params.get('date', ''))
+
+        doctors = Doctor.objects.filter(is_available=True)
+        specialization_id = params.get('specialization', '')
+        if specialization_id.isdigit():
+            doctors = doctors.filter(specialization_id=int(specialization_id))
+
+        found = []
+        candidates = geo.nearby(doctors, latitude, longitude, radius)
+        # Check free slots a batch at a time, nearest first, until the page is full
+        for start in range(0, len(candidates), 500):
+            batch = candidates[start:start + 500]
+            if date:
+                free = availability.doctors_with_free_slots([pk for _, pk in batch], date)
+                batch = [(distance, pk) for distance, pk in batch if pk in free]
+            found.extend(batch)
+            if len(found) >= limit:
+                break
+        found = found[:limit]
+
+        distances = {pk: distance for distance, pk in found}
+        page = Doctor.objects.filter(id__in=distances).select_related('specialization').prefetch_related('slots')
+        data = self.get_serializer(sorted(page, key=lambda doctor: distances[doctor.id]), many=True).data
+        for doctor in data:
+            doctor['distance_km'] = round(distances[doctor['id']], 2)
+        return Response(data)
+
 class AppointmentViewSet(viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
-    
+    pagination_class = BookingHistoryPagination
+
     def get_queryset(self):
         return Appointment.objects.filter(user=self.request.user)
 
+    # Today onwards soonest first, then past visits most recent first
+    history_ordering = ('is_past', 'upcoming_date', '-appointment_date', '-id')
+
+    def filter_history(self, queryset):
+        """Apply ``?status=`` (comma separated), ``?from=`` and ``?to=`` (appointment dates) and annotate the sort keys.
+
+        Works on ``Appointment`` and ``ArchivedAppointment`` querysets alike.
+        """
+        params = self.request.query_params
+        statuses = [s for s in params.get('status', '').split(',') if s]
+        if statuses:
+            queryset = queryset.filter(status__in=statuses)
+        date_from = parse_date(params.get('from', ''))
+        date_to = parse_date(params.get('to', ''))
+        if date_from:
+            queryset = queryset.filter(appointment_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(appointment_date__lte=date_to)
+
+        today = timezone.localdate()
+        return queryset.annotate(
+            is_past=models.Case(
+                models.When(appointment_date__lt=today, then=models.Value(1)),
+                default=models.Value(0),
+            ),
+            upcoming_date=models.Case(models.When(appointment_date__gte=today, then='appointment_date')),
+        )
+
+    def paginate_queryset(self, queryset):
+        # Opt-in so existing clients keep receiving a plain list
+        if 'page' not in self.request.query_params:
+            return None
+        return super().paginate_queryset(queryset)
+
+    def get_throttles(self):
+        if self.action == 'create':
+            self.throttle_scope = 'booking'
+        return super().get_throttles()
+
+    def list(self, request, *args, **kwargs):
+        if wants_history(request):
+            return self.list_with_archive(request)
+        queryset = self.filter_history(self.get_queryset()).select_related(
+            'doctor__specialization', 'slot'
+        ).order_by(*self.history_ordering)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    def list_with_archive(self, request):
+        """Live and archived appointments as one list, sorted (and paginated) together by a SQL UNION."""
+        keys = merged_keys(
+            self.filter_history(self.get_queryset()),
+            self.filter_history(ArchivedAppointment.objects.filter(user=request.user)),
+            'is_past', 'upcoming_date', 'appointment_date',
+        ).order_by(*self.history_ordering)
+        page = self.paginate_queryset(keys)
+        keys = list(keys) if page is None else page
+
+        data = serialize_merged(keys, self.get_serializer_context())
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -116,7 +384,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         active_appointment = Appointment.objects.filter(
             user=user, 
             doctor=doctor, 
-            status__in=['Upcoming', 'Accepted', 'Booked']
+            status__in=ACTIVE_STATUSES
         ).first()
         
         if active_appointment:
@@ -125,48 +393,148 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if Appointment.objects.filter(doctor=doctor, slot=slot, appointment_date=appointment_date).exists():
+        if Appointment.objects.filter(doctor=doctor, slot=slot, appointment_date=appointment_date, status__in=ACTIVE_STATUSES).exists():
             return Response(
-                {"error": "This time slot is already booked for this date."},
+                {"error": "This time slot is already booked for this date.", "waitlist_available": True},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        # Take (or keep) the hold ourselves rather than checking for others': placing is
+        # atomic, so no one can grab the slot between this check and the insert
+        if holds.place(doctor.id, slot.id, appointment_date, user.id) is None:
+            return Response(
+                {"error": "Someone else is booking this time slot right now. Please pick another one."},
+                status=status.HTTP_409_CONFLICT
+            )
 
-        self.perform_create(serializer)
+        try:
+            with transaction.atomic():
+                scheduling.ensure_free(doctor.id, [(appointment_date, slot.id)])
+                self.perform_create(serializer)
+                holds.consume_on_commit(serializer.instance)
+                appointment_created.send(sender=Appointment, appointment=serializer.instance)
+                tasks.appointment_changed(
+                    serializer.instance, 'appointment_created', user,
+                    notify='doctor', message=f"New appointment request from {serializer.instance.patient_name} for {appointment_date}."
+                )
+        except IntegrityError:
+            # Lost the race for the slot to a concurrent booking (unique_active_booking)
+            holds.release(doctor.id, slot.id, appointment_date, user.id)
+            return Response(
+                {"error": "This time slot is already booked for this date."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def make_payment(self, request, pk=None):
         appointment = self.get_object()
         if appointment.status != 'Accepted':
             return Response({'error': 'Only approved appointments can be paid for.'}, status=status.HTTP_400_BAD_REQUEST)
         
-        appointment.status = 'Booked'
-        appointment.save()
-        return Response({'message': 'Payment successful. Your appointment is now Booked.', 'status': 'Booked'})
+        with transaction.atomic():
+            try:
+                transition(appointment, 'Booked', request.user)
+            except TransitionConflict as e:
+                return Response({'error': str(e), 'status': e.current}, status=status.HTTP_409_CONFLICT)
+            payment = Payment.objects.create(
+                appointment=appointment, user=request.user,
+                amount=Decimal(settings.CONSULTATION_FEE), currency=settings.PAYMENT_CURRENCY,
+                idempotency_key=request.headers.get('Idempotency-Key', ''),
+            )
+            tasks.appointment_changed(
+                appointment, 'payment_received', request.user,
+                notify='doctor', message=f"Payment received for {appointment.patient_name} on {appointment.appointment_date}."
+            )
+        return Response({
+            'message': 'Payment successful. Your appointment is now Booked.', 'status': 'Booked',
+            'payment': {'id': payment.id, 'amount': str(payment.amount), 'currency': payment.currency},
+        })
+
+    def update(self, request, *args, **kwargs):
+        new_status = request.data.get('status')
+        if new_status is None:
+            return self.update_details(request, partial=kwargs.get('partial', False))
+        if new_status != 'Canceled':
+            return Response({'error': 'Patients can only cancel appointments.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        appointment = self.get_object()
+        with transaction.atomic():
+            try:
+                transition(appointment, 'Canceled', request.user)
+            except TransitionConflict as e:
+                return Response({'error': str(e), 'status': e.current}, status=status.HTTP_409_CONFLICT)
+            tasks.appointment_changed(
+                appointment, 'appointment_canceled', request.user,
+                notify='doctor', message=f"{appointment.patient_name} canceled the appointment on {appointment.appointment_date}."
+            )
+        return Response(self.get_serializer(appointment).data)
+
+    def update_details(self, request, partial):
+        """Edit the patient details; a new date or slot goes through ``scheduling`` like a doctor's reschedule."""
+        appointment = self.get_object()
+        serializer = self.get_serializer(appointment, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        doctor = data.pop('doctor', appointment.doctor)
+        if doctor.id != appointment.doctor_id:
+            return Response({'error': 'To see another doctor, cancel this appointment and book again.'}, status=status.HTTP_400_BAD_REQUEST)
+        new_date = data.pop('appointment_date', appointment.appointment_date)
+        new_slot = data.pop('slot', appointment.slot)
+
+        with transaction.atomic():
+            if (new_date, new_slot.id) != (appointment.appointment_date, appointment.slot_id):
+                result = scheduling.bulk_reschedule(appointment.doctor, [{
+                    'id': appointment.id, 'appointment_date': str(new_date), 'slot': new_slot.id,
+                }], request.user, notify='doctor')[0]
+                if not result['ok']:
+                    return Response({'error': result['error']}, status=RESCHEDULE_ERROR_STATUS[result['code']])
+                appointment.refresh_from_db()
+            if data:
+                serializer.save()
+        return Response(self.get_serializer(appointment).data)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
-class ChatBotViewSet(viewsets.ModelViewSet):
+class ChatBotViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = ChatMessageSerializer
+    pagination_class = ChatHistoryPagination
     
     def get_queryset(self):
         return ChatMessage.objects.filter(user=self.request.user)
 
     def create(self, request, *args, **kwargs):
         message = request.data.get('message')
-        response_text = f"I understand you're asking about '{message}'. As a virtual assistant, I recommend booking an appointment with one of our specialists for a detailed diagnosis."
-        if 'headache' in message.lower():
-            response_text = "For headaches, it's best to consult a General Physician or a Neurologist. Ensure you're staying hydrated."
-        
+        if not message:
+            return Response({'error': 'Message is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        answer = intent.reply(message)
         chat = ChatMessage.objects.create(
             user=request.user,
             message=message,
-            response=response_text
+            response=answer['response']
         )
         serializer = self.get_serializer(chat)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        data = dict(serializer.data, specializations=answer['specializations'], doctors=answer['doctors'])
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'], renderer_classes=[ORJSONRenderer, EventStreamRenderer])
+    def stream(self, request):
+        """Same answer as ``create``, delivered as server-sent events while it is produced."""
+        message = request.data.get('message')
+        if not message:
+            return Response({'error': 'Message is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(request._request, ASGIRequest):
+            events = achat_events(request.user, message)
+        else:
+            events = chat_events(request.user, message)
+        response = StreamingHttpResponse(events, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
 class RegisterView(viewsets.ViewSet):
     permission_classes = [permissions.AllowAny]
@@ -254,17 +622,31 @@ class DoctorRegisterView(viewsets.ViewSet):
 
 
 class UnlinkedDoctorsView(viewsets.ViewSet):
-    """List Doctor records that do not yet have a user account — for the signup dropdown."""
+    """Typeahead over Doctor records that do not yet have a user account — for doctor signup.
+
+    ``?q=`` matches the start of the name, case-insensitively, through the
+    ``doctor_name_lower_idx`` index; at most ``?limit=`` (default 20) results.
+    """
     permission_classes = [permissions.AllowAny]
 
     def list(self, request):
+        prefix = request.query_params.get('q', '').strip().lower()
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), UNLINKED_DOCTOR_MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else UNLINKED_DOCTOR_LIMIT
+
         # Doctors that have no related user_profile
-        unlinked = Doctor.objects.filter(user_profile__isnull=True)
+        unlinked = Doctor.objects.filter(user_profile__isnull=True).annotate(name_lower=Lower('name'))
+        if prefix:
+            # The range lets the index seek straight to the prefix; startswith keeps it exact
+            unlinked = unlinked.filter(
+                name_lower__gte=prefix, name_lower__lt=prefix + '\uffff', name_lower__startswith=prefix
+            )
+        unlinked = unlinked.order_by('name_lower', 'id').values('id', 'name', 'specialization__name', 'location')[:limit]
         data = [{
-            'id': d.id,
-            'name': d.name,
-            'specialization': d.specialization.name,
-            'location': d.location,
+            'id': d['id'],
+            'name': d['name'],
+            'specialization': d['specialization__name'],
+            'location': d['location'],
         } for d in unlinked]
         return Response(data)
 
@@ -277,7 +659,6 @@ class DoctorProfileView(viewsets.ViewSet):
         profile = getattr(request.user, 'profile', None)
         if not profile or not profile.is_doctor or not profile.doctor:
             return Response({'error': 'Not a doctor account.'}, status=status.HTTP_403_FORBIDDEN)
-        from .serializers import DoctorSerializer
         serializer = DoctorSerializer(profile.doctor)
         return Response(serializer.data)
 
@@ -294,6 +675,18 @@ class DoctorProfileView(viewsets.ViewSet):
             if val is not None:
                 setattr(doctor, field, val)
         
+        # Explicit coordinates win; a new location without them is geocoded again on save
+        if 'latitude' in request.data or 'longitude' in request.data:
+            try:
+                latitude, longitude = float(request.data['latitude']), float(request.data['longitude'])
+            except (KeyError, TypeError, ValueError):
+                return Response({'error': 'latitude and longitude must be sent together as numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+            if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+                return Response({'error': 'latitude or longitude is out of range.'}, status=status.HTTP_400_BAD_REQUEST)
+            doctor.latitude, doctor.longitude = latitude, longitude
+        elif request.data.get('location') is not None:
+            doctor.latitude = doctor.longitude = None
+
         # Sync name to user first_name if updated
         if 'name' in request.data:
             user = request.user
@@ -304,7 +697,6 @@ class DoctorProfileView(viewsets.ViewSet):
         spec_id = request.data.get('specialization')
         if spec_id:
             try:
-                from .models import Specialization
                 spec = Specialization.objects.get(id=spec_id)
                 doctor.specialization = spec
             except Specialization.DoesNotExist:
@@ -312,7 +704,6 @@ class DoctorProfileView(viewsets.ViewSet):
 
         doctor.save()
 
-        from .serializers import DoctorSerializer
         return Response(DoctorSerializer(doctor).data)
 
 
@@ -325,42 +716,84 @@ class DoctorAppointmentView(viewsets.ViewSet):
         if not profile or not profile.is_doctor or not profile.doctor:
             return Response({'error': 'Access denied. Not a doctor account.'}, status=status.HTTP_403_FORBIDDEN)
 
-        appointments = Appointment.objects.filter(doctor=profile.doctor).order_by('-created_at')
-        serializer = AppointmentSerializer(appointments, many=True)
-        return Response(serializer.data)
+        appointments = Appointment.objects.filter(doctor=profile.doctor)
+        if wants_history(request):
+            appointments = merged_keys(
+                appointments, ArchivedAppointment.objects.filter(doctor=profile.doctor), 'created_at'
+            )
+        appointments = appointments.order_by('-created_at', '-id')
+        limit = request.query_params.get('limit')
+        if limit and limit.isdigit():
+            appointments = appointments[:int(limit)]
+        if wants_history(request):
+            data = serialize_merged(list(appointments))
+        else:
+            data = AppointmentSerializer(appointments, many=True).data
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream the doctor's full appointment list as ``?output=csv`` or ``ndjson`` (``?history=true`` adds archived ones)."""
+        profile = getattr(request.user, 'profile', None)
+        if not profile or not profile.is_doctor or not profile.doctor:
+            return Response({'error': 'Access denied. Not a doctor account.'}, status=status.HTTP_403_FORBIDDEN)
+        output = request.query_params.get('output', 'csv')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'output must be csv or ndjson.'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = appointment_export_rows(profile.doctor, wants_history(request))
+        return streaming_export(APPOINTMENT_EXPORT_COLUMNS, rows, output, 'appointments')
 
     def partial_update(self, request, pk=None):
         profile = getattr(request.user, 'profile', None)
         if not profile or not profile.is_doctor or not profile.doctor:
             return Response({'error': 'Access denied.'}, status=status.HTTP_403_FORBIDDEN)
 
-        try:
-            appointment = Appointment.objects.get(pk=pk, doctor=profile.doctor)
-        except Appointment.DoesNotExist:
-            return Response({'error': 'Appointment not found.'}, status=status.HTTP_404_NOT_FOUND)
-
         # Allow updating date, problem, and slot
         new_date = request.data.get('appointment_date')
         new_problem = request.data.get('problem')
         new_slot_id = request.data.get('slot')
 
-        if new_date:
-            appointment.appointment_date = new_date
-        if new_problem:
-            appointment.problem = new_problem
-        
-        if new_slot_id:
-            try:
-                from .models import Slot
-                new_slot = Slot.objects.get(id=new_slot_id, doctor=profile.doctor)
-                appointment.slot = new_slot
-            except Slot.DoesNotExist:
-                return Response({'error': 'Invalid slot.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        appointment.save()
+        with transaction.atomic():
+            if new_date or new_slot_id:
+                result = scheduling.bulk_reschedule(profile.doctor, [{
+                    'id': pk, 'appointment_date': new_date, 'slot': new_slot_id,
+                }], request.user)[0]
+                if not result['ok']:
+                    return Response({'error': result['error']}, status=RESCHEDULE_ERROR_STATUS[result['code']])
+            if new_problem:
+                if Appointment.objects.filter(pk=pk, doctor=profile.doctor).update(problem=new_problem):
+                    appointment = Appointment.objects.only('user', 'doctor').get(pk=pk)
+                    changes.record_appointment(appointment)
+
+        appointment = Appointment.objects.filter(pk=pk, doctor=profile.doctor).first()
+        if appointment is None:
+            return Response({'error': 'Appointment not found.'}, status=status.HTTP_404_NOT_FOUND)
         serializer = AppointmentSerializer(appointment)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'])
+    def reschedule_day(self, request):
+        """Move all of a day's active appointments to another day, keeping their slots.
+
+        Defaults to moving today's appointments to tomorrow.
+        """
+        profile = getattr(request.user, 'profile', None)
+        if not profile or not profile.is_doctor or not profile.doctor:
+            return Response({'error': 'Access denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        today = timezone.localdate()
+        from_date = parse_date(str(request.data.get('from_date') or today))
+        to_date = parse_date(str(request.data.get('to_date') or (from_date or today) + timedelta(days=1)))
+        if from_date is None or to_date is None:
+            return Response({'error': 'Dates must be in YYYY-MM-DD format.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        results = scheduling.reschedule_day(profile.doctor, from_date, to_date, request.user)
+        return Response({
+            'results': results,
+            'succeeded': sum(1 for r in results if r['ok']),
+            'failed': sum(1 for r in results if not r['ok']),
+        })
+
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         profile = getattr(request.user, 'profile', None)
@@ -377,12 +810,288 @@ class DoctorAppointmentView(viewsets.ViewSet):
         except Appointment.DoesNotExist:
             return Response({'error': 'Appointment not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        appointment.status = new_status
-        appointment.save()
+        with transaction.atomic():
+            try:
+                transition(appointment, new_status, request.user)
+            except TransitionConflict as e:
+                return Response({'error': str(e), 'status': e.current}, status=status.HTTP_409_CONFLICT)
+            tasks.appointment_changed(
+                appointment, 'status_changed', request.user,
+                notify='patient', message=f"Your appointment with {profile.doctor.name} on {appointment.appointment_date} is now {new_status}."
+            )
         serializer = AppointmentSerializer(appointment)
         return Response(serializer.data)
 
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Accept, reject, complete or reschedule many appointments in one request.
+
+        ``{"action": "accept" | "reject" | "complete", "ids": [...]}`` or
+        ``{"action": "reschedule", "items": [{"id", "appointment_date", "slot"}, ...]}``.
+        """
+        profile = getattr(request.user, 'profile', None)
+        if not profile or not profile.is_doctor or not profile.doctor:
+            return Response({'error': 'Access denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        bulk_action = request.data.get('action')
+        if bulk_action == 'reschedule':
+            serializer = BulkRescheduleSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response({'error': 'items must be a non-empty list of {id, appointment_date, slot}.'}, status=status.HTTP_400_BAD_REQUEST)
+            items = serializer.validated_data['items']
+            if len(items) > BULK_LIMIT:
+                return Response({'error': f'At most {BULK_LIMIT} appointments per request.'}, status=status.HTTP_400_BAD_REQUEST)
+            results = scheduling.bulk_reschedule(profile.doctor, items, request.user)
+        elif bulk_action in BULK_STATUS_ACTIONS:
+            serializer = BulkStatusSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response({'error': 'ids must be a non-empty list of appointment ids.'}, status=status.HTTP_400_BAD_REQUEST)
+            ids = serializer.validated_data['ids']
+            if len(ids) > BULK_LIMIT:
+                return Response({'error': f'At most {BULK_LIMIT} appointments per request.'}, status=status.HTTP_400_BAD_REQUEST)
+            results = scheduling.bulk_transition(profile.doctor, ids, BULK_STATUS_ACTIONS[bulk_action], request.user)
+        else:
+            valid = ['reschedule', *BULK_STATUS_ACTIONS]
+            return Response({'error': f'action must be one of: {valid}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'results': results,
+            'succeeded': sum(1 for r in results if r['ok']),
+            'failed': sum(1 for r in results if not r['ok']),
+        })
+
+
+class DoctorStatsView(viewsets.ViewSet):
+    """Dashboard totals for the logged-in doctor, read from the incrementally maintained counters."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        profile = getattr(request.user, 'profile', None)
+        if not profile or not profile.is_doctor or not profile.doctor:
+            return Response({'error': 'Access denied. Not a doctor account.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(stats.doctor_summary(profile.doctor_id))
+
+
+class WaitlistViewSet(viewsets.ModelViewSet):
+    """Patients join a doctor's waitlist for a day (optionally a specific slot) and are booked when a slot frees up."""
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'delete']
+
+    def get_queryset(self):
+        return WaitlistEntry.objects.filter(user=self.request.user).order_by('-created_at')
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data['appointment_date'] < timezone.localdate():
+            return Response({'error': 'Cannot join the waitlist for a past date.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            with transaction.atomic():
+                serializer.save(user=request.user)
+        except IntegrityError:
+            return Response({'error': 'You are already on the waitlist for this doctor and date.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def destroy(self, request, *args, **kwargs):
+        # Leaving keeps the row for history; only waiting entries can leave
+        updated = self.get_queryset().filter(pk=kwargs['pk'], status='Waiting').update(status='Canceled')
+        if not updated:
+            return Response({'error': 'No waiting entry found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SlotHoldView(viewsets.ViewSet):
+    """Hold a slot for a few minutes while the patient completes the booking form.
+
+    Holds are advisory: the booked check below can race a booking committing
+    elsewhere, and only the ``unique_active_booking`` constraint stops double
+    bookings. A hold just keeps a slot from being offered to others meanwhile.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'hold'
+
+    def _target(self, request):
+        doctor_id = str(request.data.get('doctor', ''))
+        slot_id = str(request.data.get('slot', ''))
+        date = parse_date(str(request.data.get('appointment_date', '')))
+        if not doctor_id.isdigit() or not slot_id.isdigit() or date is None:
+            return None
+        return int(doctor_id), int(slot_id), date
+
+    def create(self, request):
+        target = self._target(request)
+        if target is None:
+            return Response({'error': 'doctor, slot and appointment_date are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        doctor_id, slot_id, date = target
+        if date < timezone.localdate() or not Slot.objects.filter(pk=slot_id, doctor_id=doctor_id).exists():
+            return Response({'error': 'Invalid slot.'}, status=status.HTTP_400_BAD_REQUEST)
+        if availability.booked_slots_query(doctor_id, date).filter(slot_id=slot_id).exists():
+            return Response({'error': 'This time slot is already booked for this date.'}, status=status.HTTP_409_CONFLICT)
+
+        expires_at = holds.place(doctor_id, slot_id, date, request.user.id)
+        if expires_at is None:
+            return Response({'error': 'Someone else is booking this time slot right now.'}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'doctor': doctor_id, 'slot': slot_id, 'appointment_date': str(date), 'expires_at': expires_at,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        target = self._target(request)
+        if target is None:
+            return Response({'error': 'doctor, slot and appointment_date are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        holds.release(*target, request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SyncView(viewsets.ViewSet):
+    """Delta sync for offline-capable clients.
+
+    ``GET /sync/?since=<token>`` returns the caller's appointments, medical
+    records and (for doctors) slots created, updated or deleted since the
+    token, plus the token for the next call. Appointments moved to the archive
+    are listed under ``archived`` (fetch them with ``?history=true``).
+    Medical records carry metadata and a ``file_url`` instead of the file.
+
+    Without a token, or with one too old to serve, everything is sent with
+    ``reset: true`` in pages of ``SYNC_PAGE_SIZE`` rows: while ``has_more`` is
+    set, ask for ``?cursor=<cursor>`` to get the next page, then keep the
+    ``token`` (the same on every page of one reset).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _reset_page(self, request, collections, token, start_key=None, after_pk=0):
+        data = {'reset': True}
+        remaining = SYNC_PAGE_SIZE
+        cursor = None
+        for key, (_, queryset, serializer_class) in collections.items():
+            rows = []
+            if start_key:
+                if key != start_key:
+                    data[key] = {'created': [], 'updated': [], 'deleted': [], 'archived': []}
+                    continue  # Sent on an earlier page
+                start_key = None
+                after = after_pk
+            else:
+                after = 0
+            if cursor is None:
+                rows = list(queryset.filter(pk__gt=after).order_by('pk')[:remaining + 1])
+                if len(rows) > remaining:
+                    rows = rows[:remaining]
+                    cursor = f"{key}:{rows[-1].pk if rows else after}:{token}"
+                remaining -= len(rows)
+            created = serializer_class(rows, many=True, context={'request': request}).data
+            data[key] = {'created': created, 'updated': [], 'deleted': [], 'archived': []}
+        data.update(has_more=cursor is not None, cursor=cursor, token=token)
+        return Response(data)
+
+    def _collections(self, request, doctor_id):
+        """``{key: (change log model, queryset, serializer class)}`` visible to the caller."""
+        user = request.user
+        appointments = Q(user=user) | Q(doctor_id=doctor_id) if doctor_id else Q(user=user)
+        records = Q(patient=user) | Q(doctor_id=doctor_id) if doctor_id else Q(patient=user)
+        collections = {
+            'appointments': (
+                'appointment',
+                Appointment.objects.filter(appointments).select_related('doctor__specialization', 'slot'),
+                AppointmentSerializer,
+            ),
+            'medical_records': (
+                'medical_record',
+                MedicalRecord.objects.filter(records).select_related('doctor', 'patient').defer('file_data'),
+                MedicalRecordSyncSerializer,
+            ),
+        }
+        if doctor_id:
+            collections['slots'] = ('slot', Slot.objects.filter(doctor_id=doctor_id), SlotSerializer)
+        return collections
+
+    def list(self, request):
+        profile = getattr(request.user, 'profile', None)
+        doctor_id = profile.doctor_id if profile and profile.is_doctor else None
+        collections = self._collections(request, doctor_id)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                key, after_pk, token = cursor.split(':', 2)
+                if key not in collections or changes.parse_token(token) is None:
+                    raise ValueError(cursor)
+                after_pk = int(after_pk)
+            except ValueError:
+                return Response({'error': 'Invalid sync cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+            return self._reset_page(request, collections, token, key, after_pk)
+
+        since = request.query_params.get('since')
+        last_id = None
+        if since:
+            try:
+                last_id = changes.parse_token(since)
+            except changes.InvalidToken:
+                return Response({'error': 'Invalid sync token.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if last_id is None:
+            # Token first, so writes landing while the snapshot is read are sent again next time
+            return self._reset_page(request, collections, changes.make_token(changes.latest_settled_id()))
+
+        changed, next_id, has_more = changes.changes_since(request.user, doctor_id, last_id, SYNC_PAGE_SIZE)
+        data = {'reset': False, 'has_more': has_more, 'token': changes.make_token(next_id)}
+        for key, (model, queryset, serializer_class) in collections.items():
+            actions = changed.get(model, {})
+            upserted = {obj.pk: obj for obj in queryset.filter(id__in=actions.get('created', []) + actions.get('updated', []))}
+            data[key] = {
+                action: serializer_class(
+                    [upserted[pk] for pk in actions.get(action, []) if pk in upserted], many=True, context={'request': request}
+                ).data
+                for action in ('created', 'updated')
+            }
+            # Gone since, or no longer visible to the caller
+            data[key]['deleted'] = actions.get('deleted', []) + [
+                pk for action in ('created', 'updated') for pk in actions.get(action, []) if pk not in upserted
+            ]
+            data[key]['archived'] = actions.get('archived', [])
+        return Response(data)
+
+
+class AppointmentRollupView(viewsets.ViewSet):
+    """Pre-aggregated booking volume for the ops team (``rollup_appointments`` keeps it current)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def _rows(self, request):
+        granularity = request.query_params.get('granularity', 'day')
+        if granularity not in analytics.TRUNCATE:
+            return None
+        since = request.query_params.get('since')
+        until = request.query_params.get('until')
+        return analytics.rollup_rows(
+            granularity,
+            parse_datetime(since) if since else None,
+            parse_datetime(until) if until else None,
+        )
+
+    def list(self, request):
+        rows = self._rows(request)
+        if rows is None:
+            return Response({'error': 'granularity must be hour or day.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Streamed: a year of hourly rows per doctor is too big to build as one response
+        return StreamingHttpResponse(json_array_rows(analytics.EXPORT_COLUMNS, rows), content_type='application/json')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream rollups as an Arrow IPC stream (``?output=arrow``, needs pyarrow) or CSV."""
+        rows = self._rows(request)
+        if rows is None:
+            return Response({'error': 'granularity must be hour or day.'}, status=status.HTTP_400_BAD_REQUEST)
+        if request.query_params.get('output') == 'arrow':
+            if not analytics.HAS_PYARROW:
+                return Response({'error': 'Arrow export is not available on this server.'}, status=status.HTTP_400_BAD_REQUEST)
+            response = StreamingHttpResponse(analytics.arrow_stream(rows), content_type='application/vnd.apache.arrow.stream')
+            response['Content-Disposition'] = 'attachment; filename="appointment-rollups.arrows"'
+            return response
+        return streaming_export(analytics.EXPORT_COLUMNS, rows, 'csv', 'appointment-rollups')
+
+
 class DoctorSlotViewSet(viewsets.ModelViewSet):
     """Doctors manage their own time slots."""
     serializer_class = SlotSerializer
@@ -395,7 +1104,6 @@ class DoctorSlotViewSet(viewsets.ModelViewSet):
         return Slot.objects.filter(doctor=profile.doctor)
 
     def perform_create(self, serializer):
-        from rest_framework.exceptions import PermissionDenied, ValidationError
         profile = getattr(self.request.user, 'profile', None)
         if not profile or not profile.is_doctor or not profile.doctor:
             raise PermissionDenied("Only doctors can create slots.")
@@ -430,6 +1138,7 @@ class DoctorSlotViewSet(viewsets.ModelViewSet):
 
 class OTPViewSet(viewsets.ViewSet):
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'otp'
 
     @action(detail=False, methods=['post'])
     def send_otp(self, request):
@@ -438,8 +1147,9 @@ class OTPViewSet(viewsets.ViewSet):
             return Response({'error': 'Mobile number is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         otp_code = str(random.randint(1000, 9999))
-        OTP.objects.update_or_create(mobile=mobile, defaults={'code': otp_code})
-        print(f"OTP for {mobile}: {otp_code}")
+        with transaction.atomic():
+            OTP.objects.update_or_create(mobile=mobile, defaults={'code': otp_code})
+            enqueue('send_otp', {'mobile': mobile, 'code': otp_code})
         
         return Response({'message': 'OTP sent successfully', 'otp': otp_code}, status=status.HTTP_200_OK)
 
@@ -535,18 +1245,7 @@ class ProfileView(viewsets.ViewSet):
         user = request.user
         profile, created = UserProfile.objects.get_or_create(user=user)
         
-        return Response({
-            'username': user.username,
-            'name': user.first_name or user.username,
-            'email': user.email or f"{user.username.lower()}@healthsync.io",
-            'mobile': profile.mobile or "Not Configured",
-            'location': profile.location or 'New Delhi, Sector 24, IN',
-            'age': profile.age,
-            'gender': profile.gender,
-            'profile_photo': profile.profile_photo if profile.profile_photo else f'https://ui-avatars.com/api/?name={user.first_name or user.username}&background=46C2DE&color=fff',
-            'role': 'doctor' if profile.is_doctor else 'patient',
-            'doctor_id': profile.doctor.id if profile.doctor else None,
-        })
+        return Response(profile_payload(user, profile))
 
     @action(detail=False, methods=['post', 'put', 'patch'])
     def update_profile(self, request):
@@ -0,0 +1,97 @@
+"""Per-doctor, per-day waitlist with automatic promotion.
+
+When an active appointment becomes ``Canceled`` or ``Rejected`` a
+``promote_waitlist`` job is queued in the same transaction, so the status
+change itself does no extra work. The job takes the head of the queue (the
+oldest waiting entry for that day, for that slot or any slot) with one seek
+on ``waitlist_queue_idx``, flips it to ``Promoted`` with a conditional UPDATE
+and books the freed slot for it. The conditional UPDATE and the
+``unique_active_booking`` constraint together make sure an entry is promoted
+at most once and a slot is never handed out twice, even with several workers
+running the job concurrently. A slot someone else is holding at checkout is
+left to them; the job runs again once the hold could have expired.
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import holds, scheduling, tasks
+from .jobs import enqueue, register
+from .models import ACTIVE_STATUSES, Appointment, WaitlistEntry
+from .signals import appointment_created, appointment_transitioned
+
+FREEING_STATUSES = ['Canceled', 'Rejected']
+
+
+def queue_for(doctor_id, date, slot_id):
+    """Waiting entries that can take ``slot_id`` on ``date``, head first."""
+    return WaitlistEntry.objects.filter(
+        Q(slot_id=slot_id) | Q(slot__isnull=True),
+        doctor_id=doctor_id, appointment_date=date, status='Waiting',
+    ).order_by('created_at', 'id')
+
+
+def position(entry):
+    """1-based place of ``entry`` among the waiters ``promote`` would consider before it."""
+    return queue_for(entry.doctor_id, entry.appointment_date, entry.slot_id).filter(
+        Q(created_at__lt=entry.created_at) | Q(created_at=entry.created_at, id__lt=entry.id)
+    ).count() + 1
+
+
+def _claim(entry):
+    return WaitlistEntry.objects.filter(pk=entry.pk, status='Waiting').update(status='Promoted') == 1
+
+
+@register('promote_waitlist')
+def promote(doctor_id, date, slot_id):
+    """Book the freed slot for the first waiter who can take it. Returns the appointment or ``None``."""
+    if parse_date(str(date)) < timezone.localdate():
+        # The day is over; nobody can be booked into it any more
+        WaitlistEntry.objects.filter(
+            doctor_id=doctor_id, appointment_date__lt=timezone.localdate(), status='Waiting',
+        ).update(status='Expired')
+        return None
+    for entry in queue_for(doctor_id, date, slot_id).select_related('doctor', 'user')[:20]:
+        if Appointment.objects.filter(user_id=entry.user_id, doctor_id=doctor_id, status__in=ACTIVE_STATUSES).exists():
+            # Already booked with this doctor some other way
+            WaitlistEntry.objects.filter(pk=entry.pk, status='Waiting').update(status='Skipped')
+            continue
+        if holds.held_slot_ids(doctor_id, date, [slot_id], exclude_user_id=entry.user_id):
+            # Someone is checking out this slot; try again once their hold has run out
+            enqueue('promote_waitlist', {'doctor_id': doctor_id, 'date': str(date), 'slot_id': slot_id},
+                    delay=settings.SLOT_HOLD_SECONDS)
+            return None
+        try:
+            with transaction.atomic():
+                if not _claim(entry):
+                    continue  # Promoted or canceled concurrently
+                scheduling.ensure_free(doctor_id, [(date, slot_id)])
+                appointment = Appointment.objects.create(
+                    user_id=entry.user_id, doctor_id=doctor_id, slot_id=slot_id, appointment_date=date,
+                    patient_name=entry.patient_name, patient_age=entry.patient_age,
+                    patient_gender=entry.patient_gender, problem=entry.problem,
+                )
+                WaitlistEntry.objects.filter(pk=entry.pk).update(appointment=appointment)
+                appointment_created.send(sender=Appointment, appointment=appointment)
+                tasks.appointment_changed(
+                    appointment, 'waitlist_promoted', entry.user, notify='patient',
+                    message=f"A slot opened up: you are booked with {entry.doctor.name} on {date}.",
+                )
+        except IntegrityError:
+            # Someone booked the slot first; the entry keeps its place
+            return None
+        return appointment
+    return None
+
+
+@receiver(appointment_transitioned)
+def on_transitioned(sender, appointment, from_status, to_status, **kwargs):
+    if to_status in FREEING_STATUSES and from_status in ACTIVE_STATUSES:
+        enqueue('promote_waitlist', {
+            'doctor_id': appointment.doctor_id,
+            'date': str(appointment.appointment_date),
+            'slot_id': appointment.slot_id,
+        }, key=f"waitlist:{appointment.pk}:{to_status}")
@@ -0,0 +1,112 @@
+"""Compare concurrent-connection throughput of the sync (WSGI) and async (ASGI) read paths.
+
+Start the two stacks side by side, then point this script at them:
+
+    gunicorn core.wsgi:application -w 4 -b 127.0.0.1:8000
+    gunicorn core.asgi:application -w 4 -k uvicorn_worker.UvicornWorker -b 127.0.0.1:8001
+    python bench_asgi.py --sync http://127.0.0.1:8000 --async http://127.0.0.1:8001 -c 200
+
+Pass --token <access token> to include the authenticated profile/chat endpoints.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+# (sync path, async path, needs auth)
+ENDPOINTS = [
+    ('/api/doctors/', '/api/async/doctors/', False),
+    ('/api/doctors/{doctor_id}/?date={date}', '/api/async/doctors/{doctor_id}/?date={date}', False),
+    ('/api/profile/', '/api/async/profile/', True),
+    ('/api/chat/', '/api/async/chat/', True),
+]
+
+
+async def _request(reader, writer, host, path, token):
+    headers = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+    if token:
+        headers += f"Authorization: Bearer {token}\r\n"
+    writer.write((headers + "\r\n").encode())
+    await writer.drain()
+
+    status_line = await reader.readline()
+    length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value.strip())
+        elif name.lower() == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+    if chunked:
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def _client(base, path, token, deadline, latencies, errors):
+    parts = urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            code = await _request(reader, writer, parts.netloc, path, token)
+            latencies.append(time.perf_counter() - start)
+            if code >= 400:
+                errors.append(code)
+    except (ConnectionError, asyncio.IncompleteReadError):
+        errors.append("disconnect")
+    finally:
+        writer.close()
+
+
+async def run(base, path, token, connections, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        _client(base, path, token, deadline, latencies, errors) for _ in range(connections)
+    ])
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    return {
+        'rps': len(latencies) / duration,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p99_ms': p99 * 1000,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sync', default='http://127.0.0.1:8000', help='Base URL of the WSGI stack')
+    parser.add_argument('--async', dest='async_', default='http://127.0.0.1:8001', help='Base URL of the ASGI stack')
+    parser.add_argument('-c', '--connections', type=int, default=100)
+    parser.add_argument('-d', '--duration', type=float, default=10.0)
+    parser.add_argument('--token', help='JWT access token for authenticated endpoints')
+    parser.add_argument('--doctor-id', type=int, default=1)
+    parser.add_argument('--date', default=time.strftime('%Y-%m-%d'))
+    args = parser.parse_args()
+
+    print(f"{'endpoint':45} {'stack':6} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for sync_path, async_path, needs_auth in ENDPOINTS:
+        if needs_auth and not args.token:
+            continue
+        for label, base, path in (('sync', args.sync, sync_path), ('async', args.async_, async_path)):
+            path = path.format(doctor_id=args.doctor_id, date=args.date)
+            result = asyncio.run(run(base, path, args.token, args.connections, args.duration))
+            print(f"{sync_path:45} {label:6} {result['rps']:9.1f} {result['p50_ms']:8.1f} "
+                  f"{result['p99_ms']:8.1f} {result['errors']:7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Measure per-request database connection overhead for the active DB profile.
+
+Each simulated request fires Django's request_started/request_finished
+signals around a single query, exactly like a real request, so connection
+reuse (CONN_MAX_AGE), health checks and pooling behave as in production.
+The same loop is run with connections closed after every request to show
+the setup cost the profile removes.
+
+    DB_PROFILE=persistent DATABASE_URL=postgres://... python bench_db.py
+    DB_PROFILE=pooled DATABASE_URL=postgres://... python bench_db.py
+    DB_PROFILE=sqlite-wal python bench_db.py
+"""
+import os
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from django.core import signals
+from django.db import connection
+
+
+def simulate_requests(count):
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        signals.request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        signals.request_finished.send(sender=None)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{label:32} mean {statistics.mean(timings) * 1000:7.3f} ms   "
+          f"p50 {statistics.median(timings) * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms")
+    return statistics.mean(timings)
+
+
+def main(count=500):
+    db = settings.DATABASES['default']
+    print(f"profile={settings.DB_PROFILE} engine={db['ENGINE']} requests={count}")
+
+    tuned = report(f"{settings.DB_PROFILE} profile", simulate_requests(count))
+
+    # Same loop with a fresh connection per request (the untuned behaviour)
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = 0
+    if connection.settings_dict['OPTIONS'].get('pool'):
+        connection.close_pool()
+        del connection.settings_dict['OPTIONS']['pool']
+    cold = report("new connection per request", simulate_requests(count))
+
+    print(f"connection setup cost eliminated: {(cold - tuned) * 1000:.3f} ms per request")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,77 @@
+"""Compare JSON rendering CPU and bytes on the wire for the largest API payloads.
+
+Serializes the doctor list, a patient's appointment list and a doctor's
+record list (padded to ``rows`` items by repeating the seeded data), then
+times DRF's JSONRenderer against the orjson renderer and reports the body
+size raw, gzipped and brotli-compressed as CompressionMiddleware sends it.
+
+    python bench_render.py            # 1000 rows per payload
+    python bench_render.py 5000
+"""
+import gzip
+import os
+import sys
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from api.middleware import HAS_BROTLI
+from api.models import Appointment, Doctor, MedicalRecord
+from api.renderers import HAS_ORJSON, ORJSONRenderer
+from api.serializers import AppointmentSerializer, DoctorSerializer, MedicalRecordSerializer
+
+if HAS_BROTLI:
+    import brotli
+
+
+def padded(rows, count):
+    rows = list(rows)
+    if not rows:
+        return []
+    return [dict(rows[i % len(rows)], id=i + 1) for i in range(count)]
+
+
+def payloads(count):
+    doctors = Doctor.objects.select_related('specialization').prefetch_related('slots')
+    appointments = Appointment.objects.select_related('doctor__specialization', 'slot')
+    records = MedicalRecord.objects.select_related('doctor', 'patient').defer('file_data')
+    return {
+        'doctors/': padded(DoctorSerializer(doctors, many=True).data, count),
+        'appointments/': padded(AppointmentSerializer(appointments, many=True).data, count),
+        'medical-records/': padded(
+            [dict(record, file_data='') for record in MedicalRecordSerializer(records, many=True).data], count
+        ),
+    }
+
+
+def timed(renderer, data, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = renderer.render(data)
+    return (time.perf_counter() - start) / repeat * 1000, body
+
+
+def main(count=1000):
+    print(f"rows={count} orjson={'yes' if HAS_ORJSON else 'no (fallback)'} brotli={'yes' if HAS_BROTLI else 'no'}")
+    print(f"{'endpoint':18} {'json ms':>8} {'orjson ms':>10} {'speedup':>8} {'raw KB':>8} {'gzip KB':>8} {'br KB':>8}")
+    for name, data in payloads(count).items():
+        if not data:
+            print(f"{name:18} no rows in the database; run seed_data.py first")
+            continue
+        std_ms, std_body = timed(JSONRenderer(), data)
+        fast_ms, fast_body = timed(ORJSONRenderer(), data)
+        assert len(fast_body) <= len(std_body) + 16, 'renderers disagree'
+        gz = len(gzip.compress(fast_body, compresslevel=settings.GZIP_LEVEL))
+        br = f"{len(brotli.compress(fast_body, quality=settings.BROTLI_QUALITY)) / 1024:8.1f}" if HAS_BROTLI else f"{'-':>8}"
+        print(f"{name:18} {std_ms:8.2f} {fast_ms:10.2f} {std_ms / fast_ms:7.1f}x "
+              f"{len(fast_body) / 1024:8.1f} {gz / 1024:8.1f} {br}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -4,5 +4,8 @@ set -o errexit
 
 pip install -r requirements.txt
 
+# Cold-start budget (IMPORT_BUDGET_MS), fails the build when exceeded
+python check_import_time.py
+
 python manage.py collectstatic --no-input
 python manage.py migrate
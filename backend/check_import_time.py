@@ -0,0 +1,65 @@
+"""Fail when cold-starting the app takes longer than the import budget.
+
+Runs ``django.setup()``, loads the WSGI application and resolves the URLconf
+in a fresh interpreter under ``-X importtime``, then reports the total and
+the slowest modules. Exits non-zero over budget; ``build.sh`` runs it and
+``api.tests.ImportBudgetTests`` checks the same budget.
+
+    python check_import_time.py               # budget from IMPORT_BUDGET_MS, default 1000
+    python check_import_time.py --budget 600
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BOOT = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings'); "
+    "import core.wsgi; from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+def measure():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode:
+        sys.exit(result.stderr)
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nested imports keep their indentation (one space per level) after the first space
+        modules.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    return modules
+
+
+def total_ms(modules):
+    # Top-level imports (no leading spaces) add up to the whole import time
+    return sum(cumulative for cumulative, _, name in modules if not name.startswith(' ')) / 1000
+
+
+def budget_ms():
+    return int(os.getenv('IMPORT_BUDGET_MS', '1000'))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget', type=int, default=budget_ms(), help='milliseconds')
+    parser.add_argument('--top', type=int, default=15)
+    options = parser.parse_args()
+
+    modules = measure()
+    total = total_ms(modules)
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative, self_us, name in sorted(modules, reverse=True)[:options.top]:
+        print(f"{cumulative / 1000:14.1f} {self_us / 1000:8.1f}  {name.strip()}")
+    print(f"\nimport time {total:.0f} ms, budget {options.budget} ms")
+    if total > options.budget:
+        sys.exit(f"Import time over budget by {total - options.budget:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
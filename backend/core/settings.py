@@ -1,15 +1,8 @@
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
-
-# Use PyMySQL for MySQL if mysqlclient is not available
-# This must be at the very top for Django to use it correctly
-try:
-    import pymysql
-    pymysql.version_info = (2, 2, 1, 'final', 0)
-    pymysql.install_as_MySQLdb()
-except ImportError:
-    pass
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -52,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.LoadShedMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -60,6 +55,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -86,7 +82,6 @@ if HAS_DJ_DATABASE_URL:
     DATABASES = {
         'default': dj_database_url.config(
             default=f'sqlite:///{BASE_DIR}/db.sqlite3',
-            conn_max_age=600
         )
     }
 else:
@@ -120,6 +115,92 @@ if not os.getenv('DATABASE_URL') and os.getenv('DB_NAME'):
             'ssl_mode': 'REQUIRED'
         }
 
+# Database tuning profiles, selected with DB_PROFILE:
+#   persistent  - reuse connections across requests with health checks (default)
+#   pooled      - PostgreSQL built-in connection pool (needs psycopg 3 with the pool extra)
+#   sqlite-wal  - single-node SQLite with WAL journaling and relaxed fsync
+DB_PROFILE = os.getenv('DB_PROFILE', 'persistent')
+if DB_PROFILE not in ('persistent', 'pooled', 'sqlite-wal'):
+    raise ImproperlyConfigured(f"Unknown DB_PROFILE '{DB_PROFILE}'; use persistent, pooled or sqlite-wal.")
+# Django requires persistent connections to be off under ASGI (core.asgi sets DJANGO_ASGI)
+SERVED_BY_ASGI = os.getenv('DJANGO_ASGI', 'False') == 'True'
+DB_CONN_MAX_AGE = 0 if SERVED_BY_ASGI else int(os.getenv('DB_CONN_MAX_AGE', '600'))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+
+
+def tune_database(db):
+    engine = db['ENGINE']
+    options = db.setdefault('OPTIONS', {})
+    db['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    db['CONN_HEALTH_CHECKS'] = True
+
+    if engine.endswith('sqlite3'):
+        # Seconds to wait on a locked database instead of failing immediately
+        options['timeout'] = DB_STATEMENT_TIMEOUT_MS / 1000
+        if DB_PROFILE == 'sqlite-wal':
+            options['init_command'] = (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA mmap_size=134217728;'
+            )
+            options['transaction_mode'] = 'IMMEDIATE'
+    elif 'postgresql' in engine:
+        options['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'
+        if DB_PROFILE == 'pooled':
+            # The pool owns connection lifetimes; persistent connections must be off
+            db['CONN_MAX_AGE'] = 0
+            options['pool'] = {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': 10,
+            }
+    # MySQL/MariaDB statement timeouts are set per connection by api.db_session
+    return db
+
+
+tune_database(DATABASES['default'])
+
+# Read replicas, e.g. DATABASE_REPLICA_URLS=postgres://replica1/db,postgres://replica2/db
+# (or sqlite:///replica.sqlite3 locally). Only views using ReplicaReadMixin read from them.
+DATABASE_REPLICAS = []
+for index, url in enumerate(u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip()):
+    alias = f'replica{index + 1}'
+    if HAS_DJ_DATABASE_URL:
+        DATABASES[alias] = dj_database_url.parse(url)
+    else:
+        DATABASES[alias] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': url.removeprefix('sqlite:///'),
+        }
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    tune_database(DATABASES[alias])
+    DATABASE_REPLICAS.append(alias)
+
+# Use PyMySQL for MySQL if mysqlclient is not available. Only MySQL deployments pay for
+# the import, and it still runs before Django loads the MySQL backend.
+if any(db['ENGINE'].endswith('mysql') for db in DATABASES.values()) and find_spec('MySQLdb') is None:
+    try:
+        import pymysql
+        pymysql.version_info = (2, 2, 1, 'final', 0)
+        pymysql.install_as_MySQLdb()
+    except ImportError:
+        pass
+
+DATABASE_ROUTERS = ['api.db_router.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '10'))
+
+# Replica pins, slot holds, idempotency keys and availability live in the cache; with several
+# workers it must be shared, so point REDIS_URL at a Redis instance in production
+# (check --deploy warns otherwise)
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -150,13 +231,93 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'api.throttling.IdentityThrottle',
+        'api.throttling.ScopedThrottle',
+    ),
+    # Token buckets: the number is also the burst size
+    'DEFAULT_THROTTLE_RATES': {
+        'default': os.getenv('THROTTLE_RATE_DEFAULT', '600/min'),
+        'booking': os.getenv('THROTTLE_RATE_BOOKING', '10/min'),
+        'hold': os.getenv('THROTTLE_RATE_HOLD', '30/min'),  # taken on every slot the patient clicks
+        'otp': os.getenv('THROTTLE_RATE_OTP', '5/min'),
+        'catalog': os.getenv('THROTTLE_RATE_CATALOG', '300/min'),
+    },
 }
+THROTTLE_ENABLED = os.getenv('THROTTLE_ENABLED', 'True') == 'True'
+THROTTLE_STORE = os.getenv('THROTTLE_STORE', 'api.throttling.LocalBucketStore')  # or api.throttling.CacheBucketStore
+
+# Response compression (api.middleware.CompressionMiddleware); brotli is used when installed
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # low qualities are fast enough for per-request compression
+
+# Per-process concurrency budget (0 = no load shedding); priority paths get extra headroom
+LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv('LOAD_SHED_MAX_IN_FLIGHT', '0'))
+LOAD_SHED_PRIORITY_HEADROOM = int(os.getenv('LOAD_SHED_PRIORITY_HEADROOM', '8'))
+LOAD_SHED_PRIORITY_PATHS = ['/api/appointments/', '/api/token/']
+LOAD_SHED_RETRY_AFTER = 1
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
 }
 
+# Background jobs (run with `python manage.py run_jobs`)
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'  # run right after commit instead of via the worker
+JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+JOBS_BACKOFF_BASE = 5  # seconds, doubled on every retry
+JOBS_BACKOFF_MAX = 3600
+JOBS_LOCK_TIMEOUT = 600  # Running jobs older than this are requeued
+JOBS_RETENTION_DAYS = int(os.getenv('JOBS_RETENTION_DAYS', '7'))  # finished jobs are deleted after this
+
+NOTIFICATION_BACKEND = os.getenv('NOTIFICATION_BACKEND', 'api.notifications.ConsoleBackend')
+
+# Booked-slot cache (api/availability.py); only safe when every worker shares the cache
+AVAILABILITY_CACHE_TTL = int(os.getenv('AVAILABILITY_CACHE_TTL', '60' if REDIS_URL else '0'))
+# Replayed requests with the same Idempotency-Key get the stored response (api/idempotency.py)
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = 60  # how long a key stays claimed by a request that is still running
+
+CONSULTATION_FEE = os.getenv('CONSULTATION_FEE', '500.00')
+PAYMENT_CURRENCY = os.getenv('PAYMENT_CURRENCY', 'INR')
+
+SLOT_HOLD_SECONDS = int(os.getenv('SLOT_HOLD_SECONDS', '300'))  # checkout hold on a slot (api/holds.py)
+SLOT_HOLD_STORE = os.getenv('SLOT_HOLD_STORE', 'api.holds.CacheHoldStore')  # or api.holds.DatabaseHoldStore
+SLOT_FINDER_TTL = 30  # seconds before a worker reloads occupancy bitmaps (api/slot_finder.py)
+
+# How often each worker checks the catalogue version row (api/catalog.py)
+CATALOG_VERSION_CHECK_SECONDS = 1.0
+
+# Terminal appointments older than this are moved to the archive table (`archive_appointments`)
+APPOINTMENT_ARCHIVE_AFTER_DAYS = int(os.getenv('APPOINTMENT_ARCHIVE_AFTER_DAYS', '180'))
+
+# Analytics rollups (`rollup_appointments`) skip rows younger than this so ids from open transactions are not missed
+ROLLUP_LAG_SECONDS = int(os.getenv('ROLLUP_LAG_SECONDS', '60'))
+
+# Server-Sent Events (/api/async/events/, api/events.py); RedisBroker relays events between workers
+# LocalBroker only reaches clients of the publishing process; use Redis with more than one
+EVENTS_REDIS_URL = os.getenv('EVENTS_REDIS_URL', REDIS_URL)
+EVENT_BROKER = os.getenv('EVENT_BROKER', 'api.events.RedisBroker' if EVENTS_REDIS_URL else 'api.events.LocalBroker')
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_MAX_STREAM_SECONDS = int(os.getenv('EVENTS_MAX_STREAM_SECONDS', '300'))
+EVENTS_RETRY_MS = 3000
+EVENTS_QUEUE_SIZE = 100
+
+# Delta sync (/api/sync/, api/changes.py): tokens only move past change log entries older than
+# SYNC_LAG_SECONDS, and entries are pruned (`prune_changes`) after SYNC_RETENTION_DAYS
+SYNC_LAG_SECONDS = int(os.getenv('SYNC_LAG_SECONDS', '5'))
+SYNC_RETENTION_DAYS = int(os.getenv('SYNC_RETENTION_DAYS', '30'))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -0,0 +1,49 @@
+"""Work done once before a gunicorn worker takes traffic (see ``gunicorn.conf.py``).
+
+With ``preload_app`` this runs in the master, so forked workers inherit the
+imported modules, the resolved URLconf, built serializer fields and the
+catalogue snapshot instead of each paying for them on its first requests.
+"""
+import logging
+import time
+
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    start = time.perf_counter()
+
+    # Imports every view module and compiles the URL patterns
+    get_resolver().url_patterns
+    get_resolver()._populate()
+
+    # Build the serializer field maps once; DRF caches the model introspection
+    from rest_framework.serializers import ModelSerializer
+
+    from api import serializers
+    for serializer in vars(serializers).values():
+        if isinstance(serializer, type) and issubclass(serializer, ModelSerializer) and hasattr(serializer, 'Meta'):
+            serializer().fields
+
+    try:
+        from api import catalog
+        catalog.snapshot()
+    except Exception:
+        # No database yet (e.g. first deploy before migrate); workers load it lazily
+        logger.warning("Catalogue warm-up skipped", exc_info=True)
+    finally:
+        # Never hand a connection opened here to forked workers
+        connections.close_all()
+
+    logger.info("Warm-up finished in %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+def connect():
+    """Open this worker's database connection before its first request."""
+    try:
+        connections['default'].ensure_connection()
+    except Exception:
+        logger.warning("Could not pre-open the database connection", exc_info=True)
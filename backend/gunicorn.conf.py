@@ -0,0 +1,40 @@
+"""Gunicorn settings, picked up automatically when gunicorn starts from this directory.
+
+    gunicorn core.wsgi:application
+    GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn core.asgi:application
+
+Workers default to gthread so each process serves several requests at once;
+``LoadShedMiddleware`` counts per process and never sheds with one thread.
+
+The app is loaded and warmed once in the master (``preload_app``) and then
+forked, so new workers start serving almost immediately.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+preload_app = True
+
+
+def when_ready(server):
+    from core.warmup import warm_up
+    warm_up()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+    # Database sockets inherited from the master must not be shared between processes
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    from core.warmup import connect
+    connect()
@@ -2,6 +2,7 @@
 
 import { useEffect, useState } from "react";
 import AxiosInstance from "@/lib/AxiosInstance";
+import { subscribeEvents } from "@/lib/events";
 import { Calendar, Search, Clock, CheckCircle, XCircle, Download, Plus, RotateCw } from "lucide-react";
 import { motion, AnimatePresence } from "framer-motion";
 import { useRouter } from "next/navigation";
@@ -30,8 +31,8 @@ export default function BookingsPage() {
     const [isSidebarOpen, setIsSidebarOpen] = useState(false);
     const router = useRouter();
 
-    const fetchBookings = async () => {
-        setLoading(true);
+    const fetchBookings = async (quiet = false) => {
+        if (!quiet) setLoading(true);
         try {
             const response = await AxiosInstance.get('appointments/');
             setAppointments(response.data);
@@ -45,6 +46,13 @@ export default function BookingsPage() {
 
     useEffect(() => {
         fetchBookings();
+        return subscribeEvents((e) => {
+            if (e.event === 'appointment.status') {
+                setAppointments(prev => prev.map(a => a.id === e.data.id ? { ...a, status: e.data.status } : a));
+            } else {
+                fetchBookings(true);
+            }
+        }, () => fetchBookings(true));
     }, []);
 
     const handleCancel = async (id: number) => {
@@ -135,7 +143,7 @@ export default function BookingsPage() {
                                 <div className="glass-container p-4 border-0 shadow-lg bg-white">
                                     <div className="d-flex justify-content-between align-items-center mb-4">
                                         <h6 className="fw-bold m-0 text-dark outfit uppercase smallest tracking-wider opacity-75">Status Categorization</h6>
-                                        <button onClick={fetchBookings} className="btn btn-primary-soft p-1.5 rounded-circle shadow-xs transition-all">
+                                        <button onClick={() => fetchBookings()} className="btn btn-primary-soft p-1.5 rounded-circle shadow-xs transition-all">
                                             <motion.div animate={{ rotate: loading ? 360 : 0 }} transition={{ repeat: loading ? Infinity : 0, duration: 1, ease: "linear" }}>
                                                 <RotateCw size={14} className="text-primary" />
                                             </motion.div>
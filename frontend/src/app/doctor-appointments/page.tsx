@@ -10,6 +10,7 @@ import Sidebar from "@/components/Sidebar";
 import TacticalHeader from "@/components/TacticalHeader";
 import LoadingOverlay from "@/components/LoadingOverlay";
 import AxiosInstance from "@/lib/AxiosInstance";
+import { subscribeEvents } from "@/lib/events";
 import { showSuccess, showError, showConfirm } from "@/lib/alerts";
 import { useRouter } from "next/navigation";
 import { Upload } from "lucide-react";
@@ -60,6 +61,14 @@ export default function DoctorAppointmentsPage() {
         const role = localStorage.getItem("user_role");
         if (role !== "doctor") { router.push("/home"); return; }
         fetchAppointments();
+        // Live updates: status changes are applied in place, new or moved bookings trigger a refresh
+        return subscribeEvents((e) => {
+            if (e.event === "appointment.status") {
+                setAppointments(prev => prev.map(a => a.id === e.data.id ? { ...a, status: e.data.status } : a));
+            } else {
+                fetchAppointments();
+            }
+        }, fetchAppointments);
     }, []);
 
     const fetchAppointments = async () => {
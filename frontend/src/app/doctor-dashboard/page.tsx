@@ -38,6 +38,7 @@ export default function DoctorDashboardPage() {
     const [isSidebarOpen, setIsSidebarOpen] = useState(false);
     const [doctorInfo, setDoctorInfo] = useState<DoctorInfo | null>(null);
     const [appointments, setAppointments] = useState<Appointment[]>([]);
+    const [stats, setStats] = useState({ total: 0, upcoming: 0, accepted: 0, completed: 0, rejected: 0 });
     const [userName, setUserName] = useState("Doctor");
     const router = useRouter();
 
@@ -53,11 +54,13 @@ export default function DoctorDashboardPage() {
 
         const fetchData = async () => {
             try {
-                const [apptRes, profileRes] = await Promise.all([
-                    AxiosInstance.get("doctor-appointments/"),
+                const [apptRes, statsRes, profileRes] = await Promise.all([
+                    AxiosInstance.get("doctor-appointments/?limit=5"),
+                    AxiosInstance.get("doctor-stats/"),
                     AxiosInstance.get("profile/"),
                 ]);
                 setAppointments(apptRes.data);
+                setStats(statsRes.data);
 
                 // Fetch doctor details using doctor_id
                 const doctorId = profileRes.data.doctor_id;
@@ -74,15 +77,7 @@ export default function DoctorDashboardPage() {
         fetchData();
     }, [router]);
 
-    const stats = {
-        total: appointments.length,
-        upcoming: appointments.filter(a => a.status === "Upcoming").length,
-        accepted: appointments.filter(a => a.status === "Accepted").length,
-        completed: appointments.filter(a => a.status === "Completed").length,
-        rejected: appointments.filter(a => a.status === "Rejected").length,
-    };
-
-    const recent = appointments.slice(0, 5);
+    const recent = appointments;
 
     const statusColor: Record<string, string> = {
         Upcoming: "#F59E0B",
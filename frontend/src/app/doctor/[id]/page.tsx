@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useParams, useRouter } from "next/navigation";
 import AxiosInstance from "@/lib/AxiosInstance";
 import {
@@ -38,6 +38,20 @@ interface Slot {
     is_booked: boolean;
 }
 
+interface SlotHold {
+    doctor: string;
+    slot: number;
+    appointment_date: string;
+}
+
+// Give a hold back so the slot is offered to others again right away
+const releaseHold = (hold: SlotHold | null) => {
+    if (!hold || !localStorage.getItem('access_token')) return;
+    AxiosInstance.post('slot-holds/release/', hold).catch(() => {
+        // It expires on its own
+    });
+};
+
 interface Doctor {
     id: number;
     name: string;
@@ -59,6 +73,7 @@ export default function DoctorDetails() {
     // State
     const [doctor, setDoctor] = useState<Doctor | null>(null);
     const [selectedSlot, setSelectedSlot] = useState<number | null>(null);
+    const heldSlot = useRef<SlotHold | null>(null);
 
     // Calendar State
     const [currentMonth, setCurrentMonth] = useState(new Date());
@@ -108,7 +123,34 @@ export default function DoctorDetails() {
         if (id) fetchData();
     }, [id, selectedDate]);
 
+    // Picking another day or leaving the page frees the slot held on this one
+    useEffect(() => () => {
+        releaseHold(heldSlot.current);
+        heldSlot.current = null;
+    }, [id, selectedDate]);
+
     // --- Booking Logic ---
+    // Hold the slot for a few minutes so nobody else books it while the booking is confirmed
+    const handleSelectSlot = async (slotId: number) => {
+        setSelectedSlot(slotId);
+        if (!localStorage.getItem('access_token')) return;
+        const hold = { doctor: id, slot: slotId, appointment_date: format(selectedDate, 'yyyy-MM-dd') };
+        // Only one slot is held at a time: release the previous pick first
+        if (heldSlot.current?.slot !== slotId) {
+            releaseHold(heldSlot.current);
+        }
+        heldSlot.current = null;
+        try {
+            await AxiosInstance.post('slot-holds/', hold);
+            heldSlot.current = hold;
+        } catch (err: any) {
+            if (err.response?.status === 409) {
+                setSelectedSlot(null);
+                showError(err.response.data?.error || "This slot was just taken. Please pick another one.");
+            }
+        }
+    };
+
     const handleBook = async () => {
         if (!selectedSlot || !id) {
             showError("Please select a time slot first.");
@@ -141,7 +183,10 @@ export default function DoctorDetails() {
                 problem: "General Consultation / Checkup"
             };
 
-            await AxiosInstance.post('appointments/', payload);
+            // Same key on the interceptor's retry, so a replay can never book twice
+            await AxiosInstance.post('appointments/', payload, {
+                headers: { 'Idempotency-Key': crypto.randomUUID() },
+            });
 
             // Mock notification trigger
             const mockNotif = {
@@ -153,18 +198,45 @@ export default function DoctorDetails() {
             const existingNotifs = JSON.parse(localStorage.getItem('user_notifications') || '[]');
             localStorage.setItem('user_notifications', JSON.stringify([mockNotif, ...existingNotifs]));
 
+            // The booking took over the hold
+            heldSlot.current = null;
             setBooked(true);
             showSuccess("Success! Your request has been sent for approval.");
             setTimeout(() => router.push('/bookings'), 2000);
         } catch (err: any) {
             console.error("Booking error:", err.response?.data || err);
             const errorMsg = err.response?.data?.error || err.response?.data?.detail || "Unable to process booking request.";
-            showError(errorMsg);
+            if (err.response?.data?.waitlist_available) {
+                await offerWaitlist(errorMsg);
+            } else {
+                showError(errorMsg);
+            }
         } finally {
             setLoading(false);
         }
     };
 
+    const offerWaitlist = async (reason: string) => {
+        const result = await showConfirm(
+            'Join the Waitlist?',
+            `${reason} We can book you automatically if a slot with Dr. ${doctor?.name} frees up on ${format(selectedDate, 'MMMM do')}.`
+        );
+        if (!result.isConfirmed) return;
+        try {
+            await AxiosInstance.post('waitlist/', {
+                doctor: parseInt(id),
+                appointment_date: format(selectedDate, 'yyyy-MM-dd'),
+                patient_name: localStorage.getItem('user_name') || "Patient",
+                patient_age: 24,
+                patient_gender: "Other",
+                problem: "General Consultation / Checkup"
+            });
+            showSuccess("You're on the waitlist. We'll notify you when a slot opens.");
+        } catch (err: any) {
+            showError(err.response?.data?.error || "Unable to join the waitlist.");
+        }
+    };
+
     // --- Calendar Helper Functions ---
     const nextMonth = () => setCurrentMonth(addMonths(currentMonth, 1));
     const prevMonth = () => setCurrentMonth(subMonths(currentMonth, 1));
@@ -408,7 +480,7 @@ export default function DoctorDetails() {
                                                                 shiftSlots.map((slot) => (
                                                                     <div key={slot.id} className="col-6">
                                                                         <button
-                                                                            onClick={() => setSelectedSlot(slot.id)}
+                                                                            onClick={() => handleSelectSlot(slot.id)}
                                                                             disabled={slot.is_booked || !!existingAppointment}
                                                                             className={`btn w-100 py-3 rounded-4 border small fw-bold transition-all ${selectedSlot === slot.id
                                                                                 ? 'bg-primary text-white border-primary shadow-sm'
@@ -50,7 +50,9 @@ export default function AppointmentCard({ booking, onCancel, onUpdate }: { booki
             setProcessing(true);
             try {
                 // Using the dedicated payment endpoint
-                await AxiosInstance.post(`appointments/${booking.id}/make_payment/`);
+                await AxiosInstance.post(`appointments/${booking.id}/make_payment/`, null, {
+                    headers: { 'Idempotency-Key': crypto.randomUUID() },
+                });
                 showSuccess("Payment successful! Your appointment is now confirmed.");
                 onUpdate?.();
             } catch (err) {
@@ -0,0 +1,81 @@
+// Server-Sent Events from /api/async/events/ (appointment.created, appointment.status, appointment.rescheduled).
+// Uses fetch instead of EventSource so the bearer token goes in a header, and reconnects on its own.
+// After a 401 it waits for a new access token (refreshed by AxiosInstance) instead of retrying the expired one.
+
+const API_URL = process.env.NEXT_PUBLIC_API_URL || 'https://bookappoiment.onrender.com/api/';
+
+export interface AppointmentEvent {
+    event: string;
+    data: {
+        id: number;
+        doctor: number;
+        status: string;
+        appointment_date: string;
+        slot: number;
+        patient_name: string;
+        from_status?: string;
+    };
+}
+
+export function subscribeEvents(onEvent: (event: AppointmentEvent) => void, onReconnect?: () => void): () => void {
+    let stopped = false;
+    let controller: AbortController | null = null;
+    let retryMs = 3000;
+
+    const waitForNewToken = (expired: string) => {
+        if (stopped) return;
+        if (localStorage.getItem('access_token') !== expired) connect(true);
+        else setTimeout(() => waitForNewToken(expired), retryMs);
+    };
+
+    const connect = async (isReconnect: boolean) => {
+        const token = localStorage.getItem('access_token');
+        if (!token) return;
+        controller = new AbortController();
+        try {
+            const response = await fetch(`${API_URL}async/events/`, {
+                headers: { Authorization: `Bearer ${token}`, Accept: 'text/event-stream' },
+                signal: controller.signal,
+            });
+            // 501 means the backend runs without ASGI: stay on plain fetching
+            if (response.status === 501 || !response.body) return;
+            if (response.status === 401) {
+                waitForNewToken(token);
+                return;
+            }
+            if (response.ok && isReconnect) onReconnect?.();
+
+            if (response.ok) {
+                const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                let buffer = '';
+                while (!stopped) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += value;
+                    const messages = buffer.split('\n\n');
+                    buffer = messages.pop() || '';
+                    for (const message of messages) {
+                        let name = '';
+                        let data = '';
+                        for (const line of message.split('\n')) {
+                            if (line.startsWith('event: ')) name = line.slice(7);
+                            else if (line.startsWith('data: ')) data += line.slice(6);
+                            else if (line.startsWith('retry: ')) retryMs = Number(line.slice(7)) || retryMs;
+                        }
+                        if (name && data) onEvent({ event: name, data: JSON.parse(data) });
+                    }
+                }
+            }
+        } catch (err) {
+            if (stopped) return;
+        }
+        // Stream ended (timeout, token expiry, network): resync and reconnect
+        if (!stopped) setTimeout(() => connect(true), retryMs);
+    };
+
+    connect(false);
+    return () => {
+        stopped = true;
+        controller?.abort();
+    };
+}